@@ -1,8 +1,8 @@
-import unreal
 import unreallibrary
-from PySide6.QtCore import Qt, QPointF, QRectF, QPoint, QRect
+from undojournal import snapshotTransforms
+from PySide6.QtCore import Qt, QPointF, QRectF, QPoint, QRect, QTimer
 from PySide6.QtGui import QPen, QPainter, QFont, QIntValidator
-from PySide6.QtWidgets import QWidget, QLabel, QVBoxLayout, QHBoxLayout, QLineEdit, QSlider, QStyle
+from PySide6.QtWidgets import QWidget, QLabel, QVBoxLayout, QHBoxLayout, QLineEdit, QSlider, QStyle, QCheckBox
 
 class InfoWidget(QWidget):
     def __init__(self, gridView):
@@ -35,6 +35,9 @@ class InfoWidget(QWidget):
         # set up a slider that updates the z scale (which we dont see in the 2D view)
         self.zSlider = ZSlider()
         self.zSlider.valueChanged.connect(self.zSliderUpdate)
+        # a drag of the slider is one undo step, so the journal stops merging slider ticks when it is let go
+        self.zSlider.sliderReleased.connect(self.gridView.journal.closeMerge)
+        self.zSlider.sliderReleased.connect(self.writeZScale)
         self.zSlider.setMinimum(1)
         self.zSlider.setMaximum(1000)
         self.zSlider.setValue(25)
@@ -50,8 +53,30 @@ class InfoWidget(QWidget):
         zSliderValidator = QIntValidator(self.zSlider.minimum(), self.zSlider.maximum())
         self.zValue.setValidator(zSliderValidator)
         
+        # a slider drag changes the z scale every tick, so the actors are only written the latest scale
+        # of their records once every zScaleInterval milliseconds while it moves, and again when it is let go
+        self.zScaleInterval = 100
+        self.zScaleItems = set()
+        self.zScaleTimer = QTimer(self)
+        self.zScaleTimer.setSingleShot(True)
+        self.zScaleTimer.timeout.connect(self.writeZScale)
+        
         # TODO: Something up with z-axis on new items when previously selecting an updated z-axis
         
+        # toggles for snapping while dragging and highlighting overlapping blocks
+        self.snapGridCheckBox = QCheckBox("Snap to grid")
+        self.snapGridCheckBox.setChecked(self.gridView.snapToGrid)
+        self.snapGridCheckBox.toggled.connect(self.snapGridUpdate)
+        self.snapEdgesCheckBox = QCheckBox("Snap to edges")
+        self.snapEdgesCheckBox.setChecked(self.gridView.snapToEdges)
+        self.snapEdgesCheckBox.toggled.connect(self.snapEdgesUpdate)
+        self.overlapCheckBox = QCheckBox("Highlight overlaps")
+        self.overlapCheckBox.setChecked(self.gridView.highlightOverlaps)
+        self.overlapCheckBox.toggled.connect(self.gridView.setHighlightOverlaps)
+        self.liveSyncCheckBox = QCheckBox("Live sync")
+        self.liveSyncCheckBox.setChecked(self.gridView.liveSync)
+        self.liveSyncCheckBox.toggled.connect(self.liveSyncUpdate)
+        
         self.zoomSliderLayout = QHBoxLayout()
         self.zoomSliderLabel = QLabel("Grid Zoom:")
         self.zoomSliderLayout.addWidget(self.zoomSliderLabel)
@@ -68,10 +93,17 @@ class InfoWidget(QWidget):
         self.zSliderLayout.addWidget(self.zSlider)
         self.zSliderLayout.addWidget(self.zValue)
         
+        self.snapLayout = QHBoxLayout()
+        self.snapLayout.addWidget(self.snapGridCheckBox)
+        self.snapLayout.addWidget(self.snapEdgesCheckBox)
+        self.snapLayout.addWidget(self.overlapCheckBox)
+        self.snapLayout.addWidget(self.liveSyncCheckBox)
+        
         self.vertLayout = QVBoxLayout(self)
         self.vertLayout.addLayout(self.zoomSliderLayout)
         self.vertLayout.addLayout(self.nameLayout)
         self.vertLayout.addLayout(self.zSliderLayout)
+        self.vertLayout.addLayout(self.snapLayout)
         
         self.setLayout(self.vertLayout)
         
@@ -80,11 +112,41 @@ class InfoWidget(QWidget):
         Since this is a 2D grid, the z-axis is obviously not a factor. But we want to give the user the ability to very losely set the z-height
         
         """
-        if self.gridView.scene.selectedItems():
-            for item in self.gridView.scene.selectedItems():
-                selectedItemAsset = item.unrealActor
-                selectedItemAsset.set_actor_scale3d(unreal.Vector(selectedItemAsset.get_actor_scale3d().x, selectedItemAsset.get_actor_scale3d().y, self.zSlider.value()/100))
-                self.zValue.setText(str(self.zSlider.value()/100))
+        selectedItems = self.gridView.scene.selectedItems()
+        if selectedItems:
+            zScale = self.zSlider.value()/100
+            before = snapshotTransforms([item.record for item in selectedItems])
+            for item in selectedItems:
+                # every record takes the new scale, including those whose actor is still waiting to be spawned,
+                # which is given its record's scale when it is
+                item.record.setScale(item.record.scaleX, item.record.scaleY, zScale)
+            self.zScaleItems.update(selectedItems)
+            if not self.zScaleTimer.isActive():
+                self.zScaleTimer.start(self.zScaleInterval)
+            self.gridView.journalTransforms(before, mergeKey='zScale')
+            self.zValue.setText(str(zScale))
+    
+    def writeZScale(self):
+        """Writes the scale of the items the zSlider has changed since the last write to their actors"""
+        self.zScaleTimer.stop()
+        items = self.zScaleItems
+        self.zScaleItems = set()
+        for item in items:
+            # reading the record rather than the slider also writes the right scale if the change was undone since
+            if item.unrealActor:
+                item.setActorScale(*item.record.scale())
+            
+    def snapGridUpdate(self, checked):
+        """Turns snapping to grid lines on or off while dragging"""
+        self.gridView.snapToGrid = checked
+        
+    def snapEdgesUpdate(self, checked):
+        """Turns snapping to the edges of neighbouring blocks on or off while dragging"""
+        self.gridView.snapToEdges = checked
+            
+    def liveSyncUpdate(self, checked):
+        """Turns pushing transforms to Unreal while dragging on or off"""
+        self.gridView.liveSync = checked
             
     def zoomSliderUpdate(self):
         """Updates the grid zoom and the QLineEdit that displays the value of the zoomSlider"""
@@ -100,18 +162,25 @@ class InfoWidget(QWidget):
         self.zoomSlider.setValue(int(self.zoomValue.text())*100)
     
     def updateInfo(self):
-        """Updates the widget based on the selected item"""
-        if self.gridView and self.gridView.scene.selectedItems():
-            if len(self.gridView.scene.selectedItems()) > 1:
+        """Updates the widget based on the selected item, reading the state cached on the items rather than asking Unreal"""
+        selectedItems = self.gridView.selectedBlocks() if self.gridView else []
+        if selectedItems:
+            # setting the slider from the selection shouldn't write the value back to the selected actors
+            self.zSlider.blockSignals(True)
+            if len(selectedItems) > 1:
                 # if we have more than one item selected, set some base values
                 # we want to keep these around though because we allow for z-scale updates with multi-select
                 self.zSlider.setValue(100)
                 self.nameLineEdit.setText("Multiple items selected")
             else:
-                selectedItem = self.gridView.scene.selectedItems()[0]
-                selectedName = selectedItem.unrealActor.get_actor_label()
-                self.zSlider.setValue(selectedItem.unrealActor.get_actor_scale3d().z*100)
-                self.nameLineEdit.setText(selectedName)    
+                record = selectedItems[0].record
+                if record.label is None and record.actor:
+                    # copied actors are labelled by Unreal, so we only need to ask for it once
+                    record.label = self.gridView.UEL.getActorLabel(record.actor)
+                self.zSlider.setValue(round(record.zScale*100))
+                self.nameLineEdit.setText(record.label)
+            self.zSlider.blockSignals(False)
+            self.zValue.setText(str(self.zSlider.value()/100))
     
 class ZSlider(QSlider):
     def __init__(self):
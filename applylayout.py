@@ -0,0 +1,50 @@
+import os
+import sys
+
+# applies a layout file to the open level without the window, from the editor's Output Log with
+# `py applylayout.py path/to/layout.qbl`, from a commandlet with `-run=pythonscript -script="applylayout.py path/to/layout.qbl"`,
+# or from its own process with `python applylayout.py path/to/layout.qbl --remote [host:port]` while the bridge server runs
+remoteAddress = os.environ.get('QUICKBLOCK_REMOTE')
+if '--remote' in sys.argv:
+    index = sys.argv.index('--remote')
+    remoteAddress = sys.argv[index + 1] if index + 1 < len(sys.argv) and not sys.argv[index + 1].startswith('-') else 'default'
+if remoteAddress:
+    import remotebridge
+    remotebridge.install(None if remoteAddress == 'default' else remoteAddress)
+
+from blockoutdocument import BlockoutDocument
+from instrumentation import log
+
+def applyLayout(path, document=None):
+    """Applies a layout file to the open level as one change in the editor's undo history
+    
+    Blocks are bound to level actors with the same label, so only those missing from the level are spawned
+    
+    Args:
+        path (str): The layout file to apply
+        document (BlockoutDocument): The document to add the blocks to, a new one if not given
+    
+    Returns:
+        The BlockoutDocument holding the layout's blocks
+    """
+    document = document or BlockoutDocument()
+    poolStats = document.UEL.poolStats
+    reused, spawned = poolStats['hits'], poolStats['misses']
+    with document.UEL.transaction("Apply QuickBlock Layout"):
+        ids = document.apply(path)
+    log.info("applied %s blocks from %s, spawning %s actors and reusing %s from the pool", len(ids), path,
+             poolStats['misses'] - spawned, poolStats['hits'] - reused)
+    return document
+
+if __name__ == '__main__':
+    import argparse
+    import logging
+    
+    parser = argparse.ArgumentParser(description="Applies a QuickBlock layout file to the open level")
+    parser.add_argument('path', help="the layout file to apply")
+    parser.add_argument('--remote', nargs='?', const='default', help="reach the editor through the bridge server at host:port")
+    arguments = parser.parse_args()
+    
+    logging.basicConfig()
+    log.setLevel(logging.INFO)
+    applyLayout(arguments.path)
@@ -0,0 +1,421 @@
+import unreal
+
+import os
+import struct
+import tempfile
+import threading
+
+import numpy as np
+
+from PySide6.QtCore import QObject, Signal
+
+from instrumentation import BridgeProfiler, InstrumentedNamespace, log, timed
+from layoutfile import StringTable, align
+
+# the cache file mirrors the layout file: a header, one packed column per field, then the string table
+MAGIC = b'QBAI'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIII')
+
+# (name, dtype) of the folder columns, written first, and of the asset columns, written after them
+FOLDER_COLUMNS = (
+    ('folderPath', np.uint32),
+    ('folderMtime', np.float64),
+)
+ASSET_COLUMNS = (
+    ('assetFolder', np.uint32),
+    ('assetName', np.uint32),
+    ('assetClass', np.uint32),
+    ('assetMtime', np.float64),
+)
+
+ASSET_EXTENSIONS = ('.uasset', '.umap')
+
+# past this many changed folders, classes are read with one recursive registry query per content root
+# rather than one query per folder
+BULK_CLASS_QUERY = 64
+
+def columnOffsets(folderCount, assetCount):
+    """Gets the byte offset of each column, and of the string table that follows them
+    
+    Args:
+        folderCount (int): The number of folders in the file
+        assetCount (int): The number of assets in the file
+    
+    Returns:
+        A tuple of ({column name: offset}, string table offset)
+    """
+    offsets = {}
+    offset = align(HEADER.size)
+    for columns, count in ((FOLDER_COLUMNS, folderCount), (ASSET_COLUMNS, assetCount)):
+        for name, dtype in columns:
+            offsets[name] = offset
+            offset = align(offset + count * np.dtype(dtype).itemsize)
+    return offsets, offset
+
+def contentRoots():
+    """Gets the content folders on disk that the index covers, by their mount point
+    
+    Returns:
+        A dict of {mount point: folder}, e.g. {'/Game': 'C:/Projects/MyGame/Content'}
+    """
+    try:
+        return {
+            '/Game': unreal.Paths.convert_relative_path_to_full(unreal.Paths.project_content_dir()),
+            '/Engine': unreal.Paths.convert_relative_path_to_full(unreal.Paths.engine_content_dir()),
+        }
+    except AttributeError:
+        log.warning("Unreal's content folders are not exposed to Python, the asset index will be empty")
+        return {}
+
+def defaultCachePath():
+    """Gets where the asset index is cached, in the project's Saved folder
+    
+    Returns:
+        The path of the cache file
+    """
+    try:
+        savedDir = unreal.Paths.convert_relative_path_to_full(unreal.Paths.project_saved_dir())
+    except AttributeError:
+        savedDir = tempfile.gettempdir()
+    return os.path.join(savedDir, 'QuickBlock', 'AssetIndex.bin')
+
+def assetClassName(assetData):
+    """Gets the class name of an asset from its registry data, e.g. 'StaticMesh'"""
+    try:
+        return str(assetData.asset_class_path.asset_name)
+    except AttributeError:
+        # engine versions before 5.1 only have the short class name
+        return str(assetData.asset_class)
+
+class AssetIndex(QObject):
+    """An index of every asset in the content folders, cached on disk and refreshed in the background
+    
+    Folders are stored with their modification time, so a refresh only lists the folders that changed since the
+    last one and reuses everything else from the cache. Walking the folders happens on a worker thread, and only
+    the class names of new or changed assets are asked of the asset registry, back on the Qt thread
+    
+    The assets are kept as flat lists by row, along with their object paths, which are built once here so
+    that nothing downstream has to convert file paths to object paths
+    """
+    # emitted on the Qt thread whenever the index has been loaded or refreshed
+    ready = Signal()
+    # (folders, changed folders) from the worker thread
+    scanned = Signal(object, object)
+    
+    def __init__(self, roots=None, cachePath=None, parent=None):
+        """Init's AssetIndex
+        
+        Args:
+            roots (dict): The content folders to index by mount point, Unreal's project and engine content if not given
+            cachePath (str): Where to cache the index, in the project's Saved folder if not given
+            parent (QObject): The Qt parent
+        """
+        super().__init__(parent)
+        self.roots = contentRoots() if roots is None else roots
+        self.cachePath = cachePath or defaultCachePath()
+        
+        # {package path: (mtime, subfolder package paths, [(asset name, mtime, class name), ...])}
+        self.folders = {}
+        self.names = []
+        self.classes = []
+        self.packagePaths = []
+        self.mtimes = []
+        self.objectPaths = []
+        self.searchTables = {}
+        
+        self.worker = None
+        self.refreshPending = False
+        self.scanned.connect(self.finishRefresh)
+    
+    def __len__(self):
+        return len(self.names)
+    
+    def load(self):
+        """Loads the index from its cache file, if there is a usable one
+        
+        Returns:
+            Whether the cache was loaded
+        """
+        try:
+            with open(self.cachePath, 'rb') as cacheFile:
+                data = cacheFile.read()
+        except OSError:
+            return False
+        
+        magic, version, _, folderCount, assetCount, stringOffset = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            log.info("ignoring asset index cache %s from another version", self.cachePath)
+            return False
+        
+        offsets, _ = columnOffsets(folderCount, assetCount)
+        columns = {}
+        for names, count in ((FOLDER_COLUMNS, folderCount), (ASSET_COLUMNS, assetCount)):
+            for name, dtype in names:
+                columns[name] = np.frombuffer(data, dtype, count, offsets[name]).tolist()
+        
+        stringCount, = struct.unpack_from('<I', data, stringOffset)
+        ends = np.frombuffer(data, np.uint32, stringCount, stringOffset + 4).tolist()
+        base = stringOffset + 4 + stringCount * 4
+        strings = [data[base + start:base + end].decode('utf-8') for start, end in zip([0] + ends[:-1], ends)]
+        
+        paths = [strings[index] for index in columns['folderPath']]
+        assets = [[] for _ in paths]
+        for folder, name, className, mtime in zip(columns['assetFolder'], columns['assetName'], columns['assetClass'], columns['assetMtime']):
+            assets[folder].append((strings[name], mtime, strings[className]))
+        subfolders = {path: [] for path in paths}
+        for path in paths:
+            parent = path.rpartition('/')[0]
+            if parent in subfolders:
+                subfolders[parent].append(path)
+        self.folders = {path: (mtime, tuple(subfolders[path]), folderAssets)
+                        for path, mtime, folderAssets in zip(paths, columns['folderMtime'], assets)}
+        self.rebuild()
+        self.ready.emit()
+        return True
+    
+    def save(self):
+        """Writes the index to its cache file, replacing the old one in one step"""
+        strings = StringTable()
+        paths = sorted(self.folders)
+        folderColumns = {
+            'folderPath': np.array([strings.intern(path) for path in paths], np.uint32),
+            'folderMtime': np.array([self.folders[path][0] for path in paths], np.float64),
+        }
+        rows = [(folder, strings.intern(name), strings.intern(className), mtime)
+                for folder, path in enumerate(paths) for name, mtime, className in self.folders[path][2]]
+        assetColumns = dict(zip(('assetFolder', 'assetName', 'assetClass', 'assetMtime'), zip(*rows))) if rows else {}
+        for name, dtype in ASSET_COLUMNS:
+            assetColumns[name] = np.array(assetColumns.get(name, ()), dtype)
+        offsets, stringOffset = columnOffsets(len(paths), len(rows))
+        
+        os.makedirs(os.path.dirname(self.cachePath), exist_ok=True)
+        tempPath = self.cachePath + '.tmp'
+        with open(tempPath, 'wb') as cacheFile:
+            cacheFile.write(HEADER.pack(MAGIC, VERSION, 0, len(paths), len(rows), stringOffset))
+            for columns, values in ((FOLDER_COLUMNS, folderColumns), (ASSET_COLUMNS, assetColumns)):
+                for name, dtype in columns:
+                    cacheFile.write(b'\0' * (offsets[name] - cacheFile.tell()))
+                    cacheFile.write(values[name].tobytes())
+            cacheFile.write(b'\0' * (stringOffset - cacheFile.tell()))
+            cacheFile.write(strings.pack())
+        os.replace(tempPath, self.cachePath)
+    
+    def refresh(self):
+        """Starts refreshing the index on a worker thread, ready is emitted once it is done
+        
+        A refresh asked for while one is running starts again once the running one finishes
+        """
+        if self.worker is not None:
+            self.refreshPending = True
+            return
+        roots = dict(self.roots)
+        previous = dict(self.folders)
+        self.worker = threading.Thread(target=self.scanInBackground, args=(roots, previous), daemon=True)
+        self.worker.start()
+    
+    def scanInBackground(self, roots, previous):
+        """Runs scan() on the worker thread and hands its result to the Qt thread through the scanned signal"""
+        try:
+            folders, changed = self.scan(roots, previous)
+        except Exception:
+            log.exception("Could not refresh the asset index")
+            folders, changed = previous, []
+        self.scanned.emit(folders, changed)
+    
+    def isRefreshing(self):
+        """Whether a refresh is running"""
+        return self.worker is not None
+    
+    @staticmethod
+    def scan(roots, previous):
+        """Walks the content folders, listing only those whose modification time changed since the previous scan
+        
+        A folder's modification time changes when files are added to, removed from or saved over in it, but not
+        when a subfolder changes, so every folder is still stat'ed, but unchanged folders are not listed
+        
+        Args:
+            roots (dict): The content folders by mount point
+            previous (dict): The folders of the previous scan
+        
+        Returns:
+            A tuple of (folders, package paths of the folders with assets whose class is not known yet)
+        """
+        folders = {}
+        changed = []
+        stack = list(roots.items())
+        while stack:
+            packagePath, folderPath = stack.pop()
+            try:
+                mtime = os.stat(folderPath).st_mtime
+            except OSError:
+                continue
+            
+            cached = previous.get(packagePath)
+            if cached is not None and cached[0] == mtime:
+                folders[packagePath] = cached
+                stack.extend((subfolder, os.path.join(folderPath, subfolder.rpartition('/')[2])) for subfolder in cached[1])
+                continue
+            
+            # assets that were saved over since the last scan need their class asking for again
+            known = {name: (assetMtime, className) for name, assetMtime, className in cached[2]} if cached else {}
+            subfolders = []
+            assets = []
+            try:
+                entries = list(os.scandir(folderPath))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subfolder = '{}/{}'.format(packagePath, entry.name)
+                    subfolders.append(subfolder)
+                    stack.append((subfolder, entry.path))
+                    continue
+                name, extension = os.path.splitext(entry.name)
+                if extension not in ASSET_EXTENSIONS:
+                    continue
+                assetMtime = entry.stat().st_mtime
+                knownMtime, className = known.get(name, (None, None))
+                assets.append((name, assetMtime, className if knownMtime == assetMtime else None))
+            folders[packagePath] = (mtime, tuple(subfolders), assets)
+            if any(className is None for _, _, className in assets):
+                changed.append(packagePath)
+        return folders, changed
+    
+    @timed('assetIndexRefresh')
+    def finishRefresh(self, folders, changed):
+        """Fills in the classes of new assets from the asset registry, then swaps in the refreshed folders and caches them
+        
+        Args:
+            folders (dict): The folders from scan()
+            changed (list): The package paths of folders with assets whose class is not known yet
+        """
+        self.worker = None
+        if changed:
+            self.resolveClasses(folders, changed)
+        self.folders = folders
+        self.rebuild()
+        try:
+            self.save()
+        except OSError:
+            log.exception("Could not cache the asset index to %s", self.cachePath)
+        log.debug("asset index refreshed, %s assets in %s folders, %s folders changed", len(self.names), len(folders), len(changed))
+        self.ready.emit()
+        
+        if self.refreshPending:
+            self.refreshPending = False
+            self.refresh()
+    
+    def resolveClasses(self, folders, changed):
+        """Asks the asset registry for the classes of the assets in the changed folders
+        
+        Args:
+            folders (dict): The folders from scan(), whose asset lists are filled in place
+            changed (list): The package paths of the folders to fill in
+        """
+        registry = InstrumentedNamespace(unreal.AssetRegistryHelpers.get_asset_registry(), BridgeProfiler.shared())
+        if len(changed) > BULK_CLASS_QUERY:
+            queries = [(root, True) for root in {'/' + path.split('/')[1] for path in changed}]
+        else:
+            queries = [(path, False) for path in changed]
+        classes = {}
+        for packagePath, recursive in queries:
+            for assetData in registry.get_assets_by_path(packagePath, recursive):
+                classes[(str(assetData.package_path), str(assetData.asset_name))] = assetClassName(assetData)
+        
+        for packagePath in changed:
+            assets = folders[packagePath][2]
+            # assets the registry hasn't discovered yet get an empty class rather than being asked about every refresh
+            assets[:] = [(name, mtime, className if className is not None else classes.get((packagePath, name), ''))
+                         for name, mtime, className in assets]
+    
+    def rebuild(self):
+        """Flattens the folders into the rows that are searched and picked from"""
+        self.names = []
+        self.classes = []
+        self.packagePaths = []
+        self.mtimes = []
+        for packagePath in sorted(self.folders):
+            for name, mtime, className in self.folders[packagePath][2]:
+                self.names.append(name)
+                self.classes.append(className)
+                self.packagePaths.append(packagePath)
+                self.mtimes.append(mtime)
+        self.objectPaths = ['{}/{}.{}'.format(packagePath, name, name) for packagePath, name in zip(self.packagePaths, self.names)]
+        # the name table is built here rather than on the first keystroke
+        self.searchTables = {}
+        self.searchTable()
+    
+    def filePath(self, row):
+        """Gets the file on disk of an asset, e.g. 'C:/Projects/MyGame/Content/Props/SM_Rock.uasset'
+        
+        Args:
+            row (int): The row of the asset
+            
+        Returns:
+            The path of the asset's package file, or None if its content folder is not indexed
+        """
+        root, _, rest = self.packagePaths[row].strip('/').partition('/')
+        folder = self.roots.get('/' + root)
+        if folder is None:
+            return None
+        extension = '.umap' if self.classes[row] == 'World' else '.uasset'
+        return os.path.join(folder, *(rest.split('/') if rest else ()), self.names[row] + extension)
+    
+    def searchTable(self, paths=False):
+        """Gets the lowercased names or package paths of the assets joined into one utf-8 buffer, with where each row starts and ends in it
+        
+        Args:
+            paths (bool): Whether to join the assets' package paths, ending in their names, rather than only their names
+            
+        Returns:
+            A tuple of (buffer as a uint8 array, row starts, row ends, {byte: positions of that byte in the buffer})
+        """
+        table = self.searchTables.get(paths)
+        if table is None:
+            values = ['{}/{}'.format(packagePath, name) for packagePath, name in zip(self.packagePaths, self.names)] if paths else self.names
+            encoded = [value.lower().encode('utf-8') for value in values]
+            lengths = np.fromiter((len(value) for value in encoded), np.int64, len(encoded))
+            ends = np.cumsum(lengths + 1) - 1
+            table = self.searchTables[paths] = (np.frombuffer(b'\n'.join(encoded), np.uint8), ends - lengths, ends, {})
+        return table
+        
+    @timed('assetSearch')
+    def search(self, query, limit=200):
+        """Fuzzy searches the assets, matching the letters of the query in order anywhere in the name
+        
+        Tighter matches rank first, then matches closer to the start of the name, then shorter names.
+        A query with a '/' in it is matched against the package path and name rather than only the name
+        
+        Every row is matched at once, one letter of the query at a time: each row's match moves on to the first
+        occurrence of the next letter after it, found with a binary search over where that letter occurs in the
+        whole buffer, and rows whose match runs past their end drop out
+        
+        Args:
+            query (str): What to search for
+            limit (int): The most rows to return
+            
+        Returns:
+            A list of rows, best match first
+        """
+        query = ''.join(query.lower().split())
+        if not query:
+            return list(range(min(limit, len(self.names))))
+        
+        data, starts, ends, occurrences = self.searchTable(paths='/' in query)
+        rows = np.arange(len(starts))
+        position = starts - 1
+        first = None
+        for byte in query.encode('utf-8'):
+            found = occurrences.get(byte)
+            if found is None:
+                # the buffer's length is appended so that every search lands on a position, past every row if nothing is left
+                found = occurrences[byte] = np.append(np.flatnonzero(data == byte), len(data))
+            position = found[np.searchsorted(found, position + 1)]
+            keep = position < ends[rows]
+            rows = rows[keep]
+            position = position[keep]
+            first = position if first is None else first[keep]
+        
+        order = np.lexsort((ends[rows] - starts[rows], first - starts[rows], position - first))
+        return rows[order[:limit]].tolist()
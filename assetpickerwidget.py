@@ -1,21 +1,58 @@
 import unreal
 import unreallibrary
-from PySide6.QtCore import Qt, QPointF, QRectF, QPoint, QRect
-from PySide6.QtGui import QPen, QPainter, QFont, QIntValidator
-from PySide6.QtWidgets import QWidget, QPushButton, QVBoxLayout, QHBoxLayout, QFileDialog, QLineEdit
+from PySide6.QtCore import Qt, QPointF, QRectF, QPoint, QRect, QSize, QTimer
+from PySide6.QtGui import QPen, QPainter, QFont, QIntValidator, QIcon
+from PySide6.QtWidgets import QWidget, QPushButton, QVBoxLayout, QHBoxLayout, QLineEdit, QListWidget, QListWidgetItem, QListView
 
+from assetindex import AssetIndex
+from instrumentation import log
+from thumbnailcache import ThumbnailCache
 from unreallibrary import UnrealLibrary
 
 class AssetPicker(QWidget):
     def __init__(self, gridView):
         """ Init's UnrealLibrary and initializes the necessary libraries"""
         super().__init__()
-        self.UEL = UnrealLibrary()
+        self.UEL = UnrealLibrary.shared()
         self.assetPath = None
         self.unrealAsset = None
         self.gridView = gridView
         
-        self.assetPickerButton = QPushButton("Pick Asset")
+        # assets are picked by searching the asset index, which is loaded from its cache straight away
+        # and then refreshed in the background, rather than by walking the content folders in a file dialog
+        self.assetIndex = AssetIndex(parent=self)
+        self.assetIndex.ready.connect(self.updateResults)
+        self.resultRows = []
+        self.resultLimit = 200
+        
+        self.searchLineEdit = QLineEdit()
+        self.searchLineEdit.setPlaceholderText("Search assets...")
+        self.searchLineEdit.setClearButtonEnabled(True)
+        self.searchLineEdit.textChanged.connect(self.updateResults)
+        
+        # the results are shown as a grid of thumbnails, which are loaded on worker threads for the visible cells only
+        self.thumbnailSize = 64
+        self.thumbnails = ThumbnailCache(self.thumbnailSize, parent=self)
+        self.thumbnails.thumbnailReady.connect(self.setThumbnail)
+        self.resultItems = {}
+        self.thumbnailDebounce = 30
+        self.thumbnailTimer = QTimer(self)
+        self.thumbnailTimer.setSingleShot(True)
+        self.thumbnailTimer.timeout.connect(self.loadVisibleThumbnails)
+        
+        self.resultsList = QListWidget()
+        self.resultsList.setViewMode(QListView.IconMode)
+        self.resultsList.setMovement(QListView.Static)
+        self.resultsList.setResizeMode(QListView.Adjust)
+        self.resultsList.setUniformItemSizes(True)
+        self.resultsList.setWordWrap(True)
+        self.resultsList.setIconSize(QSize(self.thumbnailSize, self.thumbnailSize))
+        self.resultsList.setGridSize(QSize(self.thumbnailSize + 32, self.thumbnailSize + 36))
+        self.resultsList.currentRowChanged.connect(self.pickAsset)
+        self.resultsList.itemDoubleClicked.connect(self.spawnActor)
+        self.resultsList.verticalScrollBar().valueChanged.connect(self.scheduleThumbnails)
+        
+        self.refreshAssetsButton = QPushButton("Refresh Assets")
         self.spawnAssetButton = QPushButton("Spawn Asset")
         self.spawnAssetButton.setDisabled(True)
         
@@ -23,35 +60,89 @@ class AssetPicker(QWidget):
         self.assetLineEdit.setDisabled(True)
         self.assetLineEdit.setReadOnly(True)
         
-        self.assetPickerButton.pressed.connect(self.pickAsset)
+        self.refreshAssetsButton.pressed.connect(self.assetIndex.refresh)
         self.spawnAssetButton.pressed.connect(self.spawnActor)
         
         self.mainLayout = QVBoxLayout(self)
+        self.mainLayout.addWidget(self.searchLineEdit)
+        self.mainLayout.addWidget(self.resultsList)
         self.mainLayout.addWidget(self.assetLineEdit)
-        self.mainLayout.addWidget(self.assetPickerButton)
+        self.mainLayout.addWidget(self.refreshAssetsButton)
         self.mainLayout.addWidget(self.spawnAssetButton)
         
-    def pickAsset(self):
-        contentDir = self.UEL.EUL.get_current_content_browser_path()
+        self.assetIndex.load()
+        self.assetIndex.refresh()
         
-        dialog = QFileDialog(self, "Content Browser", contentDir)
-        dialog.setFileMode(QFileDialog.ExistingFile)
-        dialog.setViewMode(QFileDialog.Detail)
-        dialog.setOption(QFileDialog.DontUseNativeDialog, True)
+    def updateResults(self):
+        """Fills the results list with the best matches for the search text"""
+        index = self.assetIndex
+        self.resultRows = index.search(self.searchLineEdit.text(), self.resultLimit)
+        self.resultsList.blockSignals(True)
+        self.resultsList.clear()
+        self.resultItems = {}
+        for row in self.resultRows:
+            item = QListWidgetItem(index.names[row])
+            item.setToolTip("{}  ({})  {}".format(index.names[row], index.classes[row] or "?", index.packagePaths[row]))
+            self.resultsList.addItem(item)
+            self.resultItems[index.objectPaths[row]] = item
+        self.resultsList.blockSignals(False)
+        self.scheduleThumbnails()
         
-        if dialog.exec() == QFileDialog.Accepted:
-            selected_files = dialog.selectedFiles()
-            if selected_files:
-                self.assetPath = selected_files[0].split("Content")[1]
-                
-                self.spawnAssetButton.setEnabled(True)
-                self.assetLineEdit.setEnabled(True)
-                assetName = self.assetPath.split("/")[-1].split(".")[0]
-                self.assetLineEdit.setText(assetName)
-                print(self.assetPath)
+    def scheduleThumbnails(self):
+        """Restarts the debounce timer for loading the thumbnails of the visible cells"""
+        self.thumbnailTimer.start(self.thumbnailDebounce)
+        
+    def loadVisibleThumbnails(self):
+        """Shows the thumbnails of the visible cells, asking for those not loaded yet and cancelling the rest"""
+        index = self.assetIndex
+        viewportRect = self.resultsList.viewport().rect()
+        visible = set()
+        for resultRow, row in enumerate(self.resultRows):
+            item = self.resultsList.item(resultRow)
+            if not self.resultsList.visualItemRect(item).intersects(viewportRect):
+                continue
+            objectPath = index.objectPaths[row]
+            visible.add(objectPath)
+            if not item.icon().isNull():
+                continue
+            pixmap = self.thumbnails.get(objectPath, index.filePath(row), index.mtimes[row], index.names[row], index.classes[row])
+            if pixmap is not None:
+                item.setIcon(QIcon(pixmap))
+        self.thumbnails.cancelExcept(visible)
+        
+    def setThumbnail(self, objectPath, pixmap):
+        """Shows a thumbnail that finished loading, if its asset is still in the results
+        
+        Args:
+            objectPath (str): The object path of the asset
+            pixmap (QPixmap): The thumbnail
+        """
+        item = self.resultItems.get(objectPath)
+        if item is not None:
+            item.setIcon(QIcon(pixmap))
+            
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.scheduleThumbnails()
+        
+    def pickAsset(self, resultRow):
+        """Picks the asset shown in a row of the results list as the one to spawn
+        
+        Args:
+            resultRow (int): The row of the results list
+        """
+        if not 0 <= resultRow < len(self.resultRows):
+            return
+        row = self.resultRows[resultRow]
+        # the index already holds the object path, so spawning never has to work it out from a file path
+        self.assetPath = self.assetIndex.objectPaths[row]
+        
+        self.spawnAssetButton.setEnabled(True)
+        self.assetLineEdit.setEnabled(True)
+        self.assetLineEdit.setText(self.assetIndex.names[row])
+        log.debug("picked asset %s", self.assetPath)
                 
     def spawnActor(self):
-        self.gridView.addItem(assetPath=self.assetPath)
+        if self.assetPath:
+            self.gridView.addItem(assetPath=self.assetPath)
         
-                
-            
\ No newline at end of file
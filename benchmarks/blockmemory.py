@@ -0,0 +1,136 @@
+"""Measures the memory of real SquareItems, as the grid built them before blocks became views over a BlockRecord and now
+
+Run with `python benchmarks/blockmemory.py [count] [--revision REV]` from a Python with PySide6 installed
+
+The old SquareItem and the UnrealLibrary each of them created for itself are checked out of git, from the first
+commit unless another revision is given, and both layouts are built in their own process against the stand-in
+`unreal` module from benchmarks/fake. Memory held by the stand-in actors is left out of the traced bytes, as every
+block has an actor in Unreal either way
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+benchmarkFolder = os.path.dirname(os.path.abspath(__file__))
+repoFolder = os.path.dirname(benchmarkFolder)
+fakeFolder = os.path.join(benchmarkFolder, 'fake')
+
+# the modules the old SquareItem is built from
+legacyModules = ('graphicview.py', 'unreallibrary.py')
+
+def firstCommit():
+    """Gets the commit the repository started from"""
+    return subprocess.run(['git', 'rev-list', '--max-parents=0', 'HEAD'], cwd=repoFolder, capture_output=True,
+                          text=True, check=True).stdout.split()[0]
+
+def checkOut(revision, folder):
+    """Writes the modules of the old SquareItem at a revision into a folder
+    
+    Args:
+        revision (str): The git revision
+        folder (str): The folder to write them to
+    """
+    for name in legacyModules:
+        source = subprocess.run(['git', 'show', '{}:{}'.format(revision, name)], cwd=repoFolder, capture_output=True,
+                                check=True).stdout
+        with open(os.path.join(folder, name), 'wb') as moduleFile:
+            moduleFile.write(source)
+
+def residentBytes():
+    """Gets the resident set size of this process on Linux, or 0 where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+def measure(count):
+    """Builds count SquareItems from whichever graphicview is first on the path and measures the memory they hold
+    
+    Args:
+        count (int): The number of items to build
+    
+    Returns:
+        A tuple of (traced bytes per item, resident bytes per item)
+    """
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv)
+    
+    import unreal
+    from graphicview import SquareItem
+    from unreallibrary import UnrealLibrary
+    
+    # the asset is loaded before measuring, so only the items and what they hold are counted
+    SquareItem(0, 0, 25, 25, label="Warmup")
+    app.processEvents()
+    
+    tracemalloc.start()
+    rssBefore = residentBytes()
+    items = [SquareItem((index % 1000) * 30, (index // 1000) * 30, 25, 25, label="BlockoutActor{}".format(index))
+             for index in range(count)]
+    if hasattr(UnrealLibrary, 'flush'):
+        UnrealLibrary.shared().flush()
+    snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, unreal.__file__)])
+    rssAfter = residentBytes()
+    tracemalloc.stop()
+    traced = sum(statistic.size for statistic in snapshot.statistics('filename'))
+    del items
+    return traced / count, (rssAfter - rssBefore) / count
+
+def measureLayout(layout, count, revision):
+    """Measures one layout in its own process, so neither layout's modules or memory affect the other
+    
+    Args:
+        layout (str): 'legacy' or 'record'
+        count (int): The number of items to build
+        revision (str): The revision the legacy modules are checked out from
+    
+    Returns:
+        A tuple of (traced bytes per item, resident bytes per item)
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        # the checked out modules are found ahead of the repository's own
+        path = [repoFolder]
+        if layout == 'legacy':
+            checkOut(revision, folder)
+            path.insert(0, folder)
+        environment = dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'),
+                           PYTHONPATH=os.pathsep.join(path + [fakeFolder, os.environ.get('PYTHONPATH', '')]).rstrip(os.pathsep))
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), str(count), '--worker'], env=environment,
+                                cwd=folder, capture_output=True, text=True, check=True).stdout
+    # the result is the last line, anything above it was logged by the tool
+    return tuple(json.loads(output.strip().splitlines()[-1]))
+
+def run(count=50000, revision=None):
+    """Prints the bytes per item for the SquareItem at a revision and for the record-backed SquareItem
+    
+    Args:
+        count (int): The number of items to build for each layout
+        revision (str): The revision of the old SquareItem, the first commit if not given
+    """
+    revision = revision or firstCommit()
+    legacy = measureLayout('legacy', count, revision)
+    record = measureLayout('record', count, revision)
+    
+    print("items: {}, legacy SquareItem from {}".format(count, revision[:10]))
+    print("{:<10}{:>16}{:>16}".format("layout", "traced B/item", "rss B/item"))
+    print("{:<10}{:>16.0f}{:>16.0f}".format("legacy", *legacy))
+    print("{:<10}{:>16.0f}{:>16.0f}".format("record", *record))
+    if record[0]:
+        print("traced reduction: {:.1f}x".format(legacy[0] / record[0]))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compares the memory of the old and the record-backed SquareItem")
+    parser.add_argument('count', type=int, nargs='?', default=50000)
+    parser.add_argument('--revision', help="the revision to check the old SquareItem out of, the first commit by default")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.worker:
+        print(json.dumps(measure(args.count)))
+    else:
+        run(args.count, args.revision)
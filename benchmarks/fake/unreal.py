@@ -0,0 +1,458 @@
+"""A stand-in for the `unreal` module so that the tool can be imported and measured outside of the editor
+
+Only the parts of the API that the tool uses are emulated. Every call into a library or onto an actor
+counts as a bridge call, and can be given a fixed latency to mimic the cost of crossing into the editor,
+either with the FAKE_UNREAL_LATENCY_US environment variable or with setLatency()
+"""
+import os
+import tempfile
+import time
+
+latency = float(os.environ.get('FAKE_UNREAL_LATENCY_US', 0)) / 1e6
+callCounts = {}
+
+def setLatency(microseconds):
+    """Sets the time that every bridge call takes
+    
+    Args:
+        microseconds (float): The latency of one call in microseconds
+    """
+    global latency
+    latency = microseconds / 1e6
+    
+def resetCallCounts():
+    """Clears the per-name bridge call counts"""
+    callCounts.clear()
+    
+def totalCalls():
+    """Gets the number of bridge calls made since the counts were last reset"""
+    return sum(callCounts.values())
+
+def bridge(name):
+    """Counts a bridge call and spends the configured latency on it
+    
+    A busy wait is used rather than sleeping, as sleeps are far coarser than the latencies being modelled
+    """
+    callCounts[name] = callCounts.get(name, 0) + 1
+    if latency:
+        end = time.perf_counter() + latency
+        while time.perf_counter() < end:
+            pass
+        
+class Vector():
+    """A 3D vector"""
+    __slots__ = ('x', 'y', 'z')
+    
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+        
+    def __repr__(self):
+        return "Vector({}, {}, {})".format(self.x, self.y, self.z)
+    
+class Rotator():
+    """A rotation in degrees"""
+    __slots__ = ('roll', 'pitch', 'yaw')
+    
+    def __init__(self, roll=0.0, pitch=0.0, yaw=0.0):
+        self.roll = roll
+        self.pitch = pitch
+        self.yaw = yaw
+        
+class Transform():
+    """A location, rotation and scale"""
+    __slots__ = ('translation', 'rotation', 'scale3d')
+    
+    def __init__(self, location=None, rotation=None, scale=None):
+        self.translation = location or Vector()
+        self.rotation = rotation or Rotator()
+        self.scale3d = scale or Vector(1.0, 1.0, 1.0)
+        
+    def rotator(self):
+        return self.rotation
+        
+class Object():
+    """An asset, which only knows its path"""
+    def __init__(self, path):
+        self.path = path
+        
+    def get_path_name(self):
+        bridge('get_path_name')
+        return self.path
+    
+    def get_name(self):
+        bridge('get_name')
+        return self.path.rsplit('.', 1)[-1]
+    
+class StaticMesh(Object):
+    """A mesh asset, which every asset in the stand-in project is"""
+    
+class Actor():
+    """A level actor holding the state that the tool reads and writes"""
+    count = 0
+    
+    def __init__(self, asset=None, location=None):
+        Actor.count += 1
+        self.asset = asset
+        self.label = "{}{}".format(asset.path.rsplit('.', 1)[-1] if asset else 'Actor', Actor.count)
+        self.location = location or Vector()
+        self.rotation = Rotator()
+        self.components = []
+        self.scale = Vector(1.0, 1.0, 1.0)
+        self.hidden = False
+        self.collision = True
+        self.destroyed = False
+        
+    def get_actor_label(self):
+        bridge('get_actor_label')
+        return self.label
+    
+    def set_actor_label(self, label):
+        bridge('set_actor_label')
+        self.label = label
+        
+    def get_actor_location(self):
+        bridge('get_actor_location')
+        return self.location
+    
+    def set_actor_location(self, location, sweep, teleport):
+        bridge('set_actor_location')
+        self.location = location
+        
+    def get_actor_rotation(self):
+        bridge('get_actor_rotation')
+        return self.rotation
+    
+    def set_actor_rotation(self, rotation, teleport):
+        bridge('set_actor_rotation')
+        self.rotation = rotation
+    
+    def get_actor_scale3d(self):
+        bridge('get_actor_scale3d')
+        return self.scale
+    
+    def set_actor_scale3d(self, scale):
+        bridge('set_actor_scale3d')
+        self.scale = scale
+        
+    def set_is_temporarily_hidden_in_editor(self, hidden):
+        bridge('set_is_temporarily_hidden_in_editor')
+        self.hidden = hidden
+        
+    def set_actor_hidden_in_game(self, hidden):
+        bridge('set_actor_hidden_in_game')
+        
+    def set_actor_enable_collision(self, enabled):
+        bridge('set_actor_enable_collision')
+        self.collision = enabled
+        
+    def get_path_name(self):
+        bridge('get_path_name')
+        return "/Game/Level.Level:PersistentLevel.{}".format(self.label)
+    
+    def get_actor_bounds(self, only_colliding_components):
+        """Gets the world bounds as an (origin, extent) pair, the basic shapes being 100 units across"""
+        bridge('get_actor_bounds')
+        return (Vector(self.location.x, self.location.y, self.location.z),
+                Vector(self.scale.x * 50, self.scale.y * 50, self.scale.z * 50))
+    
+    def get_editor_property(self, name):
+        bridge('get_editor_property')
+        return getattr(self, name)
+    
+class InstancedStaticMeshComponent():
+    """A component drawing many instances of one mesh, each with its own transform"""
+    def __init__(self, owner):
+        self.owner = owner
+        self.static_mesh = None
+        self.transforms = []
+        
+    def set_static_mesh(self, mesh):
+        bridge('set_static_mesh')
+        self.static_mesh = mesh
+        return True
+    
+    def get_instance_count(self):
+        bridge('get_instance_count')
+        return len(self.transforms)
+    
+    def add_instances(self, transforms, should_return_indices, world_space=False):
+        bridge('add_instances')
+        start = len(self.transforms)
+        self.transforms.extend(transforms)
+        return list(range(start, len(self.transforms))) if should_return_indices else []
+    
+    def get_instance_transform(self, index, world_space=False):
+        bridge('get_instance_transform')
+        return self.transforms[index]
+    
+    def update_instance_transform(self, index, transform, world_space=False, mark_render_state_dirty=False, teleport=False):
+        bridge('update_instance_transform')
+        self.transforms[index] = transform
+        return True
+    
+    def batch_update_instances_transforms(self, start_instance_index, transforms, world_space=False, mark_render_state_dirty=False,
+                                          teleport=False):
+        bridge('batch_update_instances_transforms')
+        self.transforms[start_instance_index:start_instance_index + len(transforms)] = transforms
+        return True
+    
+    def remove_instances(self, indices):
+        """Removes instances, moving every later instance down to fill the gaps as the engine does"""
+        bridge('remove_instances')
+        removed = set(indices)
+        self.transforms = [transform for index, transform in enumerate(self.transforms) if index not in removed]
+        return True
+    
+    def mark_render_state_dirty(self):
+        bridge('mark_render_state_dirty')
+        
+class StaticMeshComponent():
+    """The component that holds a static mesh actor's mesh"""
+    def __init__(self, mesh):
+        self.static_mesh = mesh
+        
+    def get_editor_property(self, name):
+        bridge('get_editor_property')
+        return getattr(self, name)
+    
+class StaticMeshActor(Actor):
+    """An actor showing a static mesh, which is what spawning a mesh asset creates"""
+    def __init__(self, asset, location):
+        super().__init__(asset, location)
+        self.static_mesh_component = StaticMeshComponent(asset)
+        
+# the level's actors in spawn order, and which of them are selected
+levelActors = {}
+selectedActors = set()
+
+class EditorAssetLibrary():
+    @staticmethod
+    def load_asset(path):
+        bridge('load_asset')
+        return StaticMesh(path)
+    
+    @staticmethod
+    def does_asset_exist(path):
+        bridge('does_asset_exist')
+        return True
+    
+class EditorLevelLibrary():
+    @staticmethod
+    def spawn_actor_from_object(asset, location, rotation):
+        bridge('spawn_actor_from_object')
+        actor = StaticMeshActor(asset, location)
+        levelActors[id(actor)] = actor
+        return actor
+    
+    @staticmethod
+    def spawn_actor_from_class(actorClass, location, rotation):
+        bridge('spawn_actor_from_class')
+        actor = actorClass(None, location)
+        levelActors[id(actor)] = actor
+        return actor
+    
+    @staticmethod
+    def destroy_actor(actor):
+        bridge('destroy_actor')
+        actor.destroyed = True
+        levelActors.pop(id(actor), None)
+        selectedActors.discard(id(actor))
+        return True
+    
+    @staticmethod
+    def get_all_level_actors():
+        bridge('get_all_level_actors')
+        return list(levelActors.values())
+    
+    @staticmethod
+    def get_selected_level_actors():
+        bridge('get_selected_level_actors')
+        return [levelActors[key] for key in selectedActors if key in levelActors]
+    
+    @staticmethod
+    def set_selected_level_actors(actors):
+        bridge('set_selected_level_actors')
+        selectedActors.clear()
+        selectedActors.update(id(actor) for actor in actors if actor is not None)
+        
+    @staticmethod
+    def set_actor_selection_state(actor, selected):
+        bridge('set_actor_selection_state')
+        if selected:
+            selectedActors.add(id(actor))
+        else:
+            selectedActors.discard(id(actor))
+            
+class EditorActorSubsystem():
+    def __init__(self):
+        self.on_delete_actors_end = Delegate()
+    
+    def duplicate_actor(self, actor, world=None, offset=None):
+        bridge('duplicate_actor')
+        duplicate = StaticMeshActor(actor.asset, actor.location)
+        duplicate.scale = actor.scale
+        levelActors[id(duplicate)] = duplicate
+        return duplicate
+    
+class EditorUtilityLibrary():
+    @staticmethod
+    def get_current_content_browser_path():
+        bridge('get_current_content_browser_path')
+        return "/Game"
+    
+    @staticmethod
+    def get_selected_assets():
+        bridge('get_selected_assets')
+        return []
+    
+class SystemLibrary():
+    @staticmethod
+    def is_valid(obj):
+        bridge('is_valid')
+        return obj is not None and not getattr(obj, 'destroyed', False)
+    
+    @staticmethod
+    def begin_transaction(context, description, primary_object):
+        bridge('begin_transaction')
+        return 0
+    
+    @staticmethod
+    def end_transaction():
+        bridge('end_transaction')
+        return 0
+    
+# the project and engine content folders, which the asset registry and the asset index read from disk
+projectDir = os.environ.get('FAKE_UNREAL_PROJECT_DIR') or os.path.join(tempfile.gettempdir(), 'FakeUnrealProject')
+engineDir = os.environ.get('FAKE_UNREAL_ENGINE_DIR') or os.path.join(tempfile.gettempdir(), 'FakeUnrealEngine')
+
+class Paths():
+    @staticmethod
+    def project_content_dir():
+        return os.path.join(projectDir, 'Content') + '/'
+    
+    @staticmethod
+    def engine_content_dir():
+        return os.path.join(engineDir, 'Content') + '/'
+    
+    @staticmethod
+    def project_saved_dir():
+        return os.path.join(projectDir, 'Saved') + '/'
+    
+    @staticmethod
+    def convert_relative_path_to_full(path):
+        return os.path.abspath(path)
+    
+class TopLevelAssetPath():
+    def __init__(self, packageName, assetName):
+        self.package_name = packageName
+        self.asset_name = assetName
+        
+class AssetData():
+    def __init__(self, packagePath, assetName, assetClass):
+        self.package_path = packagePath
+        self.package_name = '{}/{}'.format(packagePath, assetName)
+        self.asset_name = assetName
+        self.asset_class_path = TopLevelAssetPath('/Script/Engine', assetClass)
+        
+class AssetRegistry():
+    def get_assets_by_path(self, package_path, recursive=False, include_only_on_disk_assets=False):
+        """Lists the assets saved under a package path, with maps as worlds and everything else as static meshes"""
+        bridge('get_assets_by_path')
+        mounts = {'/Game': Paths.project_content_dir(), '/Engine': Paths.engine_content_dir()}
+        root, _, rest = package_path.strip('/').partition('/')
+        folder = mounts.get('/' + root)
+        if folder is None:
+            return []
+        assets = []
+        for dirPath, dirNames, fileNames in os.walk(os.path.join(folder, rest)):
+            relative = os.path.relpath(dirPath, folder)
+            packagePath = '/' + root if relative == '.' else '/{}/{}'.format(root, relative.replace(os.sep, '/'))
+            for fileName in fileNames:
+                name, extension = os.path.splitext(fileName)
+                if extension in ('.uasset', '.umap'):
+                    assets.append(AssetData(packagePath, name, 'World' if extension == '.umap' else 'StaticMesh'))
+            if not recursive:
+                break
+        return assets
+    
+class AssetRegistryHelpers():
+    registry = None
+    
+    @staticmethod
+    def get_asset_registry():
+        if AssetRegistryHelpers.registry is None:
+            AssetRegistryHelpers.registry = AssetRegistry()
+        return AssetRegistryHelpers.registry
+    
+class Delegate():
+    """A multicast delegate that callables can be added to"""
+    def __init__(self):
+        self.callables = []
+        
+    def add_callable(self, function):
+        self.callables.append(function)
+        
+    def broadcast(self, *args):
+        for function in self.callables:
+            function(*args)
+            
+class ImportSubsystem():
+    def __init__(self):
+        self.on_asset_reimport = Delegate()
+        
+class SubobjectDataHandle():
+    """Points at an actor, or at one of the components added to it"""
+    def __init__(self, actor, component=None):
+        self.actor = actor
+        self.component = component
+        
+class AddNewSubobjectParams():
+    def __init__(self):
+        self.parent_handle = None
+        self.new_class = None
+        
+    def set_editor_property(self, name, value):
+        setattr(self, name, value)
+        
+class SubobjectDataSubsystem():
+    def k2_gather_subobject_data_for_instance(self, actor):
+        bridge('k2_gather_subobject_data_for_instance')
+        return [SubobjectDataHandle(actor)] + [SubobjectDataHandle(actor, component) for component in actor.components]
+    
+    def add_new_subobject(self, params):
+        bridge('add_new_subobject')
+        actor = params.parent_handle.actor
+        component = params.new_class(actor)
+        actor.components.append(component)
+        return SubobjectDataHandle(actor, component), ''
+    
+class SubobjectDataBlueprintFunctionLibrary():
+    @staticmethod
+    def get_data(handle):
+        return handle
+    
+    @staticmethod
+    def get_object(data):
+        return data.component or data.actor
+    
+subsystems = {}
+
+def get_editor_subsystem(subsystemClass):
+    bridge('get_editor_subsystem')
+    if subsystemClass not in subsystems:
+        subsystems[subsystemClass] = subsystemClass()
+    return subsystems[subsystemClass]
+
+get_engine_subsystem = get_editor_subsystem
+
+def parent_external_window_to_slate(windowId):
+    pass
+
+def resetLevel():
+    """Destroys every actor and clears the selection, without counting any bridge calls"""
+    for actor in levelActors.values():
+        actor.destroyed = True
+    levelActors.clear()
+    selectedActors.clear()
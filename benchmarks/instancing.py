@@ -0,0 +1,73 @@
+"""Compares the bridge calls and level actors of spawning and moving blocks as actors and as mesh instances
+
+Run with `python benchmarks/instancing.py [count]` against the stand-in `unreal` module from benchmarks/fake,
+optionally with FAKE_UNREAL_LATENCY_US set to give every bridge call a cost
+"""
+import os
+import sys
+import time
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+sys.path.insert(0, os.path.join(root, 'benchmarks', 'fake'))
+
+import unreal
+
+from unreallibrary import UnrealLibrary
+
+def measure(instanced, count):
+    """Spawns count blocks in a row, moves every other one and then deletes them, flushing after each step
+    
+    Args:
+        instanced (bool): Whether to draw the blocks as mesh instances rather than spawning actors
+        count (int): The number of blocks
+    
+    Returns:
+        A dict of the bridge calls and seconds of each step, and the level actors left after spawning
+    """
+    unreal.resetLevel()
+    library = UnrealLibrary()
+    library.instanced = instanced
+    results = {}
+    
+    unreal.resetCallCounts()
+    start = time.perf_counter()
+    blocks = library.spawnActors('square', [(index * 30.0, 0.0) for index in range(count)],
+                                 ["BlockoutActor{}".format(index) for index in range(count)])
+    library.flush()
+    results['spawn'] = (unreal.totalCalls(), time.perf_counter() - start)
+    results['actors'] = len(unreal.levelActors)
+    
+    unreal.resetCallCounts()
+    start = time.perf_counter()
+    for index in range(0, count, 2):
+        library.setActorLocation(blocks[index], unreal.Vector(index * 30.0, 60.0, 0.0))
+    library.flush()
+    results['move'] = (unreal.totalCalls(), time.perf_counter() - start)
+    
+    unreal.resetCallCounts()
+    start = time.perf_counter()
+    for block in blocks:
+        library.releaseActor(block, library.resolveAssetPath('square'))
+    library.drainPool()
+    library.flush()
+    results['delete'] = (unreal.totalCalls(), time.perf_counter() - start)
+    return results
+
+def run(count=10000):
+    """Prints the bridge calls and time of each step for actors and for instances
+    
+    Args:
+        count (int): The number of blocks
+    """
+    print("blocks: {}".format(count))
+    print("{:<10}{:>8}{:>14}{:>10}{:>14}{:>10}{:>14}{:>10}".format("backend", "actors", "spawn calls", "ms",
+                                                                 "move calls", "ms", "delete calls", "ms"))
+    for name, instanced in (("actors", False), ("instances", True)):
+        results = measure(instanced, count)
+        print("{:<10}{:>8}{:>14}{:>10.1f}{:>14}{:>10.1f}{:>14}{:>10.1f}".format(
+            name, results['actors'], results['spawn'][0], results['spawn'][1] * 1000, results['move'][0],
+            results['move'][1] * 1000, results['delete'][0], results['delete'][1] * 1000))
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,119 @@
+"""Benchmarks rubber-band selection over a dense grid, comparing the old immediate selection sync with the debounced diff
+
+Run it from Unreal's Python console with `import selection; selection.run()` after adding this folder to the Python path,
+or from a shell with `python benchmarks/selection.py [count]`, where the stand-in `unreal` module in benchmarks/fake is used
+
+A rubber-band drag is simulated by growing the selection area one step per event-loop tick, which is what
+QGraphicsView does on each mouse move
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# appended, so the real module still wins inside the editor
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake'))
+
+from PySide6.QtCore import QRectF
+from PySide6.QtGui import QPainterPath
+from PySide6.QtWidgets import QApplication
+
+from actorinfowidget import InfoWidget
+from graphicview import GridGraphicsView
+
+def buildView(count):
+    """Builds a view with count blocks packed into a square
+    
+    Args:
+        count (int): The number of blocks
+        
+    Returns:
+        The GridGraphicsView
+    """
+    view = GridGraphicsView()
+    columns = int(count ** 0.5) + 1
+    for index in range(count):
+        view.addItem('square', 10, 10, (index % columns) * 12, (index // columns) * 12)
+    view.UEL.flush()
+    return view
+
+def legacySync(view, infoWidget, counters):
+    """Does what the view and info panel used to do on every selectionChanged"""
+    unrealActors = [item.unrealActor for item in view.scene.selectedItems()]
+    view.UEL.ELL.set_selected_level_actors(unrealActors)
+    counters['calls'] += 1
+    if view.scene.selectedItems() and len(view.scene.selectedItems()) == 1:
+        selectedItem = view.scene.selectedItems()[0]
+        selectedItem.unrealActor.get_actor_label()
+        selectedItem.unrealActor.get_actor_scale3d()
+        counters['calls'] += 2
+
+def rubberBand(app, view, steps, extent):
+    """Grows the selection area from the top left corner over the given number of ticks
+    
+    Returns:
+        A list of per-step times in seconds
+    """
+    stepTimes = []
+    for step in range(1, steps + 1):
+        start = time.perf_counter()
+        path = QPainterPath()
+        size = extent * step / steps
+        path.addRect(QRectF(0, 0, size, size))
+        view.scene.setSelectionArea(path)
+        app.processEvents()
+        stepTimes.append(time.perf_counter() - start)
+    return stepTimes
+
+def report(name, stepTimes, calls, seconds):
+    """Prints a line of results"""
+    stepTimes = sorted(stepTimes)
+    print("{:<10}{:>10.1f}{:>10.1f}{:>10.2f}{:>10}".format(
+        name, stepTimes[len(stepTimes) // 2] * 1000, stepTimes[int(len(stepTimes) * 0.99) - 1] * 1000, seconds, calls))
+
+def run(count=10000, steps=60):
+    """Runs the legacy and debounced selection sync over the same rubber-band drag and prints the results
+    
+    Args:
+        count (int): The number of blocks in the grid
+        steps (int): The number of mouse moves in the drag
+    """
+    app = QApplication.instance() or QApplication(sys.argv)
+    view = buildView(count)
+    infoWidget = InfoWidget(view)
+    view.selectionSettled.connect(infoWidget.updateInfo)
+    extent = (int(count ** 0.5) + 1) * 12
+    
+    print("blocks: {}, drag steps: {}".format(count, steps))
+    print("{:<10}{:>10}{:>10}{:>10}{:>10}".format("sync", "p50 ms", "p99 ms", "total s", "calls"))
+    
+    # the old behaviour, with the debounced sync disconnected
+    view.scene.selectionChanged.disconnect(view.scheduleSelectionSync)
+    counters = {'calls': 0}
+    handler = lambda: legacySync(view, infoWidget, counters)
+    view.scene.selectionChanged.connect(handler)
+    start = time.perf_counter()
+    stepTimes = rubberBand(app, view, steps, extent)
+    report("legacy", stepTimes, counters['calls'], time.perf_counter() - start)
+    view.scene.selectionChanged.disconnect(handler)
+    view.scene.clearSelection()
+    
+    # the debounced, diff-based sync, waiting for the last debounce to fire
+    view.scene.selectionChanged.connect(view.scheduleSelectionSync)
+    view.changeUnrealSelection()
+    view.UEL.flush()
+    issued = view.UEL.commandStats['issued']
+    start = time.perf_counter()
+    stepTimes = rubberBand(app, view, steps, extent)
+    while view.selectionTimer.isActive():
+        app.processEvents()
+    view.UEL.flush()
+    report("debounced", stepTimes, view.UEL.commandStats['issued'] - issued, time.perf_counter() - start)
+    
+    view.deleteItems(list(view.itemsById.values()))
+    view.spawnScheduler.runAll()
+    view.UEL.drainPool()
+    view.UEL.flush()
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,375 @@
+"""Headless benchmark suite for the grid, run on plain Linux against the stand-in `unreal` module in benchmarks/fake
+
+Run with `python benchmarks/suite.py [--sizes 1000 10000 100000] [--latency-us 0] [--compare results.json]`
+
+Each size runs in its own process so that the peak RSS reported belongs to that size alone. Qt is put on the
+offscreen platform unless QT_QPA_PLATFORM is already set, and the real `unreal` module is used instead of the
+stand-in if it can be imported
+
+Results are written to benchmarks/results, named by time and commit, and compared against the latest earlier run
+with the same latency so that regressions between commits show up in the report
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+benchmarkFolder = os.path.dirname(os.path.abspath(__file__))
+repoFolder = os.path.dirname(benchmarkFolder)
+resultsFolder = os.path.join(benchmarkFolder, 'results')
+
+# the scenarios run in this order, each on the view left by the ones before it
+scenarioNames = ('addItem', 'pasteItems', 'zoom', 'pan', 'rubberBand', 'drag', 'zSlider', 'generate', 'merge')
+
+def percentile(values, fraction):
+    """Gets a percentile of a list of values, or 0 if it is empty"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+class Scenario():
+    """Times one scenario, counting its operations, bridge calls, queued writes and frames"""
+    def __init__(self, app, view, unrealModule):
+        self.app = app
+        self.view = view
+        self.unreal = unrealModule
+        self.frameTimes = []
+        self.operations = 0
+
+    def __enter__(self):
+        self.startCalls = self.bridgeCalls()
+        self.startWrites = dict(self.view.UEL.commandStats)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.start
+        self.calls = self.bridgeCalls() - self.startCalls
+        # the writes queued on the library, how many of them a later write to the same field replaced, and how many were sent
+        self.writes = {key: value - self.startWrites[key] for key, value in self.view.UEL.commandStats.items()}
+
+    def bridgeCalls(self):
+        """Gets the bridge calls made so far, which only the stand-in module can count"""
+        return self.unreal.totalCalls() if hasattr(self.unreal, 'totalCalls') else 0
+
+    def frame(self, repaint=True):
+        """Runs the event loop once and repaints the viewport, timing both as one frame
+
+        Args:
+            repaint (bool): Whether to repaint the whole viewport, rather than only what the event loop asked for
+        """
+        start = time.perf_counter()
+        self.app.processEvents()
+        if repaint:
+            self.view.viewport().repaint()
+        self.frameTimes.append(time.perf_counter() - start)
+
+    def result(self):
+        """Gets the results as a dict of plain values"""
+        return {
+            'operations': self.operations,
+            'seconds': self.seconds,
+            'opsPerSecond': self.operations / self.seconds if self.seconds else 0.0,
+            'bridgeCalls': self.calls,
+            'writesQueued': self.writes['requested'],
+            'writesCoalesced': self.writes['coalesced'],
+            'writesIssued': self.writes['issued'],
+            'frames': len(self.frameTimes),
+            'frameP50Ms': percentile(self.frameTimes, 0.5) * 1000,
+            'frameP99Ms': percentile(self.frameTimes, 0.99) * 1000,
+            'frameMaxMs': max(self.frameTimes, default=0.0) * 1000,
+        }
+
+def runSize(count, latencyUs):
+    """Runs every scenario on a grid of count blocks, in this process
+
+    Args:
+        count (int): The number of blocks
+        latencyUs (float): The latency of every bridge call in microseconds
+
+    Returns:
+        A dict of the scenario results, plus the peak RSS of the process
+    """
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    sys.path.insert(0, repoFolder)
+    sys.path.append(os.path.join(benchmarkFolder, 'fake'))
+
+    import unreal
+    if hasattr(unreal, 'setLatency'):
+        unreal.setLatency(latencyUs)
+
+    from PySide6.QtCore import QPoint, QRectF, Qt
+    from PySide6.QtGui import QPainterPath
+    from PySide6.QtTest import QTest
+    from PySide6.QtWidgets import QApplication
+
+    from actorinfowidget import InfoWidget
+    from graphicview import GridGraphicsView
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    view = GridGraphicsView()
+    view.resize(1200, 700)
+    view.show()
+    infoWidget = InfoWidget(view)
+    view.selectionSettled.connect(infoWidget.updateInfo)
+
+    # blocks are packed into a square, with the grid sized to hold them
+    # they are the size that quick spawning uses, which leaves room in the middle of each to grab it without resizing
+    columns = int(count ** 0.5) + 1
+    extent = columns * 30 + 30
+    view.createGrid(20, extent * view.zoom, extent * view.zoom)
+    app.processEvents()
+
+    def settle(scenario):
+        """Runs frames until the scheduler, the selection debounce and the z scale writes have nothing left to do"""
+        while view.spawnScheduler.isBusy() or view.selectionTimer.isActive() or infoWidget.zScaleTimer.isActive():
+            scenario.frame()
+        view.UEL.flush()
+
+    results = {}
+
+    # add every block, flushing the queued writes once at the end as the event loop would
+    with Scenario(app, view, unreal) as scenario:
+        for index in range(count):
+            view.addItem('square', 25, 25, (index % columns) * 30, (index // columns) * 30)
+        view.UEL.flush()
+        scenario.operations = count
+    results['addItem'] = scenario.result()
+
+    # paste a tenth of the blocks, up to a thousand, letting the scheduler copy their actors over as many frames as it needs
+    # the pastes all stack up on the cursor, and a larger pile only measures the cost of that many overlaps
+    items = list(view.itemsById.values())
+    pasted = items[:max(1, min(count // 10, 1000))]
+    with Scenario(app, view, unreal) as scenario:
+        view.pasteItems(pasted)
+        settle(scenario)
+        scenario.operations = len(pasted)
+    results['pasteItems'] = scenario.result()
+
+    # the pile is cleared away so that it doesn't get caught up in the later scenarios
+    original = set(items)
+    view.deleteItems([item for item in view.itemsById.values() if item not in original])
+    view.spawnScheduler.runAll()
+    view.UEL.flush()
+
+    # sweep the zoom out and back in, repainting at each level
+    zooms = [0.1 + index * 0.2 for index in range(10)]
+    with Scenario(app, view, unreal) as scenario:
+        for zoom in zooms + zooms[::-1]:
+            view.updateViewScale(zoom)
+            scenario.frame()
+            scenario.operations += 1
+    results['zoom'] = scenario.result()
+    view.updateViewScale(0.5)
+
+    # pan diagonally over the blocks and back while zoomed out to where a block is a few pixels wide
+    # only what scrolled into view is painted each frame, as it would be when panning by hand
+    view.updateViewScale(0.15)
+    app.processEvents()
+    positions = [extent * index / 59 for index in range(60)]
+    with Scenario(app, view, unreal) as scenario:
+        for position in positions + positions[::-1]:
+            view.centerOn(position, position)
+            scenario.frame(repaint=False)
+            scenario.operations += 1
+    results['pan'] = scenario.result()
+    view.updateViewScale(0.5)
+
+    # grow a rubber band from the top left corner over the whole grid, one step per frame
+    steps = 30
+    with Scenario(app, view, unreal) as scenario:
+        for step in range(1, steps + 1):
+            path = QPainterPath()
+            size = extent * step / steps
+            path.addRect(QRectF(0, 0, size, size))
+            view.scene.setSelectionArea(path)
+            scenario.frame()
+        settle(scenario)
+        scenario.operations = steps
+    results['rubberBand'] = scenario.result()
+
+    # drag a selection of up to 256 blocks across the grid with real mouse events, then release it
+    view.scene.clearSelection()
+    view.selectItemsInRect(QRectF(0, 0, min(columns, 16) * 30, min(columns, 16) * 30))
+    grabbed = items[0]
+    view.centerOn(grabbed)
+    app.processEvents()
+    viewport = view.viewport()
+    press = view.mapFromScene(grabbed.rect().center())
+    moves = 60
+    with Scenario(app, view, unreal) as scenario:
+        QTest.mousePress(viewport, Qt.LeftButton, Qt.NoModifier, press)
+        for move in range(1, moves + 1):
+            QTest.mouseMove(viewport, press + QPoint(move * 2, move))
+            scenario.frame()
+        QTest.mouseRelease(viewport, Qt.LeftButton, Qt.NoModifier, press + QPoint(moves * 2, moves))
+        settle(scenario)
+        scenario.operations = moves
+    results['drag'] = scenario.result()
+
+    # sweep the z slider over the dragged selection, one tick per frame
+    with Scenario(app, view, unreal) as scenario:
+        for value in range(0, 101, 2):
+            infoWidget.zSlider.setValue(value)
+            scenario.frame()
+            scenario.operations += 1
+        settle(scenario)
+    results['zSlider'] = scenario.result()
+
+    # fill a region below the blocks with about as many again, up to ten thousand, in one batch, timing only the Qt side
+    # the scheduler spawns their actors afterwards, outside of the scenario
+    generated = min(count, 10000)
+    region = QRectF(0, extent, 30 * columns, 30 * (generated // columns + 1))
+    with Scenario(app, view, unreal) as scenario:
+        scenario.operations = len(view.generateFill(region, 25, 25, 5))
+        scenario.frame()
+    results['generate'] = scenario.result()
+    view.spawnScheduler.runAll()
+    view.UEL.flush()
+
+    # fill a region below that with touching blocks and merge them, which includes hiding their actors and spawning the merged ones
+    region = QRectF(0, region.bottom() + 30, 25 * columns, 25 * (generated // columns + 1))
+    keys = view.generateFill(region, 25, 25, 0)
+    view.spawnScheduler.runAll()
+    view.UEL.flush()
+    with Scenario(app, view, unreal) as scenario:
+        scenario.operations, _ = view.mergeBlocks([view.recordById(key) for key in keys])
+        scenario.frame()
+    results['merge'] = scenario.result()
+
+    # ru_maxrss is in kilobytes on Linux
+    results['peakRssMb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return results
+
+def currentCommit():
+    """Gets the short hash of the checked out commit and whether the tree has changes, if this is a git checkout"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=repoFolder, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=repoFolder,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+    return commit, dirty
+
+def findBaseline(latencyUs):
+    """Finds the latest stored results that were run with the same latency
+
+    Returns:
+        The path of the results file, or None if there are none
+    """
+    for path in sorted(glob.glob(os.path.join(resultsFolder, '*.json')), reverse=True):
+        with open(path) as resultsFile:
+            if json.load(resultsFile)['latencyUs'] == latencyUs:
+                return path
+    return None
+
+def compare(results, baseline, threshold):
+    """Finds the scenarios that got slower than the baseline by more than the threshold
+
+    Throughput and p99 frame time are checked, as those are what a user notices
+
+    Returns:
+        A list of (size, scenario, metric, old, new) tuples
+    """
+    regressions = []
+    for size, scenarios in results['sizes'].items():
+        oldScenarios = baseline['sizes'].get(size)
+        if not oldScenarios:
+            continue
+        for name in scenarioNames:
+            old, new = oldScenarios.get(name), scenarios[name]
+            if not old:
+                continue
+            if old['opsPerSecond'] and new['opsPerSecond'] < old['opsPerSecond'] * (1 - threshold):
+                regressions.append((size, name, 'opsPerSecond', old['opsPerSecond'], new['opsPerSecond']))
+            # frames of a millisecond or less are mostly noise
+            if old['frameP99Ms'] > 1 and new['frameP99Ms'] > old['frameP99Ms'] * (1 + threshold):
+                regressions.append((size, name, 'frameP99Ms', old['frameP99Ms'], new['frameP99Ms']))
+    return regressions
+
+def report(results):
+    """Prints a table of the results"""
+    print("{:<8}{:<12}{:>12}{:>10}{:>12}{:>10}{:>11}{:>10}{:>10}{:>10}{:>10}".format(
+        "blocks", "scenario", "ops/s", "seconds", "calls", "queued", "coalesced", "issued", "p50 ms", "p99 ms", "max ms"))
+    for size, scenarios in results['sizes'].items():
+        for name in scenarioNames:
+            scenario = scenarios[name]
+            print("{:<8}{:<12}{:>12.1f}{:>10.2f}{:>12}{:>10}{:>11}{:>10}{:>10.2f}{:>10.2f}{:>10.2f}".format(
+                size, name, scenario['opsPerSecond'], scenario['seconds'], scenario['bridgeCalls'],
+                scenario['writesQueued'], scenario['writesCoalesced'], scenario['writesIssued'],
+                scenario['frameP50Ms'], scenario['frameP99Ms'], scenario['frameMaxMs']))
+        print("{:<8}peak RSS {:.1f} MB".format(size, scenarios['peakRssMb']))
+
+def run(sizes=(1000, 10000, 100000), latencyUs=0.0, save=True, baselinePath=None, threshold=0.15):
+    """Runs the suite for every size in its own process, then reports, stores and compares the results
+
+    Args:
+        sizes (tuple): The block counts to run at
+        latencyUs (float): The latency of every bridge call in microseconds
+        save (bool): Whether to store the results in benchmarks/results
+        baselinePath (str): The results file to compare against, the latest with the same latency if not given
+        threshold (float): The fraction that a metric may get worse by before it counts as a regression
+
+    Returns:
+        The list of regressions found
+    """
+    commit, dirty = currentCommit()
+    results = {
+        'commit': commit,
+        'dirty': dirty,
+        'time': datetime.datetime.now().isoformat(timespec='seconds'),
+        'latencyUs': latencyUs,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sizes': {},
+    }
+    for size in sizes:
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', str(size),
+                                 '--latency-us', str(latencyUs)], capture_output=True, text=True, check=True).stdout
+        # the results are the last line, anything above it was logged by the tool
+        results['sizes'][str(size)] = json.loads(output.strip().splitlines()[-1])
+    report(results)
+
+    baselinePath = baselinePath or findBaseline(latencyUs)
+    regressions = []
+    if baselinePath:
+        with open(baselinePath) as baselineFile:
+            baseline = json.load(baselineFile)
+        regressions = compare(results, baseline, threshold)
+        print("\ncompared against {} ({})".format(baseline['commit'], os.path.basename(baselinePath)))
+        for size, name, metric, old, new in regressions:
+            print("REGRESSION {:<8}{:<12}{:<14}{:>10.2f} -> {:.2f}".format(size, name, metric, old, new))
+        if not regressions:
+            print("no regressions over {:.0%}".format(threshold))
+
+    if save:
+        os.makedirs(resultsFolder, exist_ok=True)
+        name = "{}-{}{}.json".format(datetime.datetime.now().strftime('%Y%m%d-%H%M%S'), commit, '-dirty' if dirty else '')
+        with open(os.path.join(resultsFolder, name), 'w') as resultsFile:
+            json.dump(results, resultsFile, indent=2)
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Runs the headless grid benchmarks")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--latency-us', type=float, default=0.0, help="latency of every bridge call")
+    parser.add_argument('--compare', help="results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.15, help="fraction a metric may worsen by")
+    parser.add_argument('--no-save', action='store_true', help="don't store the results")
+    parser.add_argument('--strict', action='store_true', help="exit with an error if anything regressed")
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(runSize(args.worker, args.latency_us)))
+    else:
+        found = run(args.sizes, args.latency_us, not args.no_save, args.compare, args.threshold)
+        sys.exit(1 if found and args.strict else 0)
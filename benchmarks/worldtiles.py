@@ -0,0 +1,117 @@
+"""Pans the grid across a level of 100 x 100 chunks and reports how memory and resident chunks change along the way
+
+Run with `python benchmarks/worldtiles.py [chunks across] [blocks per chunk]` against the stand-in `unreal` module
+from benchmarks/fake. Each run is repeated with a resident limit large enough to hold every chunk, which is what
+holding the whole level as records would cost
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+sys.path.insert(0, os.path.join(root, 'benchmarks', 'fake'))
+
+import numpy as np
+import unreal
+
+from PySide6.QtWidgets import QApplication
+
+from graphicview import GridGraphicsView
+
+def buildLevel(chunks, perChunk, chunkSize):
+    """Spawns cubes spread evenly over a square of chunks, without counting their calls
+    
+    Args:
+        chunks (int): The number of chunks along each side
+        perChunk (int): The number of cubes in each chunk
+        chunkSize (float): The size of a chunk in grid units
+    """
+    unreal.resetLevel()
+    cube = unreal.EditorAssetLibrary.load_asset("/Engine/BasicShapes/Cube.Cube")
+    side = int(np.ceil(np.sqrt(perChunk)))
+    spacing = chunkSize / side
+    offsets = [(column * spacing + spacing / 2, row * spacing + spacing / 2)
+               for row in range(side) for column in range(side)][:perChunk]
+    for chunkY in range(chunks):
+        for chunkX in range(chunks):
+            for offsetX, offsetY in offsets:
+                actor = unreal.EditorLevelLibrary.spawn_actor_from_object(
+                    cube, unreal.Vector(chunkX * chunkSize + offsetX, chunkY * chunkSize + offsetY, 0), unreal.Rotator())
+                actor.scale = unreal.Vector(0.25, 0.25, 0.25)
+                actor.set_actor_label("Block_{}_{}_{}_{}".format(chunkX, chunkY, offsetX, offsetY))
+    unreal.resetCallCounts()
+
+def pan(app, view, chunks, chunkSize, samples=40):
+    """Pans the view diagonally across the level, letting prefetching run between steps
+    
+    Args:
+        app (QApplication): The application, for running the event loop
+        view (GridGraphicsView): The grid
+        chunks (int): The number of chunks along each side
+        chunkSize (float): The size of a chunk in grid units
+        samples (int): How many times along the way memory is sampled
+    
+    Returns:
+        A dict of the memory samples in bytes, the most chunks and items resident at once, and the worst step in seconds
+    """
+    extent = chunks * chunkSize
+    visible = view.mapToScene(view.viewport().rect()).boundingRect()
+    stepSize = visible.width() / 4
+    steps = int(extent / stepSize)
+    memory = []
+    mostChunks = mostItems = 0
+    worstStep = 0.0
+    for step in range(steps + 1):
+        position = step * stepSize
+        start = time.perf_counter()
+        view.centerOn(position, position)
+        view.updateVirtualItems()
+        app.processEvents()
+        worstStep = max(worstStep, time.perf_counter() - start)
+        mostChunks = max(mostChunks, len(view.world.resident))
+        mostItems = max(mostItems, len(view.itemsById))
+        if step % max(1, steps // samples) == 0:
+            memory.append(tracemalloc.get_traced_memory()[0])
+    return {'memory': memory, 'chunks': mostChunks, 'items': mostItems, 'worstStep': worstStep}
+
+def run(chunks=100, perChunk=4):
+    """Prints memory along a pan across the level, with chunks packed away and with every chunk kept resident
+    
+    Args:
+        chunks (int): The number of chunks along each side
+        perChunk (int): The number of blocks in each chunk
+    """
+    app = QApplication.instance() or QApplication(sys.argv)
+    print("level: {0} x {0} chunks, {1} blocks".format(chunks, chunks * chunks * perChunk))
+    print("{:<12}{:>10}{:>10}{:>14}{:>14}{:>14}{:>12}".format("resident", "chunks", "items", "imported MB", "halfway MB",
+                                                               "end MB", "worst ms"))
+    for name, residentLimit in (("limited", None), ("everything", chunks * chunks + 1)):
+        view = GridGraphicsView()
+        view.resize(1200, 700)
+        view.show()
+        if residentLimit:
+            view.world.residentLimit = residentLimit
+        chunkSize = view.world.chunkSize
+        buildLevel(chunks, perChunk, chunkSize)
+        view.createGrid(20, 1200, 700)
+        
+        # the level itself is built before tracing starts, so only what the grid holds is measured
+        tracemalloc.start()
+        view.importLevel()
+        app.processEvents()
+        imported = tracemalloc.get_traced_memory()[0]
+        results = pan(app, view, chunks, chunkSize)
+        tracemalloc.stop()
+        memory = results['memory']
+        print("{:<12}{:>10}{:>10}{:>14.1f}{:>14.1f}{:>14.1f}{:>12.1f}".format(
+            name, results['chunks'], results['items'], imported / 2 ** 20, memory[len(memory) // 2] / 2 ** 20,
+            memory[-1] / 2 ** 20, results['worstStep'] * 1000))
+        view.close()
+        view.deleteLater()
+        app.processEvents()
+
+if __name__ == '__main__':
+    run(*(int(argument) for argument in sys.argv[1:3]))
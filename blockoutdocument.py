@@ -0,0 +1,310 @@
+import numpy as np
+import unreal
+
+from blockrecord import BlockRecord
+from generators import asRects
+from layoutfile import UNITS_PER_SCALE, LayoutFile, saveLayout
+from unreallibrary import UnrealLibrary
+
+# the blocks of a blockout and the bulk changes to them live here rather than in the grid's event handlers, so that
+# pipeline scripts and editor utilities can build and change blockouts without opening the window. Every bulk
+# operation takes arrays, works out what changed in one pass, and queues its writes so they go out in one flush
+
+class RecordStore():
+    """Holds the records of a document that has no view, by record id
+    
+    A GridGraphicsView stands in for this when it is the document's store, keeping its items, spatial index and
+    chunks in step with the records as they are added, changed and removed
+    """
+    def __init__(self):
+        """Init's RecordStore"""
+        self.recordsById = {}
+    
+    def loadRecords(self, ids):
+        """Makes sure blocks are at hand before they are looked up, which they always are in a store without a view"""
+    
+    def recordById(self, key):
+        """Gets the record of a block, or None if the block isn't in the store"""
+        return self.recordsById.get(key)
+    
+    def records(self):
+        """Gets the record of every block"""
+        return list(self.recordsById.values())
+    
+    def addRecords(self, records):
+        """Adds the records of new blocks"""
+        for record in records:
+            self.recordsById[record.id] = record
+    
+    def updateRecords(self, records):
+        """Is told about blocks whose rect changed, which a store without a view has nothing to do for"""
+    
+    def removeRecords(self, records):
+        """Takes blocks out of the store"""
+        for record in records:
+            self.recordsById.pop(record.id, None)
+    
+    def boundActors(self):
+        """Gets the actors the blocks are bound to, which no other block may be bound to"""
+        return {record.actor for record in self.recordsById.values() if record.actor is not None}
+
+class BlockoutDocument():
+    """The blocks of a blockout and their actors, with bulk operations for scripts and batch jobs
+    
+    The bulk operations are addMany, moveMany, scaleMany and deleteMany, which are add_many, move_many, scale_many
+    and delete_many in the tool's camelCase, along with apply(layout). Needs no widgets, event loop or PySide6:
+    writes are flushed at the end of every operation instead of on the next Qt tick
+    """
+    def __init__(self, library=None, store=None):
+        """Init's BlockoutDocument
+        
+        Args:
+            library (UnrealLibrary): The library that calls into Unreal are made through, the shared one if not given
+            store: Where the records are held, such as a GridGraphicsView, a RecordStore if not given
+        """
+        self.UEL = library or UnrealLibrary.shared()
+        self.store = store if store is not None else RecordStore()
+        self.labelCount = 0
+    
+    def records(self):
+        """Gets the record of every block"""
+        return self.store.records()
+    
+    def recordsFor(self, ids):
+        """Gets the records of blocks by id, leaving out ids that aren't in the document
+        
+        Args:
+            ids (iterable): The record ids
+        
+        Returns:
+            A tuple of (records, the (N,) ids that were found)
+        """
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        self.store.loadRecords(ids)
+        records = []
+        found = []
+        for key in ids.tolist():
+            record = self.store.recordById(key)
+            if record is not None:
+                records.append(record)
+                found.append(key)
+        return records, np.array(found, dtype=np.int64)
+    
+    def nextLabels(self, count):
+        """Gets labels for new blocks in the same form the grid gives them"""
+        labels = ["BlockoutActor{}".format(number) if number > 0 else "BlockoutActor"
+                  for number in range(self.labelCount, self.labelCount + count)]
+        self.labelCount += count
+        return labels
+    
+    def flush(self):
+        """Sends every queued write to Unreal"""
+        self.UEL.flush()
+    
+    def addMany(self, rects, shape='square', assetPath=None, zScale=0.25, labels=None, locationZ=0.0):
+        """Adds blocks of one asset and spawns their actors, loading the asset once and reusing parked actors first
+        
+        Args:
+            rects (np.ndarray): The (N, 4) rects of the blocks
+            shape (str): The shape of the blocks, 'square' or 'circle'
+            assetPath (str): The picked asset to spawn, the shape's basic mesh if not given
+            zScale (float): The z-scale of the blocks' actors
+            labels (list): The label of each block, numbered like the grid's if not given
+            locationZ (float): The z location of the blocks' actors
+        
+        Returns:
+            The (N,) record ids of the new blocks
+        """
+        rects = asRects(rects)
+        if not len(rects):
+            return np.zeros(0, dtype=np.int64)
+        labels = self.nextLabels(len(rects)) if labels is None else list(labels)
+        objectPath = self.UEL.resolveAssetPath(shape, assetPath)
+        centers = rects[:, :2] + rects[:, 2:] / 2
+        scales = rects[:, 2:] / UNITS_PER_SCALE
+        
+        actors = self.UEL.spawnActors(shape, centers.tolist(), labels, assetPath)
+        records = []
+        for (x, y, width, height), (scaleX, scaleY), (centerX, centerY), label, unrealActor in zip(
+                rects.tolist(), scales.tolist(), centers.tolist(), labels, actors):
+            record = BlockRecord(shape, x, y, width, height, zScale, unrealActor, objectPath, assetPath, label, scaleX, scaleY)
+            record.setLocation(centerX, centerY, locationZ)
+            self.UEL.setActorScale(unrealActor, unreal.Vector(scaleX, scaleY, zScale))
+            if locationZ:
+                self.UEL.setActorLocation(unrealActor, unreal.Vector(centerX, centerY, locationZ))
+            records.append(record)
+        self.store.addRecords(records)
+        self.flush()
+        return np.array([record.id for record in records], dtype=np.int64)
+    
+    def setTransforms(self, ids, values):
+        """Sets the rect and scale of blocks, queueing location and scale writes only for actors whose mirror differs
+        
+        Args:
+            ids (np.ndarray): The record ids of the blocks
+            values (np.ndarray): One row per block of (x, y, width, height, scale x, scale y, z-scale)
+        
+        Returns:
+            The records of the blocks that were found
+        """
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        values = np.asarray(values, dtype=np.float64).reshape(-1, 7)
+        self.store.loadRecords(ids)
+        records = []
+        for key, (x, y, width, height, scaleX, scaleY, zScale) in zip(ids.tolist(), values.tolist()):
+            record = self.store.recordById(key)
+            if record is None:
+                continue
+            record.setRect(x, y, width, height)
+            centerX, centerY = record.center()
+            if (record.locationX, record.locationY) != (centerX, centerY):
+                record.setLocation(centerX, centerY, record.locationZ)
+                self.UEL.setActorLocation(record.actor, unreal.Vector(centerX, centerY, record.locationZ))
+            if record.scale() != (scaleX, scaleY, zScale):
+                record.setScale(scaleX, scaleY, zScale)
+                self.UEL.setActorScale(record.actor, unreal.Vector(scaleX, scaleY, zScale))
+            records.append(record)
+        self.store.updateRecords(records)
+        return records
+    
+    def moveMany(self, ids, locations):
+        """Moves blocks so that their centers are at new locations, keeping their size
+        
+        Args:
+            ids (np.ndarray): The record ids of the blocks
+            locations (np.ndarray): The (N, 2) new (x, y) centers, or (N, 3) with the z location as well
+        
+        Returns:
+            The number of blocks moved
+        """
+        records, found = self.recordsFor(ids)
+        if not records:
+            return 0
+        locations = np.asarray(locations, dtype=np.float64)
+        locations = locations.reshape(len(locations), -1)[np.isin(np.asarray(ids).reshape(-1), found)]
+        current = np.array([(record.width, record.height, record.scaleX, record.scaleY, record.zScale) for record in records])
+        values = np.column_stack((locations[:, :2] - current[:, :2] / 2, current))
+        if locations.shape[1] > 2:
+            for record, z in zip(records, locations[:, 2].tolist()):
+                if record.locationZ != z:
+                    # a new center written by setTransforms replaces this queued write, and carries the new z with it
+                    record.setLocation(record.locationX, record.locationY, z)
+                    self.UEL.setActorLocation(record.actor, unreal.Vector(record.locationX, record.locationY, z))
+        self.setTransforms(found, values)
+        self.flush()
+        return len(records)
+    
+    def scaleMany(self, ids, scales):
+        """Scales blocks about their centers, resizing their rects by how much their scale changes
+        
+        Args:
+            ids (np.ndarray): The record ids of the blocks
+            scales (np.ndarray): The (N, 2) new (x, y) scales, or (N, 3) with the z-scale as well
+        
+        Returns:
+            The number of blocks scaled
+        """
+        records, found = self.recordsFor(ids)
+        if not records:
+            return 0
+        scales = np.asarray(scales, dtype=np.float64)
+        scales = scales.reshape(len(scales), -1)[np.isin(np.asarray(ids).reshape(-1), found)]
+        current = np.array([(record.x, record.y, record.width, record.height, record.scaleX, record.scaleY, record.zScale)
+                            for record in records])
+        # each block keeps its own grid units per unit of scale, which is UNITS_PER_SCALE unless it was resized unevenly
+        oldScales = current[:, 4:6]
+        unitsPerScale = np.where(oldScales != 0, current[:, 2:4] / np.where(oldScales != 0, np.abs(oldScales), 1), UNITS_PER_SCALE)
+        sizes = np.abs(scales[:, :2]) * unitsPerScale
+        centers = current[:, :2] + current[:, 2:4] / 2
+        zScales = scales[:, 2] if scales.shape[1] > 2 else current[:, 6]
+        values = np.column_stack((centers - sizes / 2, sizes, scales[:, :2], zScales))
+        self.setTransforms(found, values)
+        self.flush()
+        return len(records)
+    
+    def deleteMany(self, ids):
+        """Takes blocks out of the document and gives their actors back to the pool
+        
+        Args:
+            ids (np.ndarray): The record ids of the blocks
+        
+        Returns:
+            The records of the deleted blocks
+        """
+        records, _ = self.recordsFor(ids)
+        self.store.removeRecords(records)
+        for record in records:
+            self.UEL.releaseActor(record.actor, self.UEL.resolveAssetPath(record.shape, record.unrealPath))
+            record.actor = None
+        self.flush()
+        return records
+    
+    def layoutRecords(self, layout, rows, actorsByLabel):
+        """Builds the records for rows of a layout file, binding each to the level actor with its label or spawning one
+        
+        Blocks that need an actor are spawned in one batch per asset
+        
+        Args:
+            layout (LayoutFile): The layout file
+            rows (list): The rows to read
+            actorsByLabel (dict): The level actors that haven't been bound yet, by label, which bound actors are taken out of
+        
+        Returns:
+            A list of the new BlockRecords
+        """
+        records = []
+        batches = {}
+        for row in rows:
+            record = layout.record(row)
+            record.actor = actorsByLabel.pop(record.label, None)
+            if record.actor is None:
+                batches.setdefault((record.shape, record.unrealPath), []).append(record)
+            records.append(record)
+        
+        for (shape, unrealPath), missing in batches.items():
+            actors = self.UEL.spawnActors(shape, [record.center() for record in missing], [record.label for record in missing], unrealPath)
+            for record, unrealActor in zip(missing, actors):
+                record.actor = unrealActor
+                self.UEL.setActorScale(unrealActor, unreal.Vector(*record.scale()))
+                if record.locationZ or (record.locationX, record.locationY) != record.center():
+                    self.UEL.setActorLocation(unrealActor, unreal.Vector(record.locationX, record.locationY, record.locationZ))
+        return records
+    
+    def apply(self, layout, chunkSize=1024):
+        """Adds the blocks of a layout to the document, binding them to level actors with the same label
+        
+        Only blocks missing from the level are spawned, so applying a layout to a level it was saved from again
+        spawns nothing
+        
+        Args:
+            layout: A LayoutFile, or the path of one
+            chunkSize (int): How many rows are read and spawned at a time, so writes are flushed as they go
+        
+        Returns:
+            The (N,) record ids of the blocks
+        """
+        ownsLayout = not isinstance(layout, LayoutFile)
+        if ownsLayout:
+            layout = LayoutFile(layout)
+        try:
+            # actors that blocks of the document already own are never bound again, even when a label matches
+            actorsByLabel = self.UEL.getLevelActorsByLabel(self.store.boundActors())
+            ids = []
+            for start in range(0, len(layout), chunkSize):
+                records = self.layoutRecords(layout, range(start, min(start + chunkSize, len(layout))), actorsByLabel)
+                self.store.addRecords(records)
+                self.flush()
+                ids.extend(record.id for record in records)
+            self.labelCount += len(layout)
+            return np.array(ids, dtype=np.int64)
+        finally:
+            if ownsLayout:
+                layout.close()
+    
+    def save(self, path):
+        """Saves every block to a layout file
+        
+        Args:
+            path (str): The file to write
+        """
+        saveLayout(path, self.records())
@@ -0,0 +1,104 @@
+import itertools
+
+class BlockRecord():
+    """The compact state of one block in the grid, which SquareItem and SphereItem are views over
+    
+    Records use __slots__ so that tens of thousands of blocks don't each carry a __dict__,
+    and the rect is stored as plain floats rather than a QRectF
+    
+    A record also mirrors the location, scale and label of its actor. The mirror is written through whenever
+    the tool changes the actor, so reads never need to go to Unreal, and resync() on the view refreshes it in bulk
+    while the view's LevelSync keeps it in step with changes made in the editor
+    """
+    __slots__ = ('id', 'shape', 'x', 'y', 'width', 'height', 'zScale', 'actor', 'assetPath', 'unrealPath', 'label',
+                 'locationX', 'locationY', 'locationZ', 'scaleX', 'scaleY')
+    
+    _ids = itertools.count()
+    
+    def __init__(self, shape='square', x=0, y=0, width=25, height=25, zScale=0.25, actor=None, assetPath=None, unrealPath=None, label=None,
+                 scaleX=0.25, scaleY=0.25):
+        """Init's BlockRecord with a new unique id
+        
+        Args:
+            shape (str): The shape of the block, 'square' or 'circle'
+            x (float): The left of the block's rect
+            y (float): The top of the block's rect
+            width (float): The width of the block's rect
+            height (float): The height of the block's rect
+            zScale (float): The z-scale of the block's actor in Unreal
+            actor (Actor): The Unreal actor the block is tied to
+            assetPath (str): The resolved object path of the block's asset
+            unrealPath (str): The picked asset path the block was spawned from, if any
+            label (str): The label of the block's actor in Unreal
+            scaleX (float): The x scale of the block's actor in Unreal
+            scaleY (float): The y scale of the block's actor in Unreal
+        """
+        self.id = next(self._ids)
+        self.shape = shape
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.zScale = zScale
+        self.actor = actor
+        self.assetPath = assetPath
+        self.unrealPath = unrealPath
+        self.label = label
+        self.scaleX = scaleX
+        self.scaleY = scaleY
+        self.locationX, self.locationY = self.center()
+        self.locationZ = 0.0
+        
+    def setRect(self, x, y, width, height):
+        """Sets the rect of the block
+        
+        Args:
+            x (float): The left of the rect
+            y (float): The top of the rect
+            width (float): The width of the rect
+            height (float): The height of the rect
+        """
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        
+    def center(self):
+        """Gets the center of the block's rect, which is where its actor is placed in Unreal
+        
+        Returns:
+            A tuple of (x, y)
+        """
+        return self.x + self.width / 2, self.y + self.height / 2
+    
+    def setLocation(self, x, y, z=0.0):
+        """Sets the mirrored location of the block's actor
+        
+        Args:
+            x (float): The x location
+            y (float): The y location
+            z (float): The z location
+        """
+        self.locationX = x
+        self.locationY = y
+        self.locationZ = z
+        
+    def setScale(self, x, y, z):
+        """Sets the mirrored scale of the block's actor, the z scale being the block's z-scale
+        
+        Args:
+            x (float): The x scale
+            y (float): The y scale
+            z (float): The z scale
+        """
+        self.scaleX = x
+        self.scaleY = y
+        self.zScale = z
+        
+    def scale(self):
+        """Gets the mirrored scale of the block's actor
+        
+        Returns:
+            A tuple of (x, y, z)
+        """
+        return self.scaleX, self.scaleY, self.zScale
@@ -0,0 +1,384 @@
+import hmac
+import os
+import secrets
+import select
+import socket
+import sys
+import time
+from collections import deque
+
+from instrumentation import log
+from remotebridge import (DEFAULT_HOST, DEFAULT_PORT, CALL, GET, BATCH, RELEASE, RESULT, ERROR, ACK, EVENT, AUTH,
+                          HANDLE, NAMESPACE, VECTOR, ROTATOR, CALLBACK, TRANSFORM, TRIPLE, NINE, Reader, Writer, packFrame,
+                          splitFrames, packTransform, unpackTransform, tokenPath, writeToken)
+
+# the editor's end of the remote bridge: it runs the calls sent by a standalone QuickBlock on the editor's own thread,
+# a few milliseconds per tick, and sends back results, batch acknowledgements and delegate events
+#
+# only clients that first send the server's token are served, as every call they make runs inside the editor
+#
+# in the editor, start it from the Python console with `import bridgeserver; bridgeserver.start()`
+# outside of the editor, `python bridgeserver.py` serves the stand-in `unreal` module from benchmarks/fake instead
+
+class RemoteCallback():
+    """Stands in for a function on the standalone end, such as a delegate callable, turning its calls into events"""
+    def __init__(self, connection, callbackId):
+        self.connection = connection
+        self.callbackId = callbackId
+    
+    def __call__(self, *args):
+        self.connection.queue(EVENT, 0, (self.callbackId, args))
+
+class BridgeConnection():
+    """One standalone QuickBlock connected to the server, with the handles it holds"""
+    def __init__(self, server, clientSocket):
+        """Init's BridgeConnection
+        
+        Args:
+            server (BridgeServer): The server the connection was accepted by
+            clientSocket (socket.socket): The connected socket
+        """
+        self.server = server
+        self.module = server.module
+        self.socket = clientSocket
+        self.socket.setblocking(False)
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.received = bytearray()
+        self.outgoing = bytearray()
+        self.frames = deque()
+        # nothing but the token is read until the client has sent it, and a wrong one closes the connection
+        self.authenticated = False
+        self.closing = False
+        
+        # {handle: object}, {object or its id: handle}, and how many times each handle was sent
+        self.objects = {}
+        self.handles = {}
+        self.sentCounts = {}
+        self.nextHandle = 1
+        # {class: index} of the classes described to the other end, and those to describe with the next message
+        self.classIndices = {}
+        self.newClasses = []
+        self.callbacks = {}
+        
+        # the types that are sent by value rather than as handles
+        self.arrayTypes = tuple(getattr(self.module, name) for name in ('Array', 'FixedArray', 'Set') if hasattr(self.module, name))
+        self.mapTypes = tuple(getattr(self.module, name) for name in ('Map',) if hasattr(self.module, name))
+        self.nameTypes = tuple(getattr(self.module, name) for name in ('Name', 'Text') if hasattr(self.module, name))
+        self.transformTypes = tuple(getattr(self.module, name) for name in ('Transform',) if hasattr(self.module, name))
+    
+    def fileno(self):
+        return self.socket.fileno()
+    
+    def receive(self):
+        """Reads what has arrived and queues the complete messages in it
+        
+        Returns:
+            Whether the connection is still open
+        """
+        try:
+            data = self.socket.recv(1 << 20)
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+        if not data:
+            return False
+        self.received += data
+        self.frames.extend(splitFrames(self.received))
+        return True
+    
+    def send(self):
+        """Sends as much of the outgoing messages as the socket takes without waiting
+        
+        Returns:
+            Whether the connection is still open, which it isn't once the client has gone or failed to authenticate
+        """
+        if self.outgoing:
+            try:
+                sent = self.socket.send(self.outgoing)
+            except BlockingIOError:
+                return True
+            except OSError:
+                return False
+            del self.outgoing[:sent]
+        return not (self.closing and not self.outgoing)
+    
+    def queue(self, kind, sequence, value):
+        """Packs a message to send, starting with the classes it mentions for the first time"""
+        writer = Writer(self.packObject)
+        writer.value(value)
+        classes = Writer(self.packObject)
+        classes.value(self.newClasses)
+        self.newClasses = []
+        self.outgoing += packFrame(kind, sequence, classes.buffer + writer.buffer)
+    
+    def packObject(self, writer, value):
+        """Packs vectors, rotators and transforms by value, names as strings, arrays as lists and everything else as a handle"""
+        module = self.module
+        if isinstance(value, module.Vector):
+            writer.buffer.append(VECTOR)
+            writer.buffer += TRIPLE.pack(value.x, value.y, value.z)
+        elif isinstance(value, module.Rotator):
+            writer.buffer.append(ROTATOR)
+            writer.buffer += TRIPLE.pack(value.roll, value.pitch, value.yaw)
+        elif isinstance(value, self.transformTypes):
+            writer.buffer.append(TRANSFORM)
+            writer.buffer += packTransform(value.translation, value.rotator(), value.scale3d)
+        elif isinstance(value, self.nameTypes):
+            writer.string(str(value))
+        elif isinstance(value, self.arrayTypes) or isinstance(value, (set, frozenset)):
+            writer.value(list(value))
+        elif isinstance(value, self.mapTypes):
+            writer.value(dict(value.items()))
+        else:
+            try:
+                key = value
+                handle = self.handles.get(key)
+            except TypeError:
+                # unhashable objects, such as some structs, are told apart by identity
+                key = ('id', id(value))
+                handle = self.handles.get(key)
+            if handle is None:
+                handle = self.handles[key] = self.nextHandle
+                self.objects[handle] = (value, key)
+                self.nextHandle += 1
+            self.sentCounts[handle] = self.sentCounts.get(handle, 0) + 1
+            writer.buffer.append(HANDLE)
+            writer.varint(handle)
+            writer.varint(self.classIndex(type(value)))
+    
+    def classIndex(self, valueClass):
+        """Gets the index of a class, describing it to the other end with the next message if it is new"""
+        index = self.classIndices.get(valueClass)
+        if index is None:
+            index = self.classIndices[valueClass] = len(self.classIndices)
+            methods = [name for name in dir(valueClass) if not name.startswith('_') and callable(getattr(valueClass, name, None))]
+            self.newClasses.append((valueClass.__name__, [base.__name__ for base in valueClass.__mro__], methods))
+        return index
+    
+    def unpackObject(self, reader, tag):
+        """Unpacks handles as the objects they stand for, namespaces from the `unreal` module, and vectors, rotators and transforms"""
+        if tag == HANDLE:
+            return self.objects[reader.varint()][0]
+        if tag == NAMESPACE:
+            return getattr(self.module, reader.value())
+        if tag == VECTOR:
+            return self.module.Vector(*reader.unpack(TRIPLE))
+        if tag == ROTATOR:
+            return self.module.Rotator(*reader.unpack(TRIPLE))
+        if tag == TRANSFORM:
+            return self.module.Transform(*unpackTransform(reader.unpack(NINE), self.module.Vector, self.module.Rotator))
+        if tag == CALLBACK:
+            callbackId = reader.varint()
+            callback = self.callbacks.get(callbackId)
+            if callback is None:
+                callback = self.callbacks[callbackId] = RemoteCallback(self, callbackId)
+            return callback
+        raise ValueError("Unknown tag {} from QuickBlock".format(tag))
+    
+    def run(self, deadline):
+        """Runs queued messages until they run out or the deadline passes
+        
+        Args:
+            deadline (float): The perf_counter time to stop by
+        """
+        while self.frames and time.perf_counter() < deadline and not self.closing:
+            kind, sequence, body = self.frames.popleft()
+            if not self.authenticated:
+                self.authenticate(kind, sequence, body)
+                continue
+            reader = Reader(body, self.unpackObject)
+            try:
+                value = reader.value()
+            except Exception as error:
+                self.queue(ERROR, sequence, (type(error).__name__, str(error)))
+                continue
+            
+            if kind == BATCH:
+                failures = 0
+                firstError = None
+                for target, name, args in value:
+                    try:
+                        (target if name is None else getattr(target, name))(*args)
+                    except Exception as error:
+                        failures += 1
+                        if firstError is None:
+                            firstError = "{}: {}".format(type(error).__name__, error)
+                self.queue(ACK, sequence, (len(value), failures, firstError))
+            elif kind == CALL or kind == GET:
+                try:
+                    if kind == CALL:
+                        target, name, args = value
+                        result = (target if name is None else getattr(target, name))(*args)
+                    else:
+                        target, name = value
+                        result = getattr(target, name)
+                except Exception as error:
+                    self.queue(ERROR, sequence, (type(error).__name__, str(error)))
+                else:
+                    self.queue(RESULT, sequence, result)
+            elif kind == RELEASE:
+                for handle, count in value:
+                    remaining = self.sentCounts.get(handle, 0) - count
+                    if remaining > 0:
+                        self.sentCounts[handle] = remaining
+                        continue
+                    self.sentCounts.pop(handle, None)
+                    held = self.objects.pop(handle, None)
+                    if held is not None:
+                        self.handles.pop(held[1], None)
+    
+    def authenticate(self, kind, sequence, body):
+        """Checks the first message of a connection for the server's token, closing the connection if it isn't there"""
+        token = None
+        if kind == AUTH:
+            try:
+                token = Reader(body, None).value()
+            except Exception:
+                pass
+        if isinstance(token, str) and hmac.compare_digest(token.encode('utf-8'), self.server.token.encode('utf-8')):
+            self.authenticated = True
+            self.queue(RESULT, sequence, True)
+            return
+        log.warning("QuickBlock bridge refused a connection without the right token")
+        self.queue(ERROR, sequence, ('PermissionError', "the bridge token is missing or wrong"))
+        self.frames.clear()
+        self.closing = True
+    
+    def close(self):
+        self.socket.close()
+
+class BridgeServer():
+    """Accepts standalone QuickBlocks on a socket and runs their calls against the `unreal` module
+    
+    Calls are only ever run from poll(), so in the editor they run on the editor's own thread from a Slate tick,
+    given at most budget seconds a tick so that a large batch is spread over a few frames instead of stalling one
+    """
+    def __init__(self, module=None, host=DEFAULT_HOST, port=DEFAULT_PORT, budget=0.008, token=None):
+        """Init's BridgeServer, starts listening and writes its token where clients on this machine find it
+        
+        Args:
+            module: The module to run calls against, `unreal` if not given
+            host (str): The host to listen on, only the local machine by default
+            port (int): The port to listen on
+            budget (float): The time in seconds that calls can take per poll
+            token (str): The token clients have to send before they are served, a new random one if not given
+        """
+        if module is None:
+            import unreal as module
+        self.module = module
+        self.budget = budget
+        self.token = token or secrets.token_hex(16)
+        self.listener = socket.create_server((host, port))
+        self.listener.setblocking(False)
+        self.connections = []
+        self.tickHandle = None
+        writeToken(self.port, self.token)
+    
+    @property
+    def port(self):
+        return self.listener.getsockname()[1]
+    
+    def poll(self, timeout=0.0):
+        """Accepts new connections, reads what has arrived, runs calls within the budget and sends the replies
+        
+        Args:
+            timeout (float): How long to wait for something to arrive if nothing is waiting to run
+        """
+        if any(connection.frames for connection in self.connections):
+            timeout = 0.0
+        readable, _, _ = select.select([self.listener] + self.connections, [], [], timeout)
+        for ready in readable:
+            if ready is self.listener:
+                try:
+                    clientSocket, address = self.listener.accept()
+                except BlockingIOError:
+                    continue
+                self.connections.append(BridgeConnection(self, clientSocket))
+                log.info("QuickBlock connected from %s:%s", *address[:2])
+            elif not ready.receive():
+                ready.close()
+                self.connections.remove(ready)
+                log.info("QuickBlock disconnected")
+        
+        deadline = time.perf_counter() + self.budget
+        for connection in list(self.connections):
+            connection.run(deadline)
+            if not connection.send():
+                # the client went away, or was refused, so drop it rather than fail on it every tick
+                connection.close()
+                self.connections.remove(connection)
+                log.info("QuickBlock disconnected")
+    
+    def start(self):
+        """Polls the server from the editor's Slate tick"""
+        self.tickHandle = self.module.register_slate_post_tick_callback(lambda deltaTime: self.poll())
+    
+    def stop(self):
+        """Stops polling and closes every connection and the listener"""
+        if self.tickHandle is not None:
+            self.module.unregister_slate_post_tick_callback(self.tickHandle)
+            self.tickHandle = None
+        for connection in self.connections:
+            connection.close()
+        self.connections = []
+        try:
+            os.unlink(tokenPath(self.port))
+        except OSError:
+            pass
+        self.listener.close()
+    
+    def serveForever(self):
+        """Polls the server until interrupted, for running it outside of the editor"""
+        try:
+            while True:
+                self.poll(0.05)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+_server = None
+
+def start(port=DEFAULT_PORT):
+    """Starts the bridge server in the editor, for a standalone QuickBlock to connect to
+    
+    Args:
+        port (int): The port to listen on
+    
+    Returns:
+        The BridgeServer
+    """
+    global _server
+    if _server is None:
+        _server = BridgeServer(port=port)
+        _server.start()
+        log.info("QuickBlock bridge listening on port %s, with its token in %s", _server.port, tokenPath(_server.port))
+    return _server
+
+def stop():
+    """Stops the bridge server started by start()"""
+    global _server
+    if _server is not None:
+        _server.stop()
+        _server = None
+
+if __name__ == '__main__':
+    import argparse
+    import logging
+    
+    parser = argparse.ArgumentParser(description="Serves the stand-in unreal module over the QuickBlock bridge, for testing standalone mode without the editor")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency-us', type=float, default=0.0, help="the latency of every call into the stand-in module")
+    arguments = parser.parse_args()
+    
+    logging.basicConfig()
+    log.setLevel(logging.INFO)
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'fake'))
+    import unreal
+    if hasattr(unreal, 'setLatency'):
+        unreal.setLatency(arguments.latency_us)
+    server = BridgeServer(unreal, arguments.host, arguments.port)
+    log.info("serving %s on %s:%s, with the token in %s", unreal.__file__, arguments.host, server.port, tokenPath(server.port))
+    server.serveForever()
@@ -0,0 +1,165 @@
+import math
+
+import numpy as np
+
+# the generators work on rects as an (N, 4) float array of x, y, width and height, and compute every placement in one pass
+
+def asRects(rects):
+    """Gets rects as an (N, 4) float64 array"""
+    return np.asarray(rects, dtype=np.float64).reshape(-1, 4)
+
+def linearArray(rects, count, offsetX, offsetY):
+    """Repeats rects along a fixed offset
+    
+    Args:
+        rects (np.ndarray): The (N, 4) rects to repeat
+        count (int): How many copies of each rect to make, not counting the rect itself
+        offsetX (float): The x offset from one copy to the next
+        offsetY (float): The y offset from one copy to the next
+    
+    Returns:
+        A tuple of ((N * count, 4) rects, (N * count,) index of the rect each one is a copy of)
+    """
+    rects = asRects(rects)
+    steps = np.arange(1, count + 1, dtype=np.float64)[:, None]
+    copies = np.repeat(rects[None], count, axis=0)
+    copies[:, :, 0] += steps * offsetX
+    copies[:, :, 1] += steps * offsetY
+    return copies.reshape(-1, 4), np.tile(np.arange(len(rects)), count)
+
+def radialArray(rects, count, centerX, centerY, angle=360.0):
+    """Repeats rects around a center, spread evenly over an angle
+    
+    Blocks are always axis-aligned, so only their centers are rotated. Over a full circle the copies and the
+    original are spread evenly, otherwise the last copy lands on the angle
+    
+    Args:
+        rects (np.ndarray): The (N, 4) rects to repeat
+        count (int): How many copies of each rect to make, not counting the rect itself
+        centerX (float): The x of the center to rotate around
+        centerY (float): The y of the center to rotate around
+        angle (float): The angle in degrees to spread the copies over, clockwise on screen
+    
+    Returns:
+        A tuple of ((N * count, 4) rects, (N * count,) index of the rect each one is a copy of)
+    """
+    rects = asRects(rects)
+    step = math.radians(angle) / (count + 1 if abs(angle) >= 360 else max(count, 1))
+    angles = step * np.arange(1, count + 1, dtype=np.float64)[:, None]
+    cos = np.cos(angles)
+    sin = np.sin(angles)
+    halfSizes = rects[:, 2:] / 2
+    offsetX = rects[:, 0] + halfSizes[:, 0] - centerX
+    offsetY = rects[:, 1] + halfSizes[:, 1] - centerY
+    copies = np.repeat(rects[None], count, axis=0)
+    copies[:, :, 0] = centerX + offsetX * cos - offsetY * sin - halfSizes[:, 0]
+    copies[:, :, 1] = centerY + offsetX * sin + offsetY * cos - halfSizes[:, 1]
+    return copies.reshape(-1, 4), np.tile(np.arange(len(rects)), count)
+
+def fillGrid(left, top, width, height, cellWidth, cellHeight, gap=0.0):
+    """Fills a region with a grid of blocks, as many as fit whole
+    
+    Args:
+        left (float): The left of the region
+        top (float): The top of the region
+        width (float): The width of the region
+        height (float): The height of the region
+        cellWidth (float): The width of each block
+        cellHeight (float): The height of each block
+        gap (float): The space between neighbouring blocks
+    
+    Returns:
+        The (N, 4) rects, row by row
+    """
+    columns = max(0, int((width + gap) // (cellWidth + gap)))
+    rows = max(0, int((height + gap) // (cellHeight + gap)))
+    xs, ys = np.meshgrid(left + np.arange(columns) * (cellWidth + gap), top + np.arange(rows) * (cellHeight + gap))
+    rects = np.empty((rows * columns, 4), dtype=np.float64)
+    rects[:, 0] = xs.ravel()
+    rects[:, 1] = ys.ravel()
+    rects[:, 2] = cellWidth
+    rects[:, 3] = cellHeight
+    return rects
+
+def poissonDisk(left, top, width, height, radius, rounds=12, seed=None):
+    """Scatters points in a region so that no two are closer than a radius
+    
+    Rather than growing the points one at a time, the region is split into cells small enough to hold at most one
+    point, and a candidate is thrown into every empty cell at once. Cells are taken in nine interleaved phases,
+    three cells apart, so candidates thrown in the same phase can never be too close to each other and only need
+    checking against the points already in the 5 x 5 cells around them
+    
+    Args:
+        left (float): The left of the region
+        top (float): The top of the region
+        width (float): The width of the region
+        height (float): The height of the region
+        radius (float): The smallest distance between two points
+        rounds (int): How many candidates each cell gets, more fill the region more densely
+        seed (int): Seeds the random numbers, so that the same scatter can be made again
+    
+    Returns:
+        The (N, 2) points
+    """
+    if width <= 0 or height <= 0 or radius <= 0:
+        return np.zeros((0, 2), dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    cellSize = radius / math.sqrt(2)
+    columns = int(math.ceil(width / cellSize))
+    rows = int(math.ceil(height / cellSize))
+    
+    # the cells are padded by two on every side so that neighbour lookups never go out of bounds
+    points = np.full((rows + 4, columns + 4, 2), np.nan)
+    cellRows, cellColumns = np.mgrid[0:rows, 0:columns]
+    phases = [(cellRows[row::3, column::3].ravel(), cellColumns[row::3, column::3].ravel()) for row in range(3) for column in range(3)]
+    neighbours = [(row, column) for row in range(-2, 3) for column in range(-2, 3) if (row, column) != (0, 0)]
+    limit = radius * radius
+    
+    for _ in range(rounds):
+        for phaseRows, phaseColumns in phases:
+            empty = np.isnan(points[phaseRows + 2, phaseColumns + 2, 0])
+            phaseRows = phaseRows[empty]
+            phaseColumns = phaseColumns[empty]
+            if not len(phaseRows):
+                continue
+            candidates = np.empty((len(phaseRows), 2), dtype=np.float64)
+            candidates[:, 0] = (phaseColumns + rng.random(len(phaseRows))) * cellSize
+            candidates[:, 1] = (phaseRows + rng.random(len(phaseRows))) * cellSize
+            accepted = (candidates[:, 0] < width) & (candidates[:, 1] < height)
+            for row, column in neighbours:
+                distances = ((points[phaseRows + 2 + row, phaseColumns + 2 + column] - candidates) ** 2).sum(axis=1)
+                # empty cells are nan, which never compares as too close
+                accepted &= ~(distances < limit)
+            points[phaseRows[accepted] + 2, phaseColumns[accepted] + 2] = candidates[accepted]
+    
+    points = points[2:-2, 2:-2].reshape(-1, 2)
+    points = points[~np.isnan(points[:, 0])]
+    points[:, 0] += left
+    points[:, 1] += top
+    return points
+
+def scatter(left, top, width, height, blockWidth, blockHeight, spacing, rounds=12, seed=None):
+    """Scatters blocks in a region with a Poisson-disk distribution, keeping every block inside it
+    
+    Args:
+        left (float): The left of the region
+        top (float): The top of the region
+        width (float): The width of the region
+        height (float): The height of the region
+        blockWidth (float): The width of each block
+        blockHeight (float): The height of each block
+        spacing (float): The smallest distance between the centers of two blocks
+        rounds (int): How many candidates each cell gets, more fill the region more densely
+        seed (int): Seeds the random numbers, so that the same scatter can be made again
+    
+    Returns:
+        The (N, 4) rects
+    """
+    centers = poissonDisk(left + blockWidth / 2, top + blockHeight / 2, width - blockWidth, height - blockHeight,
+                          spacing, rounds, seed)
+    rects = np.empty((len(centers), 4), dtype=np.float64)
+    rects[:, 0] = centers[:, 0] - blockWidth / 2
+    rects[:, 1] = centers[:, 1] - blockHeight / 2
+    rects[:, 2] = blockWidth
+    rects[:, 3] = blockHeight
+    return rects
@@ -0,0 +1,49 @@
+from PySide6.QtWidgets import QDialog, QFormLayout, QDialogButtonBox, QSpinBox, QDoubleSpinBox
+
+class GeneratorDialog(QDialog):
+    """A small form asking for the parameters of one of the view's generators"""
+    def __init__(self, title, fields, parent=None):
+        """Init's GeneratorDialog with a spin box per field
+        
+        Args:
+            title (str): The window title
+            fields (list): (label, default, minimum, maximum) tuples, where an int default gives a QSpinBox and a float one a QDoubleSpinBox
+            parent (QWidget): The Qt parent
+        """
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.spinBoxes = []
+        
+        self.formLayout = QFormLayout(self)
+        for label, default, minimum, maximum in fields:
+            spinBox = QSpinBox() if isinstance(default, int) else QDoubleSpinBox()
+            spinBox.setRange(minimum, maximum)
+            spinBox.setValue(default)
+            self.formLayout.addRow(label, spinBox)
+            self.spinBoxes.append(spinBox)
+        
+        self.buttonBox = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        self.buttonBox.accepted.connect(self.accept)
+        self.buttonBox.rejected.connect(self.reject)
+        self.formLayout.addRow(self.buttonBox)
+    
+    def values(self):
+        """Gets the value of every field, in the order they were given"""
+        return [spinBox.value() for spinBox in self.spinBoxes]
+    
+    @classmethod
+    def ask(cls, title, fields, parent=None):
+        """Shows the dialog and waits for it to be closed
+        
+        Args:
+            title (str): The window title
+            fields (list): (label, default, minimum, maximum) tuples
+            parent (QWidget): The Qt parent
+        
+        Returns:
+            The values of the fields, or None if the dialog was cancelled
+        """
+        dialog = cls(title, fields, parent)
+        if dialog.exec() == QDialog.Accepted:
+            return dialog.values()
+        return None
@@ -1,10 +1,32 @@
 import unreal
 
-from PySide6.QtCore import Qt, QPointF, QRectF, QPoint
-from PySide6.QtGui import QPen, QBrush, QColor, QPainter, QPolygonF, QCursor, QAction
-from PySide6.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsItem, QGraphicsRectItem, QMenu, QGraphicsLineItem
+import itertools
+import math
+import os
+import tempfile
+import time
+from collections import deque
 
+import numpy as np
+
+from PySide6.QtCore import Qt, QPointF, QRectF, QPoint, QLineF, QTimer, Signal
+from PySide6.QtGui import QPen, QBrush, QColor, QPainter, QPolygonF, QCursor, QAction, QTransform
+from PySide6.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsItem, QGraphicsRectItem, QMenu
+
+import generators
+import rectmerge
+from blockoutdocument import BlockoutDocument
+from blockrecord import BlockRecord
+from generatorwidget import GeneratorDialog
+from instancedmeshes import BlockInstance
+from instrumentation import BridgeProfiler, log, timed
+from layoutfile import LayoutFile
+from levelsync import LevelSync
+from spatialhash import SpatialHash
+from spawnscheduler import SpawnScheduler
+from undojournal import BlocksEntry, CompoundEntry, TransformEntry, UndoJournal, snapshotTransforms
 from unreallibrary import UnrealLibrary
+from worldchunks import WorldChunks
 
 class SquareItem(QGraphicsRectItem):
     """The parent class for draggable items and also the base class for squares/cubes, which handles mouse events and updating the Unreal assets"""
@@ -33,44 +55,118 @@ class SquareItem(QGraphicsRectItem):
         bottomRight: Qt.SizeFDiagCursor,
     }
     
-    def __init__(self, x, y, width, height, unrealActor=None, label=None, unrealPath=None):
-        """Init's the SquareItem, sets necessary flags and properties"""
-        QGraphicsRectItem.__init__(self, QRectF(0, 0, width, height))
+    # the (row, column) of a point within the rect and the resize handle it lands on, in the order handles are checked
+    handleGrid = (
+        (('top', 'left'), topLeft),
+        (('top', 'middle'), topMiddle),
+        (('top', 'right'), topRight),
+        (('middle', 'left'), middleLeft),
+        (('middle', 'right'), middleRight),
+        (('bottom', 'left'), bottomLeft),
+        (('bottom', 'middle'), bottomMiddle),
+        (('bottom', 'right'), bottomRight),
+    )
+    
+    # the shape of the Unreal actor that this item represents
+    shape = 'square'
+    
+    # drag state only exists on the one item being dragged, so the rest of the items share these defaults
+    selectedEdge = None
+    clickPos = None
+    clickRect = None
+    clickScale = None
+    dragPeers = ()
+    overlapping = False
+    
+    # pens and brushes are shared by every item rather than built per item or per paint
+    normalBrush = QBrush(Qt.GlobalColor.blue)
+    overlapBrush = QBrush(QColor(200, 60, 60))
+    outlinePen = QPen(Qt.GlobalColor.black)
+    
+    # items whose paint() is written in Python keep a pixmap of it, so they are only painted again when they change
+    cachePaint = False
+    
+    # the rect and scale of the dragged items when the drag started, taken for the undo journal
+    dragBefore = None
+    
+    def __init__(self, x, y, width, height, unrealActor=None, label=None, unrealPath=None, unrealLibrary=None, record=None):
+        """Init's the SquareItem, sets necessary flags and properties
+        
+        Args:
+            x (float): The left of the item's rect
+            y (float): The top of the item's rect
+            width (float): The width of the item's rect
+            height (float): The height of the item's rect
+            unrealActor (Actor): An actor to copy for this item, if pasting
+            label (str): The label to set for the actor in Unreal
+            unrealPath (str): The path of the picked asset, if not spawning a basic shape
+            unrealLibrary (UnrealLibrary): The library used to reflect changes into Unreal, the shared one if not given
+            record (BlockRecord): An existing record to view, whose actor is bound to rather than spawned
+        """
+        QGraphicsRectItem.__init__(self, QRectF(x, y, width, height))
         self.setFlag(QGraphicsItem.ItemIsMovable, True)
         self.setFlag(QGraphicsItem.ItemSendsGeometryChanges, True)
         self.setFlag(QGraphicsItem.ItemIsSelectable, True)
         self.setFlag(QGraphicsItem.ItemIsFocusable, True)
         self.setAcceptHoverEvents(True)
-        self.setBrush(QBrush(Qt.GlobalColor.blue))
-        self.setPen(QPen(Qt.GlobalColor.black))
-        self.setZValue(1) # so that the item is always layered ahead of grid lines
-        
-        self.offset = QPointF(0, 0)
-        self.UEL = UnrealLibrary()
+        self.setBrush(self.normalBrush)
+        self.setPen(self.outlinePen)
+        self.setZValue(1) # so that the item is always layered ahead of anything else in the scene
+        if self.cachePaint:
+            self.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
         
-        self.handles = {}
+        self.UEL = unrealLibrary or UnrealLibrary.shared()
         
-        self.width = width
-        self.height = height
+        if record:
+            # the record already has its actor (or is waiting for one), so we are only a view over it
+            self.record = record
+            return
         
-        self.selectedEdge = None
-        self.clickPos = self.clickRect = None
-        self.setRectPos(x, y)
-        self.handlePositioning()
+        # the resolved asset path is what the actor is parked under in the pool when this item is deleted
+        self.record = BlockRecord(self.shape, x, y, width, height, label=label, unrealPath=unrealPath,
+                                  assetPath=self.UEL.resolveAssetPath(self.shape, unrealPath))
         
-        self.actorLabel = label
+        if unrealActor:
+            # if an asset is passed in, that means we are copying
+            self.record.actor = self.UEL.copyActor(unrealActor, label)
+            self.setActorLocation(x+(width/2), y+(height/2))
+        else:
+            # the actor is placed at the center of the QRectF, since our grid starts at (0,0) in the top left
+            self.record.actor = self.UEL.spawnActor(self.shape, x+(width/2), y+(height/2), label, unrealPath)
+            
+    @property
+    def unrealActor(self):
+        """The Unreal actor this item is tied to"""
+        return self.record.actor
+    
+    @unrealActor.setter
+    def unrealActor(self, unrealActor):
+        self.record.actor = unrealActor
         
-        # sphere item 
-        if not isinstance(self, SphereItem):
-            if unrealActor:
-                # if an asset is passed in, that means we are copying
-                self.unrealActor = self.UEL.copyActor(unrealActor, self.actorLabel)
-                self.unrealActor.set_actor_location(unreal.Vector(x+(width/2), y+(height/2), 0), False, False)
-            else:
-                # set x and y to 12.5 since we are now using the center of the QRectF
-                # and our grid starts at (0,0) in the top left
-                # TODO: should just be the center of the rect not +12.5
-                self.unrealActor = self.UEL.spawnActor('square', x+(width/2), y+(height/2), self.actorLabel, unrealPath)
+    @property
+    def actorLabel(self):
+        """The label of the Unreal actor"""
+        return self.record.label
+    
+    @property
+    def width(self):
+        """The width of the item as of the last committed move or resize"""
+        return self.record.width
+    
+    @property
+    def height(self):
+        """The height of the item as of the last committed move or resize"""
+        return self.record.height
+    
+    @property
+    def assetPath(self):
+        """The resolved object path of the item's asset"""
+        return self.record.assetPath
+    
+    @property
+    def unrealPath(self):
+        """The picked asset path the item was spawned from, if any"""
+        return self.record.unrealPath
         
     def setRectPos(self, x, y):
         rect = QRectF(self.rect())
@@ -78,7 +174,10 @@ class SquareItem(QGraphicsRectItem):
         self.setRect(rect)
         
     def handleAt(self, point):
-        """Checks the given point to see whether it lands in any of the QRectFs for resizing, returns none if not
+        """Checks the given point to see whether it lands in any of the resize handles, returns none if not
+        
+        The handles are squares of resizeMargin at the corners and edge centers of the bounding rect,
+        which are worked out from the rect here rather than stored per item
         
         Args:
             point (QPoint): The point that the mouse is at when the event is triggered
@@ -86,26 +185,29 @@ class SquareItem(QGraphicsRectItem):
         Returns:
             The number related to the resizing direction, or None if not a resize
         """
-        for k, v, in self.handles.items():
-            if v.contains(point):
-                return k
-        return None    
-    
-    def handlePositioning(self):
-        """Sets the QRectFs that are needed to provide the proper cursor and set up resizing"""
         size = self.resizeMargin
         bound = self.boundingRect()
+        x = point.x()
+        y = point.y()
+        if not bound.contains(point):
+            return None
         
-        # apply the sections that a mouse point would qualify for resizing
-        self.handles[self.topLeft]      = QRectF(bound.left(), bound.top(), size, size)
-        self.handles[self.topMiddle]    = QRectF(bound.center().x() - size / 2, bound.top(), size, size)
-        self.handles[self.topRight]     = QRectF(bound.right() - size, bound.top(), size, size)
-        self.handles[self.middleLeft]   = QRectF(bound.left(), bound.center().y() - size / 2, size, size)
-        self.handles[self.middleRight]  = QRectF(bound.right() - size, bound.center().y() - size / 2, size, size)
-        self.handles[self.bottomLeft]   = QRectF(bound.left(), bound.bottom() - size, size, size)
-        self.handles[self.bottomMiddle] = QRectF(bound.center().x() - size / 2, bound.bottom() - size, size, size)
-        self.handles[self.bottomRight]  = QRectF(bound.right() - size, bound.bottom() - size, size, size)
-
+        center = bound.center()
+        rows = {
+            'top': y <= bound.top() + size,
+            'middle': center.y() - size / 2 <= y <= center.y() + size / 2,
+            'bottom': bound.bottom() - size <= y,
+        }
+        columns = {
+            'left': x <= bound.left() + size,
+            'middle': center.x() - size / 2 <= x <= center.x() + size / 2,
+            'right': bound.right() - size <= x,
+        }
+        for (row, column), handle in self.handleGrid:
+            if rows[row] and columns[column]:
+                return handle
+        return None
+    
     def mousePressEvent(self, event):
         """Checks if the click qualifies for resizing or moving, then stores the rect and positions + calls the mousePressEvent
         
@@ -118,8 +220,25 @@ class SquareItem(QGraphicsRectItem):
             self.selectedEdge = self.handleAt(event.pos())
             self.clickPos = event.pos()
             self.clickRect = self.rect()
+            # the scale is taken at the click so that live updates while resizing don't compound
+            self.clickScale = self.record.scale()
         super().mousePressEvent(event)
         
+        # pressing on an item that is part of a multi-selection drags the whole selection
+        self.dragPeers = []
+        if event.button() != Qt.MouseButton.RightButton and self.selectedEdge is None and self.isSelected():
+            self.dragPeers = [item for item in self.scene().selectedItems() if item is not self]
+            self.dragKeys = {self.record.id}
+            self.dragGroupRect = QRectF(self.clickRect)
+            for item in self.dragPeers:
+                item.selectedEdge = None
+                item.clickRect = item.rect()
+                self.dragKeys.add(item.record.id)
+                self.dragGroupRect = self.dragGroupRect.united(item.clickRect)
+        if event.button() != Qt.MouseButton.RightButton:
+            self.dragBefore = snapshotTransforms([self.record] + [item.record for item in self.dragPeers])
+        
+    @timed('itemDrag')
     def mouseMoveEvent(self, event):
         """Stores the current position (while checking if within boundaries) and calls the mouseMoveEvent
         
@@ -153,6 +272,16 @@ class SquareItem(QGraphicsRectItem):
             rect.adjust(xDiff, 0, 0, yDiff)
         elif self.selectedEdge == 'bottomright':
             rect.adjust(0, 0, xDiff, yDiff)
+            
+        # snap the moving edges to the grid or to the edges of neighbouring blocks
+        # a dragged selection snaps as one rect to the blocks outside of it, rather than the lead item to its peers
+        gridView = self.gridView()
+        if gridView and self.dragPeers:
+            groupRect = self.dragGroupRect.translated(rect.topLeft() - self.clickRect.topLeft())
+            gridView.snapRect(groupRect, self.dragKeys)
+            rect.moveTopLeft(self.clickRect.topLeft() + groupRect.topLeft() - self.dragGroupRect.topLeft())
+        elif gridView:
+            gridView.snapRect(rect, self.record.id, self.selectedEdge)
 
         # this section ensures that we do not drag the rect outside of our boundaries
         # we have set the sceneRect() to be that of the grid boundary
@@ -198,10 +327,27 @@ class SquareItem(QGraphicsRectItem):
             else:
                 rect.setBottom(rect.top() + 5)
 
-        # set the rect with our updates, recalculate positioning for cursors with new rect shape
+        # set the rect with our updates, the resize handles are worked out from it on the next hover
         self.setRect(rect)
-        self.handlePositioning()
+        if gridView:
+            gridView.itemMoved(self)
+        
+        # move the rest of the selection by the same amount, keeping the whole group inside the grid
+        if self.dragPeers:
+            offset = rect.topLeft() - self.clickRect.topLeft()
+            groupRect = self.dragGroupRect.translated(offset)
+            offset += QPointF(max(0, viewLeft - groupRect.left()) + min(0, viewRight - groupRect.right()),
+                              max(0, viewTop - groupRect.top()) + min(0, viewBottom - groupRect.bottom()))
+            self.setRect(self.clickRect.translated(offset))
+            for item in self.dragPeers:
+                item.setRect(item.clickRect.translated(offset))
+                if gridView:
+                    gridView.itemMoved(item)
+            
+        if gridView:
+            gridView.liveSyncItems([self, *self.dragPeers])
         
+    @timed('itemRelease')
     def mouseReleaseEvent(self, event):
         """Calls the mouseReleaseEvent, resets variables, and moves its Unreal counterpart
         
@@ -210,37 +356,105 @@ class SquareItem(QGraphicsRectItem):
         """
         super().mouseReleaseEvent(event)
         
-        # apply the change to the item to its Unreal engine counterpart
+        # apply the change to the item (and any items dragged with it) to its Unreal engine counterpart
+        # the final position is always sent, even if live sync skipped the last moves
+        self.commitRect(resized=self.selectedEdge is not None)
+        for item in self.dragPeers:
+            item.commitRect(resized=False)
+        self.dragPeers = []
+        
+        # only the blocks that actually moved or were resized end up in the journal, so a plain click adds nothing
+        gridView = self.gridView()
+        if gridView and self.dragBefore is not None:
+            gridView.journalTransforms(self.dragBefore)
+        self.dragBefore = None
+    
+        self.update()
+        
+    def commitRect(self, resized=True):
+        """Stores the item's current rect in its record and queues the matching location and scale for its actor
+        
+        Args:
+            resized (bool): Whether the item was resized since it was clicked, rather than only moved
+        """
         rect = QRectF(self.rect())
         
         # take the center() of the rect as the point
         # if we do not take the center(), then resizing will not change position in Unreal in the way we'd like
-        print("new position is {},{}".format(rect.center().x(), rect.center().y()))
-        newLocation = unreal.Vector(rect.center().x(), rect.center().y(), 0)
+        log.debug("new position is %s,%s", rect.center().x(), rect.center().y())
         
-        self.width = rect.width()
-        self.height = rect.height()
+        self.record.setRect(rect.x(), rect.y(), rect.width(), rect.height())
+        gridView = self.gridView()
+        if gridView:
+            gridView.itemMoved(self)
         
         if self.unrealActor:
             # reflect the position change in unreal engine
-            # no need to sweep or teleport, since we are just placing actors
-            self.unrealActor.set_actor_location(newLocation, False, False)
-            
-            # on resizing, reflect the scale update in Unreal 
-            oldActorScale = self.unrealActor.get_actor_scale3d()
-            xFactor = rect.width() / self.clickRect.width()
-            yFactor = rect.height() / self.clickRect.height()
-            # lets expose the zFactor because in the future we'll like to allow for this to be changeable
-            zFactor = 1
-            
-            newXScale = oldActorScale.x * xFactor
-            newYScale = oldActorScale.y * yFactor
-            newZScale = oldActorScale.z * zFactor
-            if newXScale != 1 or newYScale != 1 or newZScale != 1:
-                # only apply updates to unreal if we need to (there is a scale change)
-                self.unrealActor.set_actor_scale3d(unreal.Vector(newXScale, newYScale, newZScale))
+            # the write is queued and flushed with every other pending write at the end of this event-loop tick
+            self.setActorLocation(rect.center().x(), rect.center().y())
+            
+            # on resizing, reflect the scale update in Unreal
+            newScale = self.resizedScale(rect) if resized and self.clickRect else None
+            if newScale:
+                self.setActorScale(*newScale)
+                
+    def resizedScale(self, rect):
+        """Works out the actor scale for a rect, relative to the rect and scale the item had when it was clicked
+        
+        Args:
+            rect (QRectF): The item's rect
+            
+        Returns:
+            The new scale as a tuple of (x, y, z), or None if the scale doesn't change
+        """
+        oldX, oldY, oldZ = self.clickScale or self.record.scale()
+        xFactor = rect.width() / self.clickRect.width()
+        yFactor = rect.height() / self.clickRect.height()
+        # lets expose the zFactor because in the future we'll like to allow for this to be changeable
+        zFactor = 1
+        
+        newXScale = oldX * xFactor
+        newYScale = oldY * yFactor
+        newZScale = oldZ * zFactor
+        if newXScale != 1 or newYScale != 1 or newZScale != 1:
+            # only apply updates to unreal if we need to (there is a scale change)
+            return newXScale, newYScale, newZScale
+        return None
     
-        self.update()
+    def pushLiveTransform(self):
+        """Queues the in-progress location, and scale if resizing, for the actor while the item is being dragged"""
+        if not self.unrealActor:
+            return
+        rect = self.rect()
+        self.setActorLocation(rect.center().x(), rect.center().y())
+        if self.selectedEdge is not None and self.clickRect:
+            newScale = self.resizedScale(rect)
+            if newScale:
+                self.setActorScale(*newScale)
+                
+    def setActorLocation(self, x, y, z=None):
+        """Sets the location of the item's actor, writing it through the record's mirror
+        
+        Args:
+            x (float): The x location
+            y (float): The y location
+            z (float): The z location, the actor's current z if not given
+        """
+        if z is None:
+            z = self.record.locationZ
+        self.record.setLocation(x, y, z)
+        self.UEL.setActorLocation(self.unrealActor, unreal.Vector(x, y, z))
+        
+    def setActorScale(self, x, y, z):
+        """Sets the scale of the item's actor, writing it through the record's mirror
+        
+        Args:
+            x (float): The x scale
+            y (float): The y scale
+            z (float): The z scale
+        """
+        self.record.setScale(x, y, z)
+        self.UEL.setActorScale(self.unrealActor, unreal.Vector(x, y, z))
                 
     def hoverMoveEvent(self, event):
         """Gets the cursor type and applies the hoverMoveEvent"""
@@ -263,71 +477,209 @@ class SquareItem(QGraphicsRectItem):
         """
         contextMenu = QMenu()
         deleteAction = QAction("Delete Item", contextMenu)
-        deleteAction.triggered.connect(self.deleteItem)
+        deleteAction.triggered.connect(self.deleteFromView)
         contextMenu.addAction(deleteAction)
         contextMenu.exec(event.screenPos())
         
+    def deleteFromView(self):
+        """Deletes this item through its GridGraphicsView, so that the delete can be undone"""
+        gridView = self.gridView()
+        if gridView:
+            gridView.deleteItems([self])
+        else:
+            self.deleteItem()
+        
     def deleteItem(self):
-        """Removes this item from the GridGraphicsView and deletes its Unreal counterpart"""
+        """Removes this item from the GridGraphicsView and parks its Unreal counterpart in the actor pool"""
         if self.unrealActor:
-            self.UEL.ELL.destroy_actor(self.unrealActor)
+            self.UEL.releaseActor(self.unrealActor, self.assetPath)
+            self.unrealActor = None
+        gridView = self.gridView()
+        if gridView:
+            gridView.unindexItem(self)
+            gridView.blockGeneration += 1
         if self.scene():
             self.scene().removeItem(self)
+            
+    def gridView(self):
+        """Gets the GridGraphicsView showing this item
+        
+        Returns:
+            The GridGraphicsView, or None if the item isn't in a scene
+        """
+        scene = self.scene()
+        if scene:
+            views = scene.views()
+            if views:
+                return views[0]
+        return None
+    
+    def setOverlapping(self, overlapping):
+        """Highlights the item when it overlaps another block
+        
+        Args:
+            overlapping (bool): Whether the item overlaps another block
+        """
+        if overlapping != self.overlapping:
+            self.overlapping = overlapping
+            self.setBrush(self.overlapBrush if overlapping else self.normalBrush)
       
 class SphereItem(SquareItem):
     """Sphere class that inherits from SquareItem but paints an ellipse to represent the sphere in Unreal Engine"""
-    def __init__(self, x, y, width, height, unrealActor=None, label=None, unrealPath=None):
-        """Init's SphereItem"""
-        super().__init__(x, y, width, height, unrealActor, label, unrealPath)
-        if unrealActor:
-                # if an asset is passed in, that means we are copying
-                self.unrealActor = self.UEL.copyActor(unrealActor, self.actorLabel)
-                self.unrealActor.set_actor_location(unreal.Vector(x+(width/2), y+(height/2), 0), False, False)
-        else:
-            # set x and y to 12.5 since we are now using the center of the QRectF
-            # and our grid starts at (0,0) in the top left
-            # TODO: should just be the center of the rect not +12.5
-            self.unrealActor = self.UEL.spawnActor('circle', x+(width/2), y+(height/2), self.actorLabel)
+    
+    shape = 'circle'
+    cachePaint = True
         
     def paint(self, painter, option, widget):
         """Sets the brush and pen for the sphere, and draws an ellipse to represent a sphere"""
-        painter.setBrush(QBrush(Qt.GlobalColor.blue))
-        painter.setPen(QPen(Qt.GlobalColor.black))
+        painter.setBrush(self.brush())
+        painter.setPen(self.pen())
         painter.drawEllipse(self.rect())
 
 class GridGraphicsView(QGraphicsView):
     """A QGraphicsView that takes in shapes as items in a 2D space, to represent a 3D space in Unreal Engine"""
+    
+    # emitted once a burst of selection changes has settled and been pushed to Unreal
+    selectionSettled = Signal()
+    # (blocks before, blocks after) emitted once a merge has replaced blocks with fewer, larger ones
+    blocksMerged = Signal(int, int)
+    
     def __init__(self):
         """Init's GridGraphicsView and sets the scene"""
         super().__init__()
         self.scene = QGraphicsScene(self)
         self.setScene(self.scene)
         self.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self.setCacheMode(QGraphicsView.CacheBackground)
         self.gridWidth = 1200
         self.gridHeight = 600
         self.gridCreated = False
-        self.UEL = UnrealLibrary()
+        self.UEL = UnrealLibrary.shared()
         
         self.fitInView(self.scene.sceneRect(), Qt.KeepAspectRatio)
-        self.scene.setSceneRect(0, 0, self.gridWidth, self.gridHeight)
-        self.scene.selectionChanged.connect(self.changeUnrealSelection)
+        
+        # a rubber-band drag changes the selection many times a second, so the selection is only pushed
+        # to Unreal once the changes stop for selectionDebounce milliseconds
+        self.selectionDebounce = 30
+        self.selectionTimer = QTimer(self)
+        self.selectionTimer.setSingleShot(True)
+        self.selectionTimer.timeout.connect(self.changeUnrealSelection)
+        self.scene.selectionChanged.connect(self.scheduleSelectionSync)
+        self.selectedItemsCache = []
+        self.pushedSelection = set()
+        self.setDragMode(QGraphicsView.RubberBandDrag)
+        
+        # blocks are indexed by their record id so that neighbours can be found without walking the scene
+        self.spatialIndex = SpatialHash(100)
+        self.itemsById = {}
+        # bumped whenever a block is added, taken out or bound to another actor, so that maps kept over
+        # the blocks' actors, such as LevelSync's, know to rebuild without comparing every block
+        self.blockGeneration = 0
+        self.snapToGrid = True
+        self.snapToEdges = True
+        self.highlightOverlaps = True
+        self.snapDistance = 6 # in pixels, so snapping feels the same at any zoom
+        self.overlapsDirty = set()
+        
+        # live sync pushes the in-progress transform of dragged items to their actors, at most liveSyncRate times a second
+        # and never more than liveSyncMaxCalls bridge calls a second, however many items are being dragged
+        self.liveSync = False
+        self.liveSyncRate = 30
+        self.liveSyncMaxCalls = 3000
+        self.lastLiveSync = 0.0
+        self.liveSyncCalls = deque()
+        
+        # when zoomed out below lodZoom, blocks stop painting themselves and are drawn with the background instead,
+        # as one fill per state from cached rects, and antialiasing is dropped below antialiasZoom
+        self.lodZoom = 0.2
+        self.antialiasZoom = 0.35
+        self.batchedBlocks = False
+        self.blockBatches = None
+        self.blockBatchTile = 512
+        self.selectedBlockBrush = QBrush(QColor(255, 170, 0))
+        self.scene.selectionChanged.connect(self.invalidateBlockBatches)
+        
+        # the perf overlay shows bridge calls per frame, latency percentiles and the slowest calls, refreshed a few times a second
+        self.profiler = BridgeProfiler.shared()
+        self.showPerfOverlay = False
+        self.perfOverlayTimer = QTimer(self)
+        self.perfOverlayTimer.timeout.connect(self.viewport().update)
+        
+        # imported blocks only get an item while they are in or near the view, within virtualMargin of the view's size,
+        # the rest wait as records in the dormant index until they are panned into view
+        self.dormantRecords = {}
+        self.dormantIndex = SpatialHash(400)
+        self.virtualKeys = set()
+        self.virtualMargin = 0.5
+        self.virtualTimer = QTimer(self)
+        self.virtualTimer.setSingleShot(True)
+        self.virtualTimer.timeout.connect(self.updateVirtualItems)
+        
+        # the grid is divided into chunks, and blocks in chunks away from the view are packed rather than held as records,
+        # with the chunks in or near the view resident, prefetchRing chunks around them loaded one per tick ahead of panning
+        # and the least recently used packed again once more than the world's resident limit are held
+        self.world = WorldChunks()
+        self.prefetchRing = 1
+        self.prefetchKeys = deque()
+        self.prefetchTimer = QTimer(self)
+        self.prefetchTimer.setSingleShot(True)
+        self.prefetchTimer.timeout.connect(self.prefetchChunk)
+        
+        # the blocks and the bulk changes to them are the document's, with the grid as the store it keeps its records in
+        self.document = BlockoutDocument(self.UEL, self)
+        
+        # bulk spawns, copies and deletes run a few milliseconds per tick so they never freeze the editor
+        self.spawnScheduler = SpawnScheduler(0.008, self.UEL.flush, self)
+        # chunks aren't packed while blocks wait for their actors, so that is caught up on once a batch finishes
+        self.spawnScheduler.batchFinished.connect(self.scheduleVirtualUpdate)
+        
+        # adds, deletes, moves, resizes and z-scale changes can be undone, with deleted blocks' actors hidden rather than released
+        self.journal = UndoJournal(self)
+        
+        # moves, scales, deletes and selection changes made to blocks' actors in the Unreal editor are picked up
+        # a few milliseconds per tick once the level sync is started
+        self.levelSync = LevelSync(self)
+        
+        # generated blocks are placed as records in one batch and get their actors generateChunk at a time through the scheduler,
+        # and a generator that would make more than maxGeneratedBlocks blocks is refused
+        self.generateChunk = 32
+        self.maxGeneratedBlocks = 50000
         
         self.canSpawnItemOnPress = True
         self.copiedItems = None
         self.step = None
-        self.numItems = 0
         self.zoom = 0.5
-        self.scale(self.zoom, self.zoom)
+        self.setTransform(QTransform.fromScale(self.zoom, self.zoom))
+        
+        # lines are light grey for now, can add a colorpicker if we want to add the flexibility
+        # every majorGridFactor-th line is drawn darker, and minor lines closer than minGridSpacing pixels are merged away
+        self.minorGridPen = QPen(QColor(211, 211, 211), 0)
+        self.majorGridPen = QPen(QColor(160, 160, 160), 0)
+        self.majorGridFactor = 5
+        self.minGridSpacing = 6
         
+        # the scene covers a fixed area, far larger than a layout and what is in view at the furthest zoom,
+        # so zooming and panning only ever change the view's transform and never the scene
+        self.sceneExtent = 1000000
+        self.scene.setSceneRect(-self.sceneExtent / 2, -self.sceneExtent / 2, self.sceneExtent, self.sceneExtent)
         self.createGrid(20, self.gridWidth, self.gridHeight)
         
+    @property
+    def numItems(self):
+        """How many labels have been given out, which numbers the label of the next new block"""
+        return self.document.labelCount
+    
+    @numItems.setter
+    def numItems(self, value):
+        self.document.labelCount = value
+    
     def createGrid(self, step=20, width=800, height=600, zoom = None):
-        """Creates the grid in the graphics view and adds grid lines
+        """Sets up the grid of the graphics view and shows its starting area, the grid lines themselves are drawn in drawBackground()
         
         Args:
             step (int): The step for each grid line
-            width (int): The width of the grid
-            height (int): The height of the grid
+            width (int): The width of the area to show
+            height (int): The height of the area to show
         """
         if not zoom:
             zoom = self.zoom
@@ -336,24 +688,182 @@ class GridGraphicsView(QGraphicsView):
         self.gridHeight = height / zoom
         self.step = step
         
-        # lines are light grey for now, can add a colorpicker if we want to add the flexibility
-        lightGray = QColor(211, 211, 211)
+        # this "grid" does not actually create a grid, the lines are drawn over whatever part of the scene is in view
+        # and the area from the origin to gridWidth and gridHeight is only where the view starts out
+        self.gridCreated = True
         
-        # TODO: Give some flexibility to the grid - for example maybe just lines at the end as an option
+        self.resetCachedContent()
+        self.centerOn(self.gridWidth / 2, self.gridHeight / 2)
         
-        # make this `+ 1` so that we add a line to the edges
-        for x in range(0, int(self.gridWidth) + 1, step):
-            self.scene.addLine(x, 0, x, int(self.gridHeight), QPen(lightGray))
-        for y in range(0, int(self.gridHeight) + 1, step):
-            self.scene.addLine(0, y, int(self.gridWidth), y, QPen(lightGray))
+    def extendGrid(self, left, top, right, bottom):
+        """Grows the scene so that it holds an area, for layouts that reach past the fixed scene extent
         
-        # this "grid" does not actually create a grid, but rather sets the lines for an area
-        # and establishes boundaries for that area
-        # we store gridWidth and gridHeight so that we can set the boundary for an item when we create it
-        self.gridCreated = True
+        This is only called as blocks are placed, never on zoom, and leaves the scene alone for any area already inside it
+        
+        Args:
+            left (float): The left of the area
+            top (float): The top of the area
+            right (float): The right of the area
+            bottom (float): The bottom of the area
+        """
+        sceneRect = self.scene.sceneRect()
+        area = QRectF(QPointF(left, top), QPointF(right, bottom))
+        if sceneRect.contains(area):
+            return
+        
+        step = self.step
+        sceneRect = sceneRect.united(area)
+        left = math.floor(sceneRect.left() / step) * step
+        top = math.floor(sceneRect.top() / step) * step
+        right = math.ceil(sceneRect.right() / step) * step
+        bottom = math.ceil(sceneRect.bottom() / step) * step
+        self.scene.setSceneRect(left, top, right - left, bottom - top)
+        self.resetCachedContent()
+        
+    def gridLevels(self):
+        """Gets the spacing of the minor and major grid lines for the current zoom
+        
+        When zoomed out far enough that minor lines would crowd together, the spacing grows by the major factor
+        so that the number of lines drawn stays roughly constant no matter the zoom
+        
+        Returns:
+            A tuple of (minor step, major step) in scene units
+        """
+        pixelsPerUnit = self.transform().m11()
+        minorStep = self.step
+        while minorStep * pixelsPerUnit < self.minGridSpacing:
+            minorStep *= self.majorGridFactor
+        return minorStep, minorStep * self.majorGridFactor
+        
+    @timed('drawGrid')
+    def drawBackground(self, painter, rect):
+        """Draws the grid lines that fall within the exposed rect, rather than keeping a scene item per line
+        
+        Args:
+            painter (QPainter): The painter for the view
+            rect (QRectF): The exposed area in scene coordinates
+        """
+        super().drawBackground(painter, rect)
+        if not self.gridCreated:
+            return
+        
+        gridRect = rect.intersected(self.scene.sceneRect())
+        if gridRect.isEmpty():
+            return
+        
+        minorStep, majorStep = self.gridLevels()
+        minorLines = []
+        majorLines = []
+        
+        # make the range inclusive so that we add a line to the edges
+        x = math.floor(gridRect.left() / minorStep) * minorStep
+        while x <= gridRect.right():
+            line = QLineF(x, gridRect.top(), x, gridRect.bottom())
+            (majorLines if x % majorStep == 0 else minorLines).append(line)
+            x += minorStep
+        y = math.floor(gridRect.top() / minorStep) * minorStep
+        while y <= gridRect.bottom():
+            line = QLineF(gridRect.left(), y, gridRect.right(), y)
+            (majorLines if y % majorStep == 0 else minorLines).append(line)
+            y += minorStep
+        
+        painter.save()
+        # pens are cosmetic (width 0) so that lines stay one pixel wide at any zoom
+        painter.setPen(self.minorGridPen)
+        painter.drawLines(minorLines)
+        painter.setPen(self.majorGridPen)
+        painter.drawLines(majorLines)
+        painter.restore()
+        
+        if self.batchedBlocks:
+            self.drawBlockBatches(painter, rect)
+            
+    def drawBlockBatches(self, painter, rect):
+        """Draws the blocks in the exposed rect as plain fills, one drawRects() call per state per tile,
+        for when blocks are too small to paint one by one
+        
+        At this zoom a block is only a few pixels across, so spheres are filled as squares and outlines are left out
+        
+        Args:
+            painter (QPainter): The painter for the view
+            rect (QRectF): The exposed area in scene coordinates
+        """
+        if self.blockBatches is None:
+            self.blockBatches = self.buildBlockBatches()
+        size = self.blockBatchTile
+        
+        # scrolling diagonally exposes an L-shaped region whose bounding rect is the whole view,
+        # so the tiles are taken from the rects of the clip region when there is one
+        areas = [rect]
+        if painter.hasClipping():
+            areas = [QRectF(area) for area in painter.clipRegion()]
+        tiles = set()
+        for area in areas:
+            area = area.intersected(rect)
+            for column in range(math.floor(area.left() / size), math.floor(area.right() / size) + 1):
+                for row in range(math.floor(area.top() / size), math.floor(area.bottom() / size) + 1):
+                    tiles.add((column, row))
+        
+        brushes = (SquareItem.normalBrush, SquareItem.overlapBrush, self.selectedBlockBrush)
+        painter.save()
+        painter.setPen(Qt.NoPen)
+        for tile in tiles:
+            batches = self.blockBatches.get(tile)
+            if batches:
+                for brush, rects in zip(brushes, batches):
+                    if rects:
+                        painter.setBrush(brush)
+                        painter.drawRects(rects)
+        painter.restore()
         
-        self.scene.setSceneRect(0, 0, self.gridWidth, self.gridHeight)
+    def buildBlockBatches(self):
+        """Groups the rects of every block into square tiles, and within each tile by the brush it is filled with
         
+        A block is added to every tile it touches, so that drawing the tiles under any exposed rect covers it
+        
+        Returns:
+            A dict of {(column, row): (normal rects, overlapping rects, selected rects)}
+        """
+        selected = {item.record.id for item in self.scene.selectedItems()}
+        size = self.blockBatchTile
+        tiles = {}
+        rects = self.spatialIndex.rects
+        for key, item in self.itemsById.items():
+            left, top, right, bottom = rects[key]
+            rect = QRectF(left, top, right - left, bottom - top)
+            state = 2 if key in selected else 1 if item.overlapping else 0
+            for column in range(math.floor(left / size), math.floor(right / size) + 1):
+                for row in range(math.floor(top / size), math.floor(bottom / size) + 1):
+                    batches = tiles.get((column, row))
+                    if batches is None:
+                        batches = tiles[(column, row)] = ([], [], [])
+                    batches[state].append(rect)
+        return tiles
+    
+    def invalidateBlockBatches(self):
+        """Drops the cached block fills after a block moves or changes state, so they are rebuilt on the next paint"""
+        if self.blockBatches is None:
+            return
+        self.blockBatches = None
+        self.resetCachedContent()
+        
+    def setBatchedBlocks(self, batched):
+        """Switches between blocks painting themselves and being drawn in batches with the background
+        
+        Items keep their place in the scene either way, so selecting and dragging them works the same
+        
+        Args:
+            batched (bool): Whether blocks should be drawn in batches
+        """
+        if batched == self.batchedBlocks:
+            return
+        self.batchedBlocks = batched
+        self.blockBatches = None
+        for item in self.itemsById.values():
+            item.setFlag(QGraphicsItem.ItemHasNoContents, batched)
+        self.resetCachedContent()
+        
+    @timed('addItem')
     def addItem(self, shape='square', width=15, height=15, x=0, y=0, assetPath=None):
         """Adds an item to the to the GridGraphicsView
         
@@ -365,32 +875,42 @@ class GridGraphicsView(QGraphicsView):
             width (float): The width of the item's shape
             height (float): The height of the item's shape
         """
-        print("width is {}".format(width))
-        print("height is {}".format(height))
+        log.debug("adding %s item of %sx%s", shape, width, height)
         label = "BlockoutActor{}".format(self.numItems) if self.numItems > 0 else "BlockoutActor"
         if self.gridCreated: # only add the item if the grid has been created
             if shape == 'circle':
-                asset = SphereItem(x, y, width, height, None, label, assetPath)
+                asset = SphereItem(x, y, width, height, None, label, assetPath, self.UEL)
             else:
-                asset = SquareItem(x, y, width, height, None, label, assetPath)
+                asset = SquareItem(x, y, width, height, None, label, assetPath, self.UEL)
             
             self.scene.addItem(asset)
+            self.indexItem(asset)
+            self.blockGeneration += 1
             self.numItems += 1
+            self.journal.push(BlocksEntry([asset.record.id], added=True))
     
             return asset
         else:
             # we don't necessarily need a grid to add an item, but if this were to happen then boundaries could not be set
-            # so we'll just print rather than raising an exception
-            print("Must create a grid before adding assets")
+            # so we'll just log rather than raising an exception
+            log.warning("Must create a grid before adding assets")
             return
     
+    @timed('keyPress')
     def keyPressEvent(self, event):
         """ Handles key press hot keys and also calls the parent keyPressEvent()
         
         Hotkeys:
             Quick spawning (F): Creates a cube item at the given mouse location
+            Select region (ctrl+a): Selects every block in the visible region
+            Select touching (T): Adds every block touching the selection to the selection
             Copy Items (ctrl+c): Copies the selected items and stores them in self.copiedItems
             Paste Items (ctrl+v): Pastes the selected items at the cursors location
+            Delete Items (delete): Deletes the selected items
+            Undo (ctrl+z): Undoes the last add, delete, move, resize, z-scale change or paste
+            Redo (ctrl+shift+z or ctrl+y): Redoes the last undone change
+            Perf overlay (F3): Toggles profiling and the perf overlay
+            Dump profile (ctrl+shift+d): Writes the profiler's results as JSON and CSV to the temp folder
                 - NOTE: Pasting multiple items will put them all at the cursor location
                     In the future we can make the pasting be an offset, so that we keep the shape of the multi-copy
         """
@@ -400,14 +920,41 @@ class GridGraphicsView(QGraphicsView):
             self.addItem('square', 25, 25, cursorPos.x(), cursorPos.y())
             self.canSpawnItemOnPress = False
             
+        # toggle the perf overlay, which also turns profiling on or off
+        if event.key() == Qt.Key_F3:
+            self.setPerfOverlay(not self.showPerfOverlay)
+            
+        # dump the profiler's results to the temp folder
+        if event.key() == Qt.Key_D and event.modifiers() == (Qt.ControlModifier | Qt.ShiftModifier):
+            self.dumpProfile()
+            
+        # select every block in the visible region
+        if event.key() == Qt.Key_A and event.modifiers() == Qt.ControlModifier:
+            self.selectItemsInRect(self.mapToScene(self.viewport().rect()).boundingRect())
+            
+        # select every block touching the current selection
+        if event.key() == Qt.Key_T and event.modifiers() == Qt.NoModifier:
+            self.selectTouching()
+            
         # copy selected items
         if event.key() == Qt.Key_C and event.modifiers() == Qt.ControlModifier:
             if self.scene.selectedItems():
                 self.copiedItems = self.scene.selectedItems()
         
+        # delete selected items
+        if event.key() == Qt.Key_Delete and self.scene.selectedItems():
+            self.deleteItems(self.scene.selectedItems())
+            
         # paste selected items
         if event.key() == Qt.Key_V and event.modifiers() == Qt.ControlModifier:
             self.pasteItems(self.copiedItems)
+            
+        # undo and redo
+        if event.key() == Qt.Key_Z and event.modifiers() == Qt.ControlModifier:
+            self.undo()
+        if (event.key() == Qt.Key_Z and event.modifiers() == (Qt.ControlModifier | Qt.ShiftModifier)) or \
+                (event.key() == Qt.Key_Y and event.modifiers() == Qt.ControlModifier):
+            self.redo()
         super().keyPressEvent(event)
         
     def keyReleaseEvent(self, event):
@@ -416,6 +963,7 @@ class GridGraphicsView(QGraphicsView):
             self.canSpawnItemOnPress = True
         super().keyReleaseEvent(event)
         
+    @timed('paste')
     def pasteItems(self, items):
         """ Pastes the items into the gridview at the mouse cursor's position
         
@@ -426,50 +974,1243 @@ class GridGraphicsView(QGraphicsView):
         if not items:
             return
         
+        # items are placed straight away and their actors are copied by the scheduler a few at a time
+        cursorPos = self.mapToScene(self.mapFromGlobal(QCursor.pos()))
+        pasted = []
         for item in items:
-            width = item.width
-            height = item.height
-            cursorPos = self.mapToScene(self.mapFromGlobal(QCursor.pos()))
-            unrealActor = item.unrealActor
-            if isinstance(item, SphereItem):
-                asset = SphereItem(cursorPos.x(), cursorPos.y(), width, height, unrealActor)
-                self.scene.addItem(asset)
+            record = BlockRecord(item.shape, cursorPos.x(), cursorPos.y(), item.width, item.height, item.record.zScale,
+                                 assetPath=item.assetPath, unrealPath=item.unrealPath,
+                                 scaleX=item.record.scaleX, scaleY=item.record.scaleY)
+            pasted.append((self.createItemFromRecord(record), item.unrealActor))
+        self.blockGeneration += 1
+        
+        # a cancelled copy takes its block out of the paste's entry too, so undo and redo only see the blocks that were pasted
+        entry = BlocksEntry([asset.record.id for asset, _ in pasted], added=True)
+        self.journal.push(entry)
+        self.spawnScheduler.submitMany([(lambda asset=asset, source=source: self.copyActorForItem(asset, source),
+                                         lambda asset=asset: self.cancelPastedItem(asset, entry)) for asset, source in pasted])
+    
+    def cancelPastedItem(self, item, entry):
+        """Deletes a pasted item whose copy was cancelled before it ran, and drops it from the paste's undo entry
+        
+        Args:
+            item (SquareItem): The pasted item
+            entry (BlocksEntry): The entry the paste pushed to the journal
+        """
+        item.deleteItem()
+        self.journal.forget(entry, [item.record.id])
+        
+    @timed('generate')
+    def addBlocks(self, rects, templates, sources=None):
+        """Adds many blocks in one batch, each one like a template block, and spawns or copies their actors through the scheduler
+        
+        The blocks go into the dormant index as records, so only those in or near the view get an item straight away,
+        and actors are spawned a chunk at a time, with each asset loaded once per chunk
+        
+        Args:
+            rects (np.ndarray): The (N, 4) rects of the blocks
+            templates (list): The BlockRecords the blocks are made like, whose actors are copied if they have one
+            sources (np.ndarray): The index of the template of each block, the first template for every block if not given
+            
+        Returns:
+            The record ids of the new blocks
+        """
+        rects = generators.asRects(rects)
+        if not len(rects) or not self.gridCreated:
+            return []
+        if len(rects) > self.maxGeneratedBlocks:
+            log.warning("Not generating %s blocks, which is more than the limit of %s", len(rects), self.maxGeneratedBlocks)
+            return []
+        sources = np.zeros(len(rects), dtype=np.int64) if sources is None else np.asarray(sources)
+        
+        rights = rects[:, 0] + rects[:, 2]
+        bottoms = rects[:, 1] + rects[:, 3]
+        self.extendGrid(rects[:, 0].min(), rects[:, 1].min(), rights.max(), bottoms.max())
+        
+        pairs = []
+        for number, (x, y, width, height), source in zip(range(self.numItems, self.numItems + len(rects)), rects.tolist(), sources.tolist()):
+            template = templates[source]
+            label = "BlockoutActor{}".format(number) if number > 0 else "BlockoutActor"
+            record = BlockRecord(template.shape, x, y, width, height, template.zScale, None, template.assetPath, template.unrealPath, label,
+                                 template.scaleX, template.scaleY)
+            record.locationZ = template.locationZ
+            self.addDormantRecord(record)
+            pairs.append((record, template))
+        self.numItems += len(pairs)
+        self.blockGeneration += 1
+        self.updateVirtualItems()
+        
+        chunk = self.generateChunk
+        self.spawnScheduler.submitMany([(lambda batch=pairs[start:start + chunk]: self.spawnGenerated(batch), None)
+                                        for start in range(0, len(pairs), chunk)])
+        keys = [record.id for record, _ in pairs]
+        self.journal.push(BlocksEntry(keys, added=True))
+        return keys
+        
+    def spawnGenerated(self, pairs):
+        """Gives generated blocks their actors, copying their template's actor or else spawning their asset in one batch per template
+        
+        Args:
+            pairs (list): (record, template) tuples
+        """
+        batches = {}
+        for record, template in pairs:
+            # the block may have been undone, or given an actor by an undo and redo, while the job was waiting
+            if record.actor is not None or self.recordById(record.id) is not record:
+                continue
+            if template.actor is not None and self.UEL.isValid(template.actor):
+                record.actor = self.UEL.copyActor(template.actor, record.label)
+                self.UEL.setActorLocation(record.actor, unreal.Vector(record.locationX, record.locationY, record.locationZ))
+            else:
+                batches.setdefault(id(template), (template, []))[1].append(record)
+        
+        for template, records in batches.values():
+            actors = self.UEL.spawnActors(template.shape, [record.center() for record in records], [record.label for record in records],
+                                          template.unrealPath)
+            for record, unrealActor in zip(records, actors):
+                record.actor = unrealActor
+                self.UEL.setActorScale(unrealActor, unreal.Vector(*record.scale()))
+                if record.locationZ:
+                    self.UEL.setActorLocation(unrealActor, unreal.Vector(record.locationX, record.locationY, record.locationZ))
+        self.blockGeneration += 1
+                    
+    def mergeBlocks(self, records=None):
+        """Replaces touching blocks with the fewest larger blocks that cover the same area, in one editor transaction
+        
+        Only blocks of the same asset, z-scale, height and scale per grid unit merge, and spheres never do, as a sphere
+        stretched over a merged rect would be an ellipsoid. The merge can be undone like any other change
+        
+        Args:
+            records (list): The records of the blocks to merge, the selected blocks or else every block if not given
+            
+        Returns:
+            A tuple of (blocks before, blocks after) among the blocks that could be merged
+        """
+        if records is None:
+            records = self.selectedRecords()[0] or self.records()
+        records = [record for record in records if record.shape != 'circle']
+        if len(records) < 2:
+            return len(records), len(records)
+        
+        groupKeys = {}
+        groups = np.fromiter((groupKeys.setdefault((record.shape, record.assetPath, record.unrealPath, round(record.zScale, 6),
+                                                    round(record.locationZ, 3), round(record.scaleX / record.width, 9),
+                                                    round(record.scaleY / record.height, 9)), len(groupKeys))
+                              for record in records), np.int64, len(records))
+        rects = generators.asRects([(record.x, record.y, record.width, record.height) for record in records])
+        merged, owners = rectmerge.mergeRects(rects, groups)
+        counts = np.bincount(owners, minlength=len(merged))
+        if (counts < 2).all():
+            return len(records), len(records)
+        
+        # each merged rect takes after the first block that went into it
+        firsts = np.full(len(merged), len(records))
+        np.minimum.at(firsts, owners, np.arange(len(records)))
+        removedIds = [record.id for record, owner in zip(records, owners.tolist()) if counts[owner] > 1]
+        
+        newRecords = []
+        for number, (x, y, width, height), first in zip(itertools.count(self.numItems), merged[counts > 1].tolist(), firsts[counts > 1].tolist()):
+            template = records[first]
+            label = "BlockoutActor{}".format(number) if number > 0 else "BlockoutActor"
+            record = BlockRecord(template.shape, x, y, width, height, template.zScale, None, template.assetPath, template.unrealPath, label,
+                                 template.scaleX * width / template.width, template.scaleY * height / template.height)
+            record.locationZ = template.locationZ
+            newRecords.append(record)
+        self.numItems += len(newRecords)
+        
+        removed = BlocksEntry(removedIds, added=False)
+        with self.UEL.transaction("QuickBlock Merge Blocks"):
+            removed.remove(self)
+            batches = {}
+            for record in newRecords:
+                self.addDormantRecord(record)
+                batches.setdefault((record.shape, record.unrealPath), []).append(record)
+            for (shape, unrealPath), batch in batches.items():
+                actors = self.UEL.spawnActors(shape, [record.center() for record in batch], [record.label for record in batch], unrealPath)
+                for record, unrealActor in zip(batch, actors):
+                    record.actor = unrealActor
+                    self.UEL.setActorScale(unrealActor, unreal.Vector(*record.scale()))
+                    if record.locationZ:
+                        self.UEL.setActorLocation(unrealActor, unreal.Vector(record.locationX, record.locationY, record.locationZ))
+        self.blockGeneration += 1
+        self.updateVirtualItems()
+        
+        newIds = [record.id for record in newRecords]
+        self.journal.push(CompoundEntry([removed, BlocksEntry(newIds, added=True)]))
+        self.selectKeys(newIds)
+        
+        before = len(records)
+        after = before - len(removedIds) + len(newRecords)
+        log.info("Merged %s blocks into %s, %s fewer actors", before, after, before - after)
+        self.blocksMerged.emit(before, after)
+        return before, after
+        
+    def selectedRecords(self):
+        """Gets the records of the selected blocks, along with their rects as an (N, 4) array"""
+        records = [item.record for item in self.scene.selectedItems()]
+        return records, generators.asRects([(record.x, record.y, record.width, record.height) for record in records])
+        
+    def generateArray(self, count, offsetX, offsetY):
+        """Repeats the selected blocks count times along an offset
+        
+        Args:
+            count (int): How many copies of each block to make
+            offsetX (float): The x offset from one copy to the next
+            offsetY (float): The y offset from one copy to the next
+            
+        Returns:
+            The record ids of the new blocks
+        """
+        records, rects = self.selectedRecords()
+        rects, sources = generators.linearArray(rects, count, offsetX, offsetY)
+        return self.addBlocks(rects, records, sources)
+        
+    def generateRadialArray(self, count, centerX, centerY, angle=360.0):
+        """Repeats the selected blocks count times around a center
+        
+        Args:
+            count (int): How many copies of each block to make
+            centerX (float): The x of the center to rotate around
+            centerY (float): The y of the center to rotate around
+            angle (float): The angle in degrees to spread the copies over
+            
+        Returns:
+            The record ids of the new blocks
+        """
+        records, rects = self.selectedRecords()
+        rects, sources = generators.radialArray(rects, count, centerX, centerY, angle)
+        return self.addBlocks(rects, records, sources)
+        
+    def generatorTemplate(self, width, height, shape='square'):
+        """Gets a record for blocks made from nothing by the fill and scatter generators to be made like
+        
+        Args:
+            width (float): The width of the blocks
+            height (float): The height of the blocks
+            shape (str): The shape of the blocks
+            
+        Returns:
+            A BlockRecord that isn't in the grid
+        """
+        # blocks are 100 units to a scale of 1
+        return BlockRecord(shape, 0, 0, width, height, assetPath=self.UEL.resolveAssetPath(shape), scaleX=width / 100, scaleY=height / 100)
+        
+    def generateFill(self, rect, cellWidth, cellHeight, gap=0.0, shape='square'):
+        """Fills a region with a grid of blocks
+        
+        Args:
+            rect (QRectF): The region in scene coordinates
+            cellWidth (float): The width of each block
+            cellHeight (float): The height of each block
+            gap (float): The space between neighbouring blocks
+            shape (str): The shape of the blocks
+            
+        Returns:
+            The record ids of the new blocks
+        """
+        rects = generators.fillGrid(rect.x(), rect.y(), rect.width(), rect.height(), cellWidth, cellHeight, gap)
+        return self.addBlocks(rects, [self.generatorTemplate(cellWidth, cellHeight, shape)])
+        
+    def generateScatter(self, rect, blockWidth, blockHeight, spacing, seed=None, shape='square'):
+        """Scatters blocks in a region so that no two centers are closer than a spacing
+        
+        Args:
+            rect (QRectF): The region in scene coordinates
+            blockWidth (float): The width of each block
+            blockHeight (float): The height of each block
+            spacing (float): The smallest distance between the centers of two blocks
+            seed (int): Seeds the scatter, so that the same one can be made again
+            shape (str): The shape of the blocks
+            
+        Returns:
+            The record ids of the new blocks
+        """
+        rects = generators.scatter(rect.x(), rect.y(), rect.width(), rect.height(), blockWidth, blockHeight, spacing, seed=seed)
+        return self.addBlocks(rects, [self.generatorTemplate(blockWidth, blockHeight, shape)])
+        
+    def contextMenuEvent(self, event):
+        """Shows the generator menu when right-clicking the grid itself, items show their own menu"""
+        if isinstance(self.itemAt(event.pos()), SquareItem):
+            super().contextMenuEvent(event)
+            return
+        self.displayGeneratorMenu(self.mapToScene(event.pos()), event.globalPos())
+        
+    def displayGeneratorMenu(self, scenePos, screenPos):
+        """Shows a QMenu of the generators, each asking for its parameters before running
+        
+        Arrays repeat the selected blocks, with radial arrays going around the clicked point,
+        and fills and scatters cover the part of the grid in view
+        
+        Args:
+            scenePos (QPointF): Where the menu was asked for, in scene coordinates
+            screenPos (QPoint): Where to show the menu on screen
+        """
+        records, rects = self.selectedRecords()
+        region = self.mapToScene(self.viewport().rect()).boundingRect().intersected(self.sceneRect())
+        
+        contextMenu = QMenu()
+        arrayAction = QAction("Linear Array...", contextMenu)
+        radialAction = QAction("Radial Array...", contextMenu)
+        fillAction = QAction("Fill View With Grid...", contextMenu)
+        scatterAction = QAction("Scatter In View...", contextMenu)
+        mergeAction = QAction("Merge Selected Blocks" if records else "Merge All Blocks", contextMenu)
+        convertAction = QAction("Convert Instances To Actors", contextMenu)
+        arrayAction.setEnabled(bool(records))
+        radialAction.setEnabled(bool(records))
+        convertAction.setEnabled(self.UEL.instances.hasInstances())
+        for action in (arrayAction, radialAction, fillAction, scatterAction):
+            contextMenu.addAction(action)
+        contextMenu.addSeparator()
+        contextMenu.addAction(mergeAction)
+        contextMenu.addAction(convertAction)
+        
+        chosen = contextMenu.exec(screenPos)
+        if chosen is arrayAction:
+            # by default the copies go to the right of the selection, a block's width apart
+            spanX = float(np.ptp(np.concatenate((rects[:, 0], rects[:, 0] + rects[:, 2]))))
+            values = GeneratorDialog.ask("Linear Array", [("Copies", 10, 1, 10000), ("Offset X", spanX + 25.0, -100000.0, 100000.0),
+                                                          ("Offset Y", 0.0, -100000.0, 100000.0)], self)
+            if values:
+                self.generateArray(*values)
+        elif chosen is radialAction:
+            values = GeneratorDialog.ask("Radial Array", [("Copies", 7, 1, 10000), ("Angle", 360.0, -360.0, 360.0)], self)
+            if values:
+                self.generateRadialArray(values[0], scenePos.x(), scenePos.y(), values[1])
+        elif chosen is fillAction:
+            values = GeneratorDialog.ask("Fill View With Grid", [("Block width", 25.0, 5.0, 10000.0), ("Block height", 25.0, 5.0, 10000.0),
+                                                                  ("Gap", 25.0, 0.0, 10000.0)], self)
+            if values:
+                self.generateFill(region, *values)
+        elif chosen is scatterAction:
+            values = GeneratorDialog.ask("Scatter In View", [("Block width", 25.0, 5.0, 10000.0), ("Block height", 25.0, 5.0, 10000.0),
+                                                              ("Spacing", 60.0, 5.0, 10000.0), ("Seed", 0, 0, 2 ** 31 - 1)], self)
+            if values:
+                self.generateScatter(region, *values)
+        elif chosen is mergeAction:
+            self.mergeBlocks()
+        elif chosen is convertAction:
+            self.convertToActors()
+        
+    def copyActorForItem(self, item, sourceActor):
+        """Gives an item a copy of an actor, placed at wherever the item is now
+        
+        Args:
+            item (SquareItem): The item waiting for its actor
+            sourceActor (Actor): The actor to copy
+        """
+        # the item may have been deleted, or its source deleted, while the job was waiting
+        if item.scene() is None or sourceActor is None:
+            return
+        rect = item.rect()
+        item.unrealActor = self.UEL.copyActor(sourceActor, item.actorLabel)
+        item.setActorLocation(rect.center().x(), rect.center().y())
+        self.blockGeneration += 1
+        
+    def deleteItems(self, items):
+        """Removes items from the view straight away, and hides their actors through the scheduler
+        
+        The actors are held by the undo journal so that undoing the delete only has to show them again,
+        and are released to the pool once the delete drops out of the journal
+        
+        Args:
+            items (list): The items to delete
+        """
+        entry = BlocksEntry([item.record.id for item in items], added=False)
+        entry.remove(self, schedule=True)
+        self.journal.push(entry)
+        
+    def undo(self):
+        """Undoes the last change in the journal, sending all of its engine calls in one flush"""
+        if self.journal.undo():
+            self.UEL.flush()
+            
+    def redo(self):
+        """Redoes the last undone change in the journal, sending all of its engine calls in one flush"""
+        if self.journal.redo():
+            self.UEL.flush()
+            
+    def journalTransforms(self, before, mergeKey=None):
+        """Adds the blocks that changed since a snapshot to the undo journal
+        
+        Args:
+            before (tuple): The (ids, values) taken by snapshotTransforms() before the change
+            mergeKey (str): Passed on to the journal, so that a stream of changes such as slider ticks is one undo step
+        """
+        ids, values = before
+        records = [self.recordById(key) for key in ids.tolist()]
+        _, after = snapshotTransforms([record for record in records if record is not None])
+        if len(after) != len(values):
+            # a block went away during the change, so there is nothing sensible to undo
+            return
+        changed = (after != values).any(axis=1)
+        if changed.any():
+            self.journal.push(TransformEntry(ids[changed], values[changed], after[changed]), mergeKey)
+            
+    def recordById(self, key):
+        """Gets the record of a block in the grid, whether or not it has an item right now
+        
+        Args:
+            key (int): The record id
+            
+        Returns:
+            The BlockRecord, or None if the block isn't in the grid
+        """
+        item = self.itemsById.get(key)
+        if item is not None:
+            return item.record
+        return self.dormantRecords.get(key)
+        
+    @timed('applyTransforms')
+    def applyTransforms(self, ids, values):
+        """Sets the rect and scale of blocks, queueing location and scale writes only for actors whose mirror differs
+        
+        Args:
+            ids (np.ndarray): The record ids of the blocks
+            values (np.ndarray): One row per block of (x, y, width, height, scale x, scale y, z-scale)
+        """
+        keys = ids.tolist()
+        self.loadChunksHolding(keys)
+        self.document.setTransforms(ids, values)
+        self.selectKeys(keys)
+        self.scheduleVirtualUpdate()
+        
+    def removeBlocks(self, ids, schedule=False):
+        """Takes blocks out of the grid and hides their actors, without giving the actors up
+        
+        Args:
+            ids (np.ndarray): The record ids of the blocks
+            schedule (bool): Whether to hide the actors through the spawn scheduler rather than queueing every write now
+            
+        Returns:
+            The records of the removed blocks
+        """
+        records = []
+        jobs = []
+        keys = ids.tolist()
+        self.loadChunksHolding(keys)
+        for key in keys:
+            item = self.itemsById.get(key)
+            if item is not None:
+                record = item.record
+                self.unindexItem(item)
+                self.virtualKeys.discard(key)
+                if item.scene():
+                    self.scene.removeItem(item)
+            elif key in self.dormantRecords:
+                record = self.dormantRecords.pop(key)
+                self.dormantIndex.remove(key)
+            else:
+                continue
+            records.append(record)
+            if record.actor is None:
+                continue
+            if schedule:
+                jobs.append((lambda record=record: self.hideRemovedActor(record), None))
+            else:
+                self.UEL.setActorHidden(record.actor, True)
+        if jobs:
+            self.spawnScheduler.submitMany(jobs)
+        self.blockGeneration += 1
+        return records
+    
+    def hideRemovedActor(self, record):
+        """Hides the actor of a removed block, unless the block was put back before this ran
+        
+        Args:
+            record (BlockRecord): The record of the block
+        """
+        if self.recordById(record.id) is None:
+            self.UEL.setActorHidden(record.actor, True)
+        
+    def restoreBlocks(self, records):
+        """Puts removed blocks back into the grid, showing their held actors or taking new ones if they are gone
+        
+        Args:
+            records (list): The records of the blocks, with the ids they had before
+        """
+        for record in records:
+            if record.actor is not None and self.UEL.isValid(record.actor):
+                self.UEL.setActorHidden(record.actor, False)
             else:
-                asset = SquareItem(cursorPos.x(), cursorPos.y(), width, height, unrealActor)
-                self.scene.addItem(asset)
+                # the actor was deleted in the level while the block was out of the grid, so a pooled or new one stands in
+                centerX, centerY = record.center()
+                record.actor = self.UEL.spawnActor(record.shape, centerX, centerY, record.label, record.unrealPath)
+                self.UEL.setActorScale(record.actor, unreal.Vector(*record.scale()))
+                if record.locationZ:
+                    self.UEL.setActorLocation(record.actor, unreal.Vector(centerX, centerY, record.locationZ))
+            self.createItemFromRecord(record)
+        self.blockGeneration += 1
+        self.selectKeys([record.id for record in records])
+        
+    def releaseHeldActors(self, held, schedule=True):
+        """Gives the actors the undo journal was holding for deleted blocks back to the pool
+        
+        Args:
+            held (list): A list of (actor, object path) tuples
+            schedule (bool): Whether to release the actors through the spawn scheduler rather than all at once
+        """
+        if not schedule:
+            for unrealActor, objectPath in held:
+                self.UEL.releaseActor(unrealActor, objectPath)
+            return
+        self.spawnScheduler.submitMany([(lambda unrealActor=unrealActor, objectPath=objectPath: self.UEL.releaseActor(unrealActor, objectPath), None)
+                                        for unrealActor, objectPath in held])
                 
+    def records(self):
+        """Gets the record of every block in the grid, including those of imported blocks that have no item right now
+        
+        Chunks that were packed away are loaded for this, and packed again on the next update of the view
+        
+        Returns:
+            A list of BlockRecords
+        """
+        for key in self.world.packedKeys():
+            self.loadChunk(key)
+        self.scheduleVirtualUpdate()
+        return self.residentRecords()
+    
+    def residentRecords(self):
+        """Gets the record of every block in a resident chunk, without loading the chunks that are packed away
+        
+        Returns:
+            A list of BlockRecords
+        """
+        return [item.record for item in self.itemsById.values()] + list(self.dormantRecords.values())
+        
+    def boundActors(self):
+        """Gets the actors owned by the grid, which no other block may be bound to
+        
+        These are the actors of resident, dormant and packed blocks, and the hidden actors the undo journal holds
+        for deleted blocks, gathered without loading the chunks that are packed away
+        
+        Returns:
+            A set of actors
+        """
+        boundActors = {record.actor for record in self.residentRecords() if record.actor is not None}
+        boundActors.update(self.world.packedActors())
+        for entry in list(self.journal.undoStack) + self.journal.redoStack:
+            boundActors.update(unrealActor for unrealActor, objectPath in entry.heldActors())
+        return boundActors
+    
+    def resync(self):
+        """Refreshes the mirrored location, scale and label of every block from Unreal in one bulk read
+        
+        The mirror is otherwise only written by the tool, so this picks up changes made in the Unreal editor
+        """
+        records = [record for record in self.records() if record.actor]
+        states = self.UEL.getActorStates([record.actor for record in records])
+        for record, (location, scale, label) in zip(records, states):
+            record.setLocation(location.x, location.y, location.z)
+            record.setScale(scale.x, scale.y, scale.z)
+            record.label = label
+        self.selectionSettled.emit()
+        
+    def applyLevelTransforms(self, records, values):
+        """Moves and resizes blocks to match the transforms their actors were given in the Unreal editor
+        
+        The rect is resized by how much the scale changed, keeping the block's grid units per unit of scale, and the
+        mirror is updated so the next drag starts from the actor's transform rather than writing the old one back
+        
+        Args:
+            records (list): The records of the blocks
+            values (np.ndarray): One row per block of (x, y, z, scale x, scale y, scale z) read from its actor
+        """
+        moved = []
+        for record, (x, y, z, scaleX, scaleY, scaleZ) in zip(records, values.tolist()):
+            if self.recordById(record.id) is not record:
+                # the block was taken out of the grid since it was read
+                continue
+            width = abs(scaleX) * record.width / abs(record.scaleX) if record.scaleX else record.width
+            height = abs(scaleY) * record.height / abs(record.scaleY) if record.scaleY else record.height
+            left, top = x - width / 2, y - height / 2
+            record.setRect(left, top, width, height)
+            record.setLocation(x, y, z)
+            record.setScale(scaleX, scaleY, scaleZ)
+            moved.append(record)
+        if self.updateRecords(moved):
+            self.selectionSettled.emit()
+    
+    def forgetBlocks(self, records):
+        """Takes blocks whose actors were deleted in the Unreal editor out of the grid, without touching the actors
+        
+        Args:
+            records (list): The records of the blocks
+        """
+        self.removeRecords(records)
+        self.pushedSelection.difference_update(record.actor for record in records)
+        self.selectedItemsCache = [item for item in self.selectedItemsCache if item.record.id in self.itemsById]
+        self.selectionSettled.emit()
+    
+    def loadRecords(self, ids):
+        """Loads the packed chunks holding any of the given blocks, so the document can change blocks far from the view
+        
+        Args:
+            ids (iterable): The record ids of the blocks
+        """
+        self.loadChunksHolding(np.asarray(ids, dtype=np.int64).reshape(-1).tolist())
+    
+    def addRecords(self, records):
+        """Adds blocks the document made to the grid, giving those in or near the view an item
+        
+        Args:
+            records (list): The records of the blocks
+        """
+        for record in records:
+            self.addDormantRecord(record)
+        self.blockGeneration += 1
+        self.scheduleVirtualUpdate()
+    
+    def updateRecords(self, records):
+        """Moves the items or index entries of blocks whose rect the document changed
+        
+        Args:
+            records (list): The records of the blocks
+        
+        Returns:
+            Whether any of the blocks is selected
+        """
+        selected = False
+        for record in records:
+            item = self.itemsById.get(record.id)
+            if item is not None:
+                item.setRect(QRectF(record.x, record.y, record.width, record.height))
+                self.itemMoved(item)
+                selected = selected or item.isSelected()
+            else:
+                self.dormantIndex.insert(record.id, record.x, record.y, record.width, record.height)
+        self.scheduleVirtualUpdate()
+        return selected
+    
+    def removeRecords(self, records):
+        """Takes blocks out of the grid's items and index, without touching their actors
+        
+        Args:
+            records (list): The records of the blocks
+        """
+        for record in records:
+            item = self.itemsById.get(record.id)
+            if item is not None:
+                self.unindexItem(item)
+                self.virtualKeys.discard(record.id)
+                if item.scene():
+                    self.scene.removeItem(item)
+            elif record.id in self.dormantRecords:
+                del self.dormantRecords[record.id]
+                self.dormantIndex.remove(record.id)
+        self.blockGeneration += 1
+    
+    def scheduleSelectionSync(self):
+        """Restarts the debounce timer for pushing the selection to Unreal"""
+        self.selectionTimer.start(self.selectionDebounce)
+        
+    @timed('selectionSync')
     def changeUnrealSelection(self):
-        """Reflects the selection change of the GridGraphicsView and selects those Unreal Engine counterparts"""
-        unrealActors = []
+        """Reflects the selection change of the GridGraphicsView and selects those Unreal Engine counterparts
         
-        for item in self.scene.selectedItems():
-            unrealActors.append(item.unrealActor)
+        Only the difference from the last selection pushed is sent, as per-actor changes when that is smaller
+        than sending the whole selection again
+        """
+        self.selectionTimer.stop()
+        self.selectedItemsCache = self.scene.selectedItems()
+        selection = {item.unrealActor for item in self.selectedItemsCache if item.unrealActor}
+        
+        if selection != self.pushedSelection:
+            added = selection - self.pushedSelection
+            removed = self.pushedSelection - selection
+            if len(added) + len(removed) < len(selection):
+                for unrealActor in added:
+                    self.UEL.setActorSelected(unrealActor, True)
+                for unrealActor in removed:
+                    self.UEL.setActorSelected(unrealActor, False)
+            else:
+                self.UEL.selectActors(list(selection))
+            self.pushedSelection = selection
+            
+        self.selectionSettled.emit()
+        
+    def convertToActors(self, records=None):
+        """Gives blocks drawn as mesh instances actors of their own, for placing the blockout for good
+        
+        Args:
+            records (list): The records of the blocks to convert, every block in the grid if not given
+            
+        Returns:
+            The number of blocks converted
+        """
+        records = [record for record in (self.records() if records is None else records) if isinstance(record.actor, BlockInstance)]
+        if not records:
+            return 0
+        actors = self.UEL.convertToActors([record.actor for record in records])
+        for record, unrealActor in zip(records, actors):
+            record.actor = unrealActor
+        self.blockGeneration += 1
+        
+        # the selection pushed to Unreal was of the instances' host actors, so it is pushed again in full
+        selection = {item.unrealActor for item in self.selectedItemsCache if item.unrealActor}
+        self.UEL.selectActors(list(selection))
+        self.pushedSelection = selection
+        return len(records)
+        
+    def selectedBlocks(self):
+        """Gets the selected items as of the last selection sync, without asking the scene again
+        
+        Returns:
+            A list of items
+        """
+        return self.selectedItemsCache
+        
+    @timed('sceneInsert')
+    def createItemFromRecord(self, record):
+        """Adds an item that views an existing record, without spawning or copying an actor
+        
+        Args:
+            record (BlockRecord): The record of the block
             
-        self.UEL.selectActors(unrealActors)
+        Returns:
+            The new item
+        """
+        itemClass = SphereItem if record.shape == 'circle' else SquareItem
+        item = itemClass(record.x, record.y, record.width, record.height, unrealLibrary=self.UEL, record=record)
+        self.scene.addItem(item)
+        self.indexItem(item)
+        return item
+    
+    def saveLayout(self, path):
+        """Saves every block in the grid to a layout file
+        
+        Args:
+            path (str): The file to write
+        """
+        self.document.save(path)
+        
+    def loadLayout(self, path):
+        """Loads a layout file into the grid
+        
+        The file is memory-mapped and rows are read lazily, those in view first and the rest through the spawn scheduler,
+        going into their chunks so that only the blocks near the view get items. Blocks are bound to level actors with
+        the same label, so only blocks missing from the level are spawned
+        
+        Args:
+            path (str): The file to read
+        """
+        layout = LayoutFile(path)
+        # actors that blocks in the grid already own are never bound again, even when a label matches
+        actorsByLabel = self.UEL.getLevelActorsByLabel(self.boundActors())
+        
+        # rows in view come first so the user sees the layout straight away
+        visible = self.mapToScene(self.viewport().rect()).boundingRect()
+        visibleRows = layout.rowsInRect(visible.left(), visible.top(), visible.right(), visible.bottom())
+        remaining = np.ones(len(layout), dtype=bool)
+        remaining[visibleRows] = False
+        
+        # keep labels of blocks added after this from clashing with the loaded ones
+        self.numItems += len(layout)
         
-    def clearSceneLines(self):
-        """Clears all the lines in the grid by deleting the QGraphicsLineItems"""
-        for item in self.scene.items():
-            if isinstance(item, QGraphicsLineItem):
+        self.loadRows(layout, visibleRows.tolist(), actorsByLabel)
+        self.updateVirtualItems()
+        
+        remaining = np.flatnonzero(remaining).tolist()
+        jobs = [(lambda rows=remaining[start:start + self.generateChunk]: self.loadRows(layout, rows, actorsByLabel), None)
+                for start in range(0, len(remaining), self.generateChunk)]
+        jobs.append((layout.close, layout.close))
+        self.spawnScheduler.submitMany(jobs)
+            
+    def loadRows(self, layout, rows, actorsByLabel):
+        """Adds the blocks of rows of a layout file to the grid, binding them to their actors or spawning them in one batch
+        
+        Args:
+            layout (LayoutFile): The layout file
+            rows (list): The rows in the layout file
+            actorsByLabel (dict): The level actors that haven't been bound yet, by label
+        """
+        self.addRecords(self.document.layoutRecords(layout, rows, actorsByLabel))
+        
+    @timed('importLevel')
+    def importLevel(self):
+        """Adds a block for every static mesh actor in the level that isn't in the grid yet, bound to the actor rather than a copy
+        
+        The actors are read in one pass and their bounds are projected into grid space all at once with NumPy.
+        Only the blocks in or near the view get an item straight away, the rest stay as records until panned into view
+        
+        Returns:
+            The number of actors imported
+        """
+        actors, labels, objectPaths, transforms = self.UEL.getStaticMeshActors(self.boundActors())
+        if not actors:
+            return 0
+        
+        # one grid unit is one Unreal unit, so a block is the actor's bounds seen from above
+        # blocks are kept at least as big as the smallest size an item can be resized to
+        transforms = np.asarray(transforms, dtype=np.float64)
+        sizes = np.maximum(transforms[:, 8:10] * 2, 5)
+        topLefts = transforms[:, 6:8] - sizes / 2
+        bottomRights = topLefts + sizes
+        self.extendGrid(*topLefts.min(axis=0).tolist(), *bottomRights.max(axis=0).tolist())
+        
+        spherePath = self.UEL.resolveAssetPath('circle')
+        cubePath = self.UEL.resolveAssetPath('square')
+        for unrealActor, label, objectPath, (left, top), (width, height), transform in zip(
+                actors, labels, objectPaths, topLefts.tolist(), sizes.tolist(), transforms.tolist()):
+            shape = 'circle' if objectPath == spherePath else 'square'
+            unrealPath = None if objectPath in (spherePath, cubePath) else objectPath
+            record = BlockRecord(shape, left, top, width, height, transform[5], unrealActor, objectPath, unrealPath, label,
+                                 transform[3], transform[4])
+            record.setLocation(*transform[0:3])
+            self.addDormantRecord(record)
+        self.blockGeneration += 1
+        
+        self.updateVirtualItems()
+        return len(actors)
+    
+    def addDormantRecord(self, record):
+        """Keeps a block as a record only, until it comes near the view, or packs it into its chunk if that isn't resident
+        
+        Blocks still waiting for their actor always stay records, their chunk being loaded if it was packed
+        
+        Args:
+            record (BlockRecord): The record of the block
+        """
+        key = self.world.keyOf(record)
+        if not self.world.isResident(key):
+            if record.actor is not None:
+                self.world.stage(record)
+                return
+            self.loadChunk(key)
+        self.dormantRecords[record.id] = record
+        self.dormantIndex.insert(record.id, record.x, record.y, record.width, record.height)
+        
+    def loadChunk(self, key):
+        """Unpacks the blocks of a chunk into dormant records and makes the chunk resident
+        
+        Args:
+            key (tuple): The chunk key
+        """
+        for record in self.world.load(key):
+            self.dormantRecords[record.id] = record
+            self.dormantIndex.insert(record.id, record.x, record.y, record.width, record.height)
+        self.blockGeneration += 1
+    
+    def evictChunk(self, key):
+        """Packs the dormant blocks of a chunk away, leaving any that still have an item or are waiting for an actor
+        
+        Args:
+            key (tuple): The chunk key
+        """
+        world = self.world
+        records = []
+        for recordId in self.dormantIndex.query(*world.chunkRect(key)):
+            record = self.dormantRecords[recordId]
+            if record.actor is not None and world.keyOf(record) == key:
+                records.append(record)
+        for record in records:
+            del self.dormantRecords[record.id]
+            self.dormantIndex.remove(record.id)
+        self.blockGeneration += 1
+        world.evict(key, records)
+    
+    def loadChunksHolding(self, keys):
+        """Loads the packed chunks holding any of the given blocks, so that undo and redo can reach blocks far from the view
+        
+        Args:
+            keys (list): The record ids of the blocks
+        """
+        if not self.world.hasPacked():
+            return
+        missing = [key for key in keys if key not in self.itemsById and key not in self.dormantRecords]
+        if missing:
+            for chunkKey in self.world.keysHolding(missing):
+                self.loadChunk(chunkKey)
+            self.scheduleVirtualUpdate()
+    
+    def prefetchChunk(self):
+        """Loads the next chunk waiting to be prefetched, one per tick so that panning never waits on a whole ring"""
+        while self.prefetchKeys:
+            key = self.prefetchKeys.popleft()
+            if not self.world.isResident(key) and self.world.hasBlocks(key):
+                self.loadChunk(key)
+                self.world.stats['prefetched'] += 1
+                break
+        if self.prefetchKeys:
+            self.prefetchTimer.start(0)
+    
+    def scheduleVirtualUpdate(self):
+        """Queues an update of which imported blocks have items, once the view has stopped changing for this tick"""
+        if self.dormantRecords or self.virtualKeys or self.world.resident or self.world.hasPacked():
+            self.virtualTimer.start(0)
+        
+    @timed('virtualize')
+    def updateVirtualItems(self):
+        """Gives items to the dormant blocks near the view, and turns items that are far out of view back into records
+        
+        Items are kept until they are twice the margin away from the view, so panning back and forth doesn't keep
+        recreating them. Selected items and the item being dragged are always kept. The chunks near the view are
+        loaded first, those around them are queued for prefetching, and the least recently used beyond the
+        resident limit are packed away
+        """
+        world = self.world
+        if not self.dormantRecords and not self.virtualKeys and not world.resident and not world.hasPacked():
+            return
+        visible = self.mapToScene(self.viewport().rect()).boundingRect()
+        marginX = visible.width() * self.virtualMargin
+        marginY = visible.height() * self.virtualMargin
+        near = visible.adjusted(-marginX, -marginY, marginX, marginY)
+        far = visible.adjusted(-marginX * 2, -marginY * 2, marginX * 2, marginY * 2)
+        
+        wanted = world.keysInRect(near.left(), near.top(), near.right(), near.bottom())
+        for key in wanted:
+            if world.isResident(key):
+                world.touch(key)
+            else:
+                self.loadChunk(key)
+        
+        grabbed = self.scene.mouseGrabberItem()
+        for key in list(self.virtualKeys):
+            item = self.itemsById.get(key)
+            if item is None:
+                # the item was deleted
+                self.virtualKeys.discard(key)
+            elif item is not grabbed and not item.isSelected() and not far.intersects(item.rect()):
+                self.unindexItem(item)
                 self.scene.removeItem(item)
+                self.virtualKeys.discard(key)
+                self.addDormantRecord(item.record)
+        
+        for key in self.dormantIndex.query(near.x(), near.y(), near.width(), near.height()):
+            record = self.dormantRecords.pop(key)
+            self.dormantIndex.remove(key)
+            self.createItemFromRecord(record)
+            self.virtualKeys.add(key)
+            
+        keep = set(world.keysInRect(near.left(), near.top(), near.right(), near.bottom(), self.prefetchRing))
+        self.prefetchKeys = deque(key for key in keep if not world.isResident(key) and world.hasBlocks(key))
+        if self.prefetchKeys:
+            self.prefetchTimer.start(0)
+        # blocks waiting for their actor are held by the scheduler's jobs, so nothing is packed until the jobs are done
+        if not self.spawnScheduler.isBusy():
+            for key in world.evictionCandidates(keep):
+                self.evictChunk(key)
+        world.seal()
+    
+    def scrollContentsBy(self, dx, dy):
+        """Scrolls the view and updates which imported blocks have items"""
+        super().scrollContentsBy(dx, dy)
+        self.scheduleVirtualUpdate()
+        
+    def resizeEvent(self, event):
+        """Resizes the view and updates which imported blocks have items"""
+        super().resizeEvent(event)
+        self.scheduleVirtualUpdate()
+        
+    def indexItem(self, item):
+        """Adds an item to the spatial index, or updates it if it is already there
+        
+        Args:
+            item (SquareItem): The item to index
+        """
+        self.itemsById[item.record.id] = item
+        if self.batchedBlocks:
+            item.setFlag(QGraphicsItem.ItemHasNoContents, True)
+        self.itemMoved(item)
+        
+    def unindexItem(self, item):
+        """Removes an item from the spatial index and clears the overlap highlight of its neighbours
+        
+        Args:
+            item (SquareItem): The item to remove
+        """
+        key = item.record.id
+        neighbours = []
+        if key in self.spatialIndex:
+            left, top, right, bottom = self.spatialIndex.rects[key]
+            neighbours = self.spatialIndex.query(left, top, right - left, bottom - top, exclude=key)
+        self.spatialIndex.remove(key)
+        self.itemsById.pop(key, None)
+        self.invalidateBlockBatches()
+        if self.highlightOverlaps:
+            self.markOverlapsDirty(neighbours)
+            
+    @timed('sceneIndex')
+    def itemMoved(self, item):
+        """Updates the spatial index with an item's current rect and refreshes overlap highlights around it
+        
+        Args:
+            item (SquareItem): The item that moved or was resized
+        """
+        key = item.record.id
+        index = self.spatialIndex
+        affected = {key}
+        
+        # blocks that overlapped the old rect may no longer overlap anything
+        if key in index:
+            left, top, right, bottom = index.rects[key]
+            affected.update(index.query(left, top, right - left, bottom - top, exclude=key))
+        
+        rect = item.rect()
+        index.update(key, rect.x(), rect.y(), rect.width(), rect.height())
+        self.invalidateBlockBatches()
+        if self.highlightOverlaps:
+            affected.update(index.query(rect.x(), rect.y(), rect.width(), rect.height(), exclude=key))
+            self.markOverlapsDirty(affected)
+            
+    def markOverlapsDirty(self, keys):
+        """Queues blocks to have their overlap highlight refreshed on the next event-loop tick
+        
+        Refreshing once per tick keeps bulk adds and deletes of stacked blocks from re-checking the same neighbours over and over
+        
+        Args:
+            keys (iterable): The record ids of the blocks to refresh
+        """
+        if not self.overlapsDirty:
+            QTimer.singleShot(0, self.refreshDirtyOverlaps)
+        self.overlapsDirty.update(keys)
+        
+    def refreshDirtyOverlaps(self):
+        """Refreshes the overlap highlight of every block queued by markOverlapsDirty"""
+        keys = self.overlapsDirty
+        self.overlapsDirty = set()
+        self.refreshOverlaps(keys)
+            
+    def refreshOverlaps(self, keys):
+        """Highlights each of the given blocks if it overlaps any other block
+        
+        Args:
+            keys (iterable): The record ids of the blocks to refresh
+        """
+        index = self.spatialIndex
+        for key in keys:
+            item = self.itemsById.get(key)
+            if item is None or key not in index:
+                continue
+            left, top, right, bottom = index.rects[key]
+            item.setOverlapping(self.highlightOverlaps and bool(index.query(left, top, right - left, bottom - top, exclude=key)))
+        self.invalidateBlockBatches()
+            
+    def setHighlightOverlaps(self, highlight):
+        """Turns overlap highlighting on or off, refreshing every block
+        
+        Args:
+            highlight (bool): Whether overlapping blocks should be highlighted
+        """
+        self.highlightOverlaps = highlight
+        self.refreshOverlaps(list(self.itemsById))
+        
+    def snapRect(self, rect, key=None, edge=None):
+        """Snaps the moving edges of a rect to the grid and to the edges of nearby blocks, in place
+        
+        Args:
+            rect (QRectF): The rect being dragged or resized
+            key: The record id of the block being snapped, or the set of ids of a dragged selection, so they don't snap to themselves
+            edge (str): The resize handle being dragged, or None if the whole rect is moving
+        """
+        if not (self.snapToGrid or self.snapToEdges):
+            return
+        
+        distance = self.snapDistance / self.transform().m11()
+        xEdges = yEdges = []
+        if self.snapToEdges:
+            xEdges, yEdges = self.spatialIndex.nearbyEdges(rect.x(), rect.y(), rect.width(), rect.height(), distance, key)
+        
+        # work out which edges of the rect are moving, a translation moves all of them
+        if edge is None:
+            movingX = [rect.left(), rect.right()]
+            movingY = [rect.top(), rect.bottom()]
+        else:
+            movingX = [rect.left()] if 'left' in edge else [rect.right()] if 'right' in edge else []
+            movingY = [rect.top()] if 'top' in edge else [rect.bottom()] if 'bottom' in edge else []
+            
+        xOffset = self.snapOffset(movingX, xEdges, distance)
+        yOffset = self.snapOffset(movingY, yEdges, distance)
+        if edge is None:
+            rect.translate(xOffset, yOffset)
+            return
+        if 'left' in edge:
+            rect.setLeft(rect.left() + xOffset)
+        elif 'right' in edge:
+            rect.setRight(rect.right() + xOffset)
+        if 'top' in edge:
+            rect.setTop(rect.top() + yOffset)
+        elif 'bottom' in edge:
+            rect.setBottom(rect.bottom() + yOffset)
+            
+    def snapOffset(self, positions, edges, distance):
+        """Gets the smallest offset that puts one of the positions on a grid line or one of the edges
+        
+        Args:
+            positions (list): The positions of the moving edges along one axis
+            edges (list): The positions of nearby block edges along the same axis
+            distance (float): The furthest an edge can be snapped, in scene units
+            
+        Returns:
+            The offset to apply, or 0 if nothing is close enough
+        """
+        best = None
+        for position in positions:
+            targets = list(edges)
+            if self.snapToGrid and self.step:
+                targets.append(round(position / self.step) * self.step)
+            for target in targets:
+                offset = target - position
+                if abs(offset) <= distance and (best is None or abs(offset) < abs(best)):
+                    best = offset
+        return best or 0
+    
+    def selectKeys(self, keys, clear=True):
+        """Selects the blocks with the given record ids, emitting selectionChanged once rather than once per block
+        
+        Args:
+            keys (iterable): The record ids of the blocks to select
+            clear (bool): Whether to clear the current selection first
+        """
+        self.scene.blockSignals(True)
+        if clear:
+            self.scene.clearSelection()
+        for key in keys:
+            item = self.itemsById.get(key)
+            if item is not None:
+                item.setSelected(True)
+        self.scene.blockSignals(False)
+        self.scene.selectionChanged.emit()
+        
+    def selectItemsInRect(self, rect, touching=False):
+        """Selects every block that overlaps a region
+        
+        Args:
+            rect (QRectF): The region in scene coordinates
+            touching (bool): Whether blocks that only share an edge with the region count
+        """
+        self.selectKeys(self.spatialIndex.query(rect.x(), rect.y(), rect.width(), rect.height(), touching=touching))
+        
+    def selectTouching(self):
+        """Adds every block that touches or overlaps a selected block to the selection"""
+        keys = set()
+        for item in self.scene.selectedItems():
+            if item.record.id in self.spatialIndex:
+                keys.update(self.spatialIndex.touching(item.record.id))
+        self.selectKeys(keys, clear=False)
+    
+    def liveSyncItems(self, items):
+        """Pushes the in-progress transforms of items being dragged to their actors, if live sync is on and it is time to
+        
+        Args:
+            items (list): The items being dragged
+        """
+        if not self.liveSync:
+            return
+        
+        # a drag of many items waits longer between pushes so that it stays under the call cap
+        now = time.perf_counter()
+        calls = len(items) * 2
+        interval = max(1 / self.liveSyncRate, calls / self.liveSyncMaxCalls)
+        if now - self.lastLiveSync < interval:
+            return
+        self.lastLiveSync = now
+        
+        issued = self.UEL.commandStats['issued']
+        for item in items:
+            item.pushLiveTransform()
+        self.UEL.flush()
+        self.liveSyncCalls.append((now, self.UEL.commandStats['issued'] - issued))
+        
+    def liveSyncCallsPerSecond(self):
+        """Gets the number of bridge calls live sync made over the last second
+        
+        Returns:
+            The number of calls
+        """
+        cutoff = time.perf_counter() - 1
+        while self.liveSyncCalls and self.liveSyncCalls[0][0] < cutoff:
+            self.liveSyncCalls.popleft()
+        return sum(calls for _, calls in self.liveSyncCalls)
     
+    def paintEvent(self, event):
+        """Paints the view, timing it and marking the end of a frame for the profiler"""
+        with self.profiler.section('paint'):
+            super().paintEvent(event)
+        self.profiler.endFrame()
+        
+    def drawForeground(self, painter, rect):
+        """Draws the perf overlay on top of the scene when it is turned on"""
+        super().drawForeground(painter, rect)
+        if self.showPerfOverlay:
+            self.drawPerfOverlay(painter)
+            
+    def setPerfOverlay(self, show):
+        """Shows or hides the perf overlay, turning profiling on while it is shown
+        
+        Args:
+            show (bool): Whether to show the overlay
+        """
+        self.showPerfOverlay = show
+        self.profiler.enabled = show
+        if show:
+            self.profiler.reset()
+            self.perfOverlayTimer.start(250)
+        else:
+            self.perfOverlayTimer.stop()
+        self.viewport().update()
+        
+    def drawPerfOverlay(self, painter):
+        """Draws the profiler's stats in the top left corner of the viewport
+        
+        Args:
+            painter (QPainter): The painter for the view
+        """
+        profiler = self.profiler
+        lines = [
+            "bridge calls/frame: {:.1f} (last {})".format(profiler.averageCallsPerFrame(),
+                                                        profiler.callsPerFrame[-1] if profiler.callsPerFrame else 0),
+            "bridge p50/p99: {:.3f} / {:.3f} ms".format(profiler.percentile(None, 0.5) * 1000, profiler.percentile(None, 0.99) * 1000),
+            "paint p50/p99: {:.2f} / {:.2f} ms".format(profiler.percentile('qt:paint', 0.5) * 1000, profiler.percentile('qt:paint', 0.99) * 1000),
+            "writes queued/coalesced/issued: {requested} / {coalesced} / {issued}".format(**self.UEL.commandStats),
+            "slowest calls:",
+        ]
+        for seconds, name in profiler.slowestCalls()[:5]:
+            lines.append("  {} {:.2f} ms".format(name, seconds * 1000))
+        
+        painter.save()
+        painter.resetTransform()
+        lineHeight = painter.fontMetrics().height()
+        width = max(300, max(painter.fontMetrics().horizontalAdvance(line) for line in lines) + 12)
+        painter.fillRect(QRectF(4, 4, width, lineHeight * len(lines) + 8), QColor(0, 0, 0, 170))
+        painter.setPen(QColor(230, 230, 230))
+        for index, line in enumerate(lines):
+            painter.drawText(QPointF(10, 8 + lineHeight * (index + 1) - painter.fontMetrics().descent()), line)
+        painter.restore()
+        
+    def dumpProfile(self, folder=None):
+        """Writes the profiler's results to quickblock_profile.json and quickblock_profile.csv
+        
+        Args:
+            folder (str): The folder to write to, the temp folder if not given
+        """
+        folder = folder or tempfile.gettempdir()
+        jsonPath = os.path.join(folder, "quickblock_profile.json")
+        csvPath = os.path.join(folder, "quickblock_profile.csv")
+        self.profiler.dumpJson(jsonPath)
+        self.profiler.dumpCsv(csvPath)
+        log.info("wrote profile to %s and %s", jsonPath, csvPath)
+    
+    @timed('zoom')
     def updateViewScale(self, newZoom):
         """Updates the scale of the GridGraphicsView based on the new zoom
         
         Args:
             newZoom (float): The new zoom for the grid
         """
-        # before implementing the new zoom, we must first revert the old zoom
-        # this is especially needed for scale(), as there is no base scale stored
-        # so applying a new zoom scale without reverting would scale onto the zoomed scale, which quickly breaks everything
-        self.gridWidth = self.gridWidth * self.zoom
-        self.gridHeight = self.gridHeight * self.zoom
-        self.scale(1/self.zoom, 1/self.zoom)
-        
-        # now update to the new zoom
+        # zooming only sets the view's transform, absolute rather than relative so no rounding builds up over many steps,
+        # as the scene already covers anything that zooming out can bring into view
+        levels = self.gridLevels()
         self.zoom = newZoom
-        self.scale(newZoom, newZoom)
-        self.clearSceneLines()
-        self.createGrid(self.step, self.gridWidth, self.gridHeight)
+        self.setTransform(QTransform.fromScale(newZoom, newZoom))
+        
+        if self.gridLevels() != levels:
+            # the grid lines are spaced by zoom, so only the background needs drawing again when their spacing changes
+            visible = self.mapToScene(self.viewport().rect()).boundingRect()
+            self.invalidateScene(visible, QGraphicsScene.SceneLayer.BackgroundLayer)
+        self.scheduleVirtualUpdate()
+        
+        # blocks only a few pixels across are drawn in batches and without antialiasing
+        self.setBatchedBlocks(newZoom < self.lodZoom)
+        self.setRenderHint(QPainter.RenderHint.Antialiasing, newZoom >= self.antialiasZoom)
         
          
\ No newline at end of file
@@ -0,0 +1,316 @@
+import unreal
+
+from instrumentation import log
+
+# blocks of the same static mesh can be drawn as instances of one instanced static mesh component rather than as
+# an actor each, so a dense blockout adds one actor per mesh to the level instead of thousands
+#
+# instances that are given up are shrunk to nothing and their index reused, rather than removed straight away,
+# since removing an instance moves every instance after it down an index
+
+class BlockInstance():
+    """Stands in for the actor of a block that is drawn as one instance of an InstanceHost's component
+    
+    Items and records hold it as their actor, and UnrealLibrary tells it apart from real actors, turning the writes
+    queued for it into instance transform updates. It mirrors the transform last written, since an instance's
+    location and scale can only be written together
+    """
+    __slots__ = ('host', 'index', 'label', 'location', 'scale', 'hidden')
+    
+    def __init__(self, host, index, location, scale, label=None):
+        """Init's BlockInstance
+        
+        Args:
+            host (InstanceHost): The host whose component draws the instance
+            index (int): The index of the instance in the component
+            location (unreal.Vector): The location of the instance
+            scale (unreal.Vector): The scale of the instance
+            label (str): The label of the block, which is only kept here as instances have none in Unreal
+        """
+        self.host = host
+        self.index = index
+        self.label = label
+        self.location = location
+        self.scale = scale
+        self.hidden = False
+
+class InstanceHost():
+    """An actor with an instanced static mesh component, which draws every instanced block of one mesh
+    
+    A new instance's index is known before the component has it, as instances are added in order, so adding
+    it can wait for the next flush along with every other write
+    """
+    def __init__(self, objectPath, actor, component):
+        """Init's InstanceHost
+        
+        Args:
+            objectPath (str): The resolved object path of the mesh
+            actor (Actor): The actor holding the component
+            component (InstancedStaticMeshComponent): The component drawing the instances
+        """
+        self.objectPath = objectPath
+        self.actor = actor
+        self.component = component
+        
+        # the BlockInstance at each index, or None where the instance was given up, and the indices free for reuse
+        self.instances = []
+        self.freeIndices = []
+        # how many instances the component has been given, and the indices whose transform changed since the last flush
+        self.committed = 0
+        self.dirty = set()
+        # the instances selected in the grid, the host actor being selected in Unreal while there are any
+        self.selected = set()
+
+class InstancedMeshes():
+    """The instance hosts of an UnrealLibrary, one per static mesh, and the batched writes to their components"""
+    def __init__(self, library):
+        """Init's InstancedMeshes
+        
+        Args:
+            library (UnrealLibrary): The library that calls into Unreal are made through
+        """
+        self.library = library
+        self.hosts = {}
+        # changed indices are sent as one update of their whole span when they make up at least this share of it
+        self.batchDensity = 0.5
+        self.hiddenScale = unreal.Vector(0, 0, 0)
+        self.noRotation = unreal.Rotator(0, 0, 0)
+        self.stats = {'hosts': 0, 'added': 0, 'updated': 0, 'reused': 0, 'removed': 0}
+    
+    def host(self, objectPath, mesh):
+        """Gets the host for a mesh, creating it if there isn't one or it was deleted in the level
+        
+        Args:
+            objectPath (str): The resolved object path of the mesh
+            mesh (StaticMesh): The loaded mesh
+        
+        Returns:
+            The InstanceHost, or None if the component could not be created
+        """
+        host = self.hosts.get(objectPath)
+        if host is not None and self.library.SL.is_valid(host.actor):
+            return host
+        host = self.createHost(objectPath, mesh)
+        if host is None:
+            self.hosts.pop(objectPath, None)
+            return None
+        self.hosts[objectPath] = host
+        self.stats['hosts'] += 1
+        return host
+    
+    def createHost(self, objectPath, mesh):
+        """Spawns an empty actor and adds an instanced static mesh component of the mesh to it
+        
+        Args:
+            objectPath (str): The resolved object path of the mesh
+            mesh (StaticMesh): The loaded mesh
+        
+        Returns:
+            The InstanceHost, or None if the component could not be created
+        """
+        library = self.library
+        actor = library.spawnEmptyActor("QuickBlockInstances_{}".format(objectPath.rsplit('.', 1)[-1]))
+        if not actor:
+            return None
+        
+        component, failure = library.addComponent(actor, unreal.InstancedStaticMeshComponent)
+        if not component:
+            log.warning("Could not add an instanced static mesh component for %s: %s", objectPath, failure)
+            library.destroyActor(actor)
+            return None
+        
+        library.actorCall(component, 'set_static_mesh', mesh)
+        return InstanceHost(objectPath, actor, component)
+    
+    def hostActors(self):
+        """Gets the actor of every host"""
+        return {host.actor for host in self.hosts.values()}
+    
+    def add(self, host, location, scale, label=None):
+        """Adds an instance to a host, reusing a given up index if there is one
+        
+        The instance is only added to the component on the next flush
+        
+        Args:
+            host (InstanceHost): The host to add the instance to
+            location (unreal.Vector): The location of the instance
+            scale (unreal.Vector): The scale of the instance
+            label (str): The label of the block
+        
+        Returns:
+            The BlockInstance
+        """
+        if host.freeIndices:
+            index = host.freeIndices.pop()
+            self.stats['reused'] += 1
+        else:
+            index = len(host.instances)
+            host.instances.append(None)
+        instance = host.instances[index] = BlockInstance(host, index, location, scale, label)
+        host.dirty.add(index)
+        return instance
+    
+    def release(self, instance):
+        """Gives up an instance, hiding it until its index is reused
+        
+        Args:
+            instance (BlockInstance): The instance to give up
+        """
+        host = instance.host
+        if not self.isLive(instance):
+            return
+        host.instances[instance.index] = None
+        host.freeIndices.append(instance.index)
+        host.dirty.add(instance.index)
+        host.selected.discard(instance)
+    
+    def isLive(self, instance):
+        """Whether an instance is still held by its host, rather than given up"""
+        host = instance.host
+        return instance.index < len(host.instances) and host.instances[instance.index] is instance
+    
+    def apply(self, instance, pending):
+        """Applies the pending writes of an instance to its mirror, marking it for the next flush
+        
+        Args:
+            instance (BlockInstance): The instance
+            pending (dict): The pending writes, as queued by UnrealLibrary.queueCommand()
+        """
+        if not self.isLive(instance):
+            return
+        if 'label' in pending:
+            instance.label = pending['label']
+        if 'location' in pending:
+            instance.location = pending['location']
+        if 'scale' in pending:
+            instance.scale = pending['scale']
+        if 'hidden' in pending:
+            instance.hidden = pending['hidden']
+        instance.host.dirty.add(instance.index)
+    
+    def transform(self, host, index):
+        """Gets the transform to write for an index, hidden and given up instances being shrunk to nothing"""
+        instance = host.instances[index]
+        if instance is None:
+            return unreal.Transform(unreal.Vector(0, 0, 0), self.noRotation, self.hiddenScale)
+        return unreal.Transform(instance.location, self.noRotation, self.hiddenScale if instance.hidden else instance.scale)
+    
+    def flush(self):
+        """Adds the new instances and writes the changed transforms of every host, in as few calls per host as the changes allow
+        
+        New instances are added in one call per host, and changed ones are updated in one call covering their span
+        when they are dense enough in it, or else one call each with the render state marked dirty once at the end
+        
+        Returns:
+            The number of calls made
+        """
+        library = self.library
+        calls = 0
+        for host in self.hosts.values():
+            if not host.dirty:
+                continue
+            dirty = sorted(host.dirty)
+            host.dirty = set()
+            
+            if host.committed < len(host.instances):
+                transforms = [self.transform(host, index) for index in range(host.committed, len(host.instances))]
+                library.actorCall(host.component, 'add_instances', transforms, False, True)
+                self.stats['added'] += len(transforms)
+                calls += 1
+                dirty = [index for index in dirty if index < host.committed]
+                host.committed = len(host.instances)
+            if not dirty:
+                continue
+            
+            first, last = dirty[0], dirty[-1]
+            if len(dirty) > 1 and len(dirty) >= (last - first + 1) * self.batchDensity:
+                transforms = [self.transform(host, index) for index in range(first, last + 1)]
+                library.actorCall(host.component, 'batch_update_instances_transforms', first, transforms, True, False, True)
+                calls += 1
+            else:
+                for index in dirty:
+                    library.actorCall(host.component, 'update_instance_transform', index, self.transform(host, index), True, False, True)
+                calls += len(dirty)
+            library.actorCall(host.component, 'mark_render_state_dirty')
+            self.stats['updated'] += len(dirty)
+            calls += 1
+        return calls
+    
+    def hasInstances(self):
+        """Whether any host has instances that haven't been given up"""
+        return any(len(host.instances) > len(host.freeIndices) for host in self.hosts.values())
+    
+    def dropDeletedHosts(self):
+        """Forgets the hosts with changes whose actor was deleted in the level, their instances being replaced by the next spawn
+        
+        This reads from Unreal, so it is done before a flush starts batching its writes
+        """
+        for objectPath, host in list(self.hosts.items()):
+            if host.dirty and not self.library.SL.is_valid(host.component):
+                del self.hosts[objectPath]
+    
+    def hasChanges(self):
+        """Whether any host has instances to add or transforms to write"""
+        return any(host.dirty for host in self.hosts.values())
+    
+    def readTransform(self, instance):
+        """Reads the transform of an instance from its component, for picking up changes made in Unreal"""
+        return self.library.actorCall(instance.host.component, 'get_instance_transform', instance.index, True)
+    
+    def setSelected(self, instance, selected):
+        """Adds an instance to or removes it from the selection of its host
+        
+        Returns:
+            Whether the host actor should now be selected
+        """
+        if selected:
+            instance.host.selected.add(instance)
+        else:
+            instance.host.selected.discard(instance)
+        return bool(instance.host.selected)
+    
+    def selectionActors(self, unrealActors):
+        """Replaces the selection of every host, turning a selection of actors and instances into one of actors
+        
+        Args:
+            unrealActors (list): The actors and instances to select
+        
+        Returns:
+            A list of the actors, with a host actor standing in for its selected instances
+        """
+        for host in self.hosts.values():
+            host.selected = set()
+        actors = []
+        for unrealActor in unrealActors:
+            if isinstance(unrealActor, BlockInstance):
+                host = unrealActor.host
+                if not host.selected:
+                    actors.append(host.actor)
+                host.selected.add(unrealActor)
+            else:
+                actors.append(unrealActor)
+        return actors
+    
+    def compact(self, objectPath=None):
+        """Removes the given up instances from the components, moving the instances left down to fill their indices
+        
+        Writes must have been flushed first, so that every host's component has all of its instances
+        
+        Args:
+            objectPath (str): The resolved object path of the mesh to compact, or None to compact every host
+        """
+        if objectPath:
+            hosts = [self.hosts[objectPath]] if objectPath in self.hosts else []
+        else:
+            hosts = list(self.hosts.values())
+        for host in hosts:
+            if not host.freeIndices or not self.library.SL.is_valid(host.component):
+                continue
+            self.library.actorCall(host.component, 'remove_instances', sorted(host.freeIndices))
+            self.stats['removed'] += len(host.freeIndices)
+            host.instances = [instance for instance in host.instances if instance is not None]
+            for index, instance in enumerate(host.instances):
+                instance.index = index
+            host.freeIndices = []
+            host.committed = len(host.instances)
+            host.dirty = set()
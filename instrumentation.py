@@ -0,0 +1,233 @@
+import csv
+import functools
+import heapq
+import json
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# the tool's logger, which replaces print statements
+# it is quiet unless a level is set, and arguments are only formatted when a message is actually emitted
+log = logging.getLogger('quickblock')
+
+class BridgeProfiler():
+    """Counts and times every call into Unreal and every Qt section of interest, by name
+    
+    Bridge calls are the Python to Unreal calls made through UnrealLibrary, Qt sections are painting, scene
+    updates and event handlers. Nothing is recorded while the profiler is disabled, and the wrappers then
+    cost a single attribute check
+    """
+    
+    _sharedInstance = None
+    
+    def __init__(self, history=2048, slowestCount=10):
+        """Init's BridgeProfiler
+        
+        Args:
+            history (int): How many recent timings to keep per name, for percentiles
+            slowestCount (int): How many of the slowest individual calls to keep
+        """
+        self.enabled = False
+        self.history = history
+        self.slowestCount = slowestCount
+        self.reset()
+        
+    @classmethod
+    def shared(cls):
+        """Returns the BridgeProfiler shared by the whole tool, creating it on first use
+        
+        Returns:
+            The shared BridgeProfiler
+        """
+        if cls._sharedInstance is None:
+            cls._sharedInstance = cls()
+        return cls._sharedInstance
+        
+    def reset(self):
+        """Clears every count and timing"""
+        self.counts = {}
+        self.totals = {}
+        self.timings = {}
+        self.slowest = []
+        self.frameBridgeCalls = 0
+        self.callsPerFrame = deque(maxlen=120)
+        
+    def record(self, name, seconds, bridge=True):
+        """Records one timed call or section
+        
+        Args:
+            name (str): The name of the call, e.g. 'set_actor_location', or of the section, e.g. 'qt:paint'
+            seconds (float): How long it took
+            bridge (bool): Whether it was a call into Unreal
+        """
+        self.counts[name] = self.counts.get(name, 0) + 1
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+        timings = self.timings.get(name)
+        if timings is None:
+            timings = self.timings[name] = deque(maxlen=self.history)
+        timings.append(seconds)
+        
+        if bridge:
+            self.frameBridgeCalls += 1
+            if len(self.slowest) < self.slowestCount:
+                heapq.heappush(self.slowest, (seconds, name))
+            elif seconds > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, (seconds, name))
+            
+    def call(self, name, function, *args):
+        """Calls a function, timing it as a bridge call if the profiler is enabled
+        
+        Args:
+            name (str): The name to record the call under
+            function (callable): The function to call
+            
+        Returns:
+            Whatever the function returns
+        """
+        if not self.enabled:
+            return function(*args)
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self.record(name, time.perf_counter() - start)
+            
+    @contextmanager
+    def section(self, name):
+        """Times a block of Qt-side work
+        
+        Args:
+            name (str): The name of the section, recorded with a 'qt:' prefix
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record('qt:' + name, time.perf_counter() - start, bridge=False)
+            
+    def endFrame(self):
+        """Marks the end of a frame, storing the number of bridge calls made during it"""
+        if self.enabled:
+            self.callsPerFrame.append(self.frameBridgeCalls)
+            self.frameBridgeCalls = 0
+            
+    def percentile(self, name, fraction):
+        """Gets a percentile of the recent timings for a name, or for every bridge call if name is None
+        
+        Args:
+            name (str): The name of the call or section, or None for all bridge calls
+            fraction (float): The percentile as a fraction, e.g. 0.99
+            
+        Returns:
+            The timing in seconds, or 0 if nothing has been recorded
+        """
+        if name is None:
+            timings = [seconds for key, values in self.timings.items() if not key.startswith('qt:') for seconds in values]
+        else:
+            timings = list(self.timings.get(name, ()))
+        if not timings:
+            return 0.0
+        timings.sort()
+        return timings[min(len(timings) - 1, int(len(timings) * fraction))]
+    
+    def slowestCalls(self):
+        """Gets the slowest individual bridge calls seen, slowest first
+        
+        Returns:
+            A list of (seconds, name) tuples
+        """
+        return sorted(self.slowest, reverse=True)
+    
+    def averageCallsPerFrame(self):
+        """Gets the average number of bridge calls per frame over recent frames"""
+        if not self.callsPerFrame:
+            return 0.0
+        return sum(self.callsPerFrame) / len(self.callsPerFrame)
+    
+    def summary(self):
+        """Gets a row of stats per name, sorted by total time
+        
+        Returns:
+            A list of dicts with name, count, total, mean, p50 and p99, times in milliseconds
+        """
+        rows = []
+        for name, count in self.counts.items():
+            rows.append({
+                'name': name,
+                'count': count,
+                'totalMs': self.totals[name] * 1000,
+                'meanMs': self.totals[name] / count * 1000,
+                'p50Ms': self.percentile(name, 0.5) * 1000,
+                'p99Ms': self.percentile(name, 0.99) * 1000,
+            })
+        rows.sort(key=lambda row: row['totalMs'], reverse=True)
+        return rows
+    
+    def dumpJson(self, path):
+        """Writes the summary, the slowest calls and calls per frame to a JSON file
+        
+        Args:
+            path (str): The file to write
+        """
+        data = {
+            'summary': self.summary(),
+            'slowest': [{'name': name, 'ms': seconds * 1000} for seconds, name in self.slowestCalls()],
+            'callsPerFrame': list(self.callsPerFrame),
+        }
+        with open(path, 'w') as jsonFile:
+            json.dump(data, jsonFile, indent=2)
+            
+    def dumpCsv(self, path):
+        """Writes the summary to a CSV file, one row per call or section name
+        
+        Args:
+            path (str): The file to write
+        """
+        with open(path, 'w', newline='') as csvFile:
+            writer = csv.DictWriter(csvFile, fieldnames=['name', 'count', 'totalMs', 'meanMs', 'p50Ms', 'p99Ms'])
+            writer.writeheader()
+            writer.writerows(self.summary())
+
+class InstrumentedNamespace():
+    """Wraps one of Unreal's libraries, such as EditorLevelLibrary, so that every function called through it is timed"""
+    def __init__(self, namespace, profiler):
+        """Init's InstrumentedNamespace
+        
+        Args:
+            namespace: The Unreal library being wrapped
+            profiler (BridgeProfiler): The profiler to record calls with
+        """
+        self._namespace = namespace
+        self._profiler = profiler
+        self._wrappers = {}
+        
+    def __getattr__(self, name):
+        wrapper = self._wrappers.get(name)
+        if wrapper is None:
+            function = getattr(self._namespace, name)
+            if not callable(function):
+                return function
+            profiler = self._profiler
+            wrapper = self._wrappers[name] = lambda *args: profiler.call(name, function, *args)
+        return wrapper
+
+def timed(name):
+    """Decorates a Qt-side function or event handler so that it is timed as a section by the shared profiler
+    
+    Args:
+        name (str): The name of the section
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            profiler = BridgeProfiler.shared()
+            if not profiler.enabled:
+                return function(*args, **kwargs)
+            with profiler.section(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,215 @@
+import struct
+
+import numpy as np
+
+from blockrecord import BlockRecord
+
+# the file starts with a small header, followed by one packed column per field and then the string table
+# every column starts on an 8 byte boundary so that it can be memory-mapped directly as a NumPy array
+MAGIC = b'QBLK'
+VERSION = 2
+HEADER = struct.Struct('<4sHHII')
+NO_STRING = 0xFFFFFFFF
+
+SHAPES = ('square', 'circle')
+
+# (name, dtype, values per block)
+# rects, locations and scales are float64, so a block saved and loaded again is exactly the block that was saved
+COLUMNS = (
+    ('rect', np.float64, 4),
+    ('location', np.float64, 3),
+    ('scale', np.float64, 3),
+    ('label', np.uint32, 1),
+    ('assetPath', np.uint32, 1),
+    ('unrealPath', np.uint32, 1),
+    ('shape', np.uint8, 1),
+)
+
+# version 1 files only held the rect and z-scale, as float32, so the rest of the mirror is worked out from the rect
+COLUMNS_V1 = (
+    ('rect', np.float32, 4),
+    ('zScale', np.float32, 1),
+    ('label', np.uint32, 1),
+    ('assetPath', np.uint32, 1),
+    ('unrealPath', np.uint32, 1),
+    ('shape', np.uint8, 1),
+)
+
+# blocks are 100 grid units wide at a scale of 1
+UNITS_PER_SCALE = 100.0
+
+def align(offset):
+    """Rounds an offset up to the next 8 byte boundary"""
+    return (offset + 7) & ~7
+
+def columnOffsets(count, columns=COLUMNS):
+    """Gets the byte offset of each column, and of the string table that follows them
+    
+    Args:
+        count (int): The number of blocks in the file
+        columns (tuple): The columns of the file's version
+        
+    Returns:
+        A tuple of ({column name: offset}, string table offset)
+    """
+    offsets = {}
+    offset = align(HEADER.size)
+    for name, dtype, width in columns:
+        offsets[name] = offset
+        offset = align(offset + count * width * np.dtype(dtype).itemsize)
+    return offsets, offset
+
+class StringTable():
+    """Interns strings so that each distinct label or asset path is only written once"""
+    def __init__(self):
+        self.indices = {}
+        self.strings = []
+        
+    def intern(self, string):
+        """Gets the index of a string in the table, adding it if needed
+        
+        Args:
+            string (str): The string, or None
+            
+        Returns:
+            The index of the string, or NO_STRING for None
+        """
+        if string is None:
+            return NO_STRING
+        index = self.indices.get(string)
+        if index is None:
+            index = self.indices[string] = len(self.strings)
+            self.strings.append(string)
+        return index
+    
+    def pack(self):
+        """Packs the table as a count, an array of end offsets and the utf-8 bytes of every string
+        
+        Returns:
+            The packed bytes
+        """
+        encoded = [string.encode('utf-8') for string in self.strings]
+        ends = np.cumsum([len(data) for data in encoded], dtype=np.uint32) if encoded else np.zeros(0, np.uint32)
+        return struct.pack('<I', len(encoded)) + ends.tobytes() + b''.join(encoded)
+
+def saveLayout(path, records):
+    """Writes block records to a layout file
+    
+    Args:
+        path (str): The file to write
+        records (list): The BlockRecords to save
+    """
+    count = len(records)
+    strings = StringTable()
+    columns = {
+        'rect': np.array([(record.x, record.y, record.width, record.height) for record in records], np.float64).reshape(count, 4),
+        'location': np.array([(record.locationX, record.locationY, record.locationZ) for record in records], np.float64).reshape(count, 3),
+        'scale': np.array([record.scale() for record in records], np.float64).reshape(count, 3),
+        'label': np.array([strings.intern(record.label) for record in records], np.uint32),
+        'assetPath': np.array([strings.intern(record.assetPath) for record in records], np.uint32),
+        'unrealPath': np.array([strings.intern(record.unrealPath) for record in records], np.uint32),
+        'shape': np.array([SHAPES.index(record.shape) for record in records], np.uint8),
+    }
+    offsets, stringOffset = columnOffsets(count)
+    
+    with open(path, 'wb') as layoutFile:
+        layoutFile.write(HEADER.pack(MAGIC, VERSION, 0, count, stringOffset))
+        for name, dtype, width in COLUMNS:
+            layoutFile.write(b'\0' * (offsets[name] - layoutFile.tell()))
+            layoutFile.write(columns[name].tobytes())
+        layoutFile.write(b'\0' * (stringOffset - layoutFile.tell()))
+        layoutFile.write(strings.pack())
+
+class LayoutFile():
+    """A memory-mapped layout file, whose columns are read as NumPy arrays without copying them"""
+    def __init__(self, path):
+        """Init's LayoutFile and maps the columns of the file
+        
+        Args:
+            path (str): The file to read
+            
+        Raises:
+            ValueError: If the file is not a layout file or is from a newer version
+        """
+        self.path = path
+        self.data = np.memmap(path, dtype=np.uint8, mode='r')
+        magic, version, _, count, stringOffset = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError("{} is not a QuickBlock layout file".format(path))
+        if version > VERSION:
+            raise ValueError("{} was saved by a newer version (layout version {})".format(path, version))
+        
+        self.count = count
+        self.version = version
+        self.columns = COLUMNS if version >= 2 else COLUMNS_V1
+        offsets, _ = columnOffsets(count, self.columns)
+        for name, dtype, width in self.columns:
+            column = np.frombuffer(self.data, dtype, count * width, offsets[name])
+            setattr(self, name, column.reshape(count, width) if width > 1 else column)
+        
+        stringCount, = struct.unpack_from('<I', self.data, stringOffset)
+        self.stringEnds = np.frombuffer(self.data, np.uint32, stringCount, stringOffset + 4)
+        self.stringBase = stringOffset + 4 + stringCount * 4
+        self.stringCache = {}
+        
+    def __len__(self):
+        return self.count
+    
+    def string(self, index):
+        """Gets a string from the string table, decoding it only the first time it is asked for
+        
+        Args:
+            index (int): The index in the string table
+            
+        Returns:
+            The string, or None for NO_STRING
+        """
+        if index == NO_STRING:
+            return None
+        string = self.stringCache.get(index)
+        if string is None:
+            start = int(self.stringEnds[index - 1]) if index else 0
+            end = int(self.stringEnds[index])
+            string = self.stringCache[index] = bytes(self.data[self.stringBase + start:self.stringBase + end]).decode('utf-8')
+        return string
+    
+    def record(self, row):
+        """Builds the BlockRecord for a row of the file, without an actor
+        
+        Args:
+            row (int): The row of the block
+            
+        Returns:
+            A new BlockRecord
+        """
+        x, y, width, height = self.rect[row].tolist()
+        if self.version >= 2:
+            scaleX, scaleY, zScale = self.scale[row].tolist()
+        else:
+            # blocks are UNITS_PER_SCALE units to a scale of 1, which is what the mirror assumes until the next resync
+            scaleX, scaleY, zScale = width / UNITS_PER_SCALE, height / UNITS_PER_SCALE, float(self.zScale[row])
+        record = BlockRecord(SHAPES[self.shape[row]], x, y, width, height, zScale,
+                             assetPath=self.string(self.assetPath[row]),
+                             unrealPath=self.string(self.unrealPath[row]),
+                             label=self.string(self.label[row]),
+                             scaleX=scaleX, scaleY=scaleY)
+        if self.version >= 2:
+            record.setLocation(*self.location[row].tolist())
+        return record
+    
+    def rowsInRect(self, left, top, right, bottom):
+        """Gets the rows whose rects overlap a region, using the mapped rect column directly
+        
+        Returns:
+            A NumPy array of row numbers
+        """
+        rect = self.rect
+        mask = (rect[:, 0] < right) & (rect[:, 0] + rect[:, 2] > left) & (rect[:, 1] < bottom) & (rect[:, 1] + rect[:, 3] > top)
+        return np.flatnonzero(mask)
+    
+    def close(self):
+        """Drops every view of the memory map so that the file is released"""
+        for name, dtype, width in self.columns:
+            setattr(self, name, None)
+        self.stringEnds = None
+        self.data = None
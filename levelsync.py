@@ -0,0 +1,191 @@
+import time
+
+import numpy as np
+import unreal
+
+from PySide6.QtCore import QObject, QTimer
+
+from instancedmeshes import BlockInstance
+from instrumentation import log, timed
+
+# blocks can also be moved, scaled and deleted in the Unreal viewport, which the grid would otherwise never see
+# until its own stale rect and scale were written back over the change. Python gets no callback when an actor
+# moves, so changes are found by reading transforms back and comparing them with the records' mirrors, and since
+# only actors selected in the editor can be edited there, those are checked every tick while the rest of the
+# blocks are swept a chunk at a time in the background
+
+class LevelSync(QObject):
+    """Reflects changes made to blocks' actors in the Unreal editor back into the grid, within a time budget per tick
+    
+    Every tick reads the editor's selection, selecting the matching blocks in the grid and checking their
+    transforms, then sweeps on through the other blocks until the budget is spent. A sweep starts by reading
+    which actors are still in the level, so blocks whose actor was deleted are taken out of the grid
+    """
+    def __init__(self, view, budget=0.004, interval=100, parent=None):
+        """Init's LevelSync
+        
+        Args:
+            view (GridGraphicsView): The grid to keep in step with the level
+            budget (float): The time in seconds that checking transforms can take per tick
+            interval (int): The milliseconds between ticks
+            parent (QObject): The Qt parent
+        """
+        super().__init__(parent)
+        self.view = view
+        self.UEL = view.UEL
+        self.budget = budget
+        self.interval = interval
+        # transforms are read chunkSize actors at a time, and a difference of more than tolerance counts as a change
+        self.chunkSize = 64
+        self.tolerance = 1e-3
+        # a new sweep starts at most every sweepInterval seconds, unless the editor says actors were deleted
+        self.sweepInterval = 2.0
+        self.lastSweep = 0.0
+        self.sweepDue = True
+        
+        # the blocks of the current sweep and how far through them it is, and the record of each actor in the grid
+        self.sweepRecords = []
+        self.cursor = 0
+        self.recordsByActor = {}
+        self.mappedGeneration = None
+        self.editorSelection = set()
+        self.stats = {'sweeps': 0, 'checked': 0, 'changed': 0, 'deleted': 0, 'selections': 0}
+        
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.tick)
+        self.watchLevelChanges()
+    
+    def start(self):
+        """Starts checking the level every interval milliseconds"""
+        self.timer.start(self.interval)
+    
+    def stop(self):
+        """Stops checking the level"""
+        self.timer.stop()
+    
+    def isActive(self):
+        """Whether the level is being checked"""
+        return self.timer.isActive()
+    
+    def watchLevelChanges(self):
+        """Hooks into the editor's actor subsystem so that a sweep starts as soon as actors are deleted in the editor"""
+        try:
+            actorSubsystem = unreal.get_editor_subsystem(unreal.EditorActorSubsystem)
+            actorSubsystem.on_delete_actors_end.add_callable(self.onActorsDeleted)
+        except AttributeError:
+            # older engine versions don't broadcast deletes to Python, so they are only found by the sweeps
+            pass
+    
+    def onActorsDeleted(self):
+        """Starts a new sweep on the next tick, which takes the blocks of the deleted actors out of the grid"""
+        self.sweepDue = True
+    
+    @timed('levelSync')
+    def tick(self):
+        """Picks up the editor's selection, then checks transforms until the time budget for this tick is spent"""
+        view = self.view
+        # the grid's own changes are still being made while a block is dragged or a batch is spawning
+        if view.scene.mouseGrabberItem() is not None or view.spawnScheduler.isBusy():
+            return
+        deadline = time.perf_counter() + self.budget
+        self.UEL.flush()
+        
+        if self.sweepDue or (self.cursor >= len(self.sweepRecords) and time.perf_counter() - self.lastSweep >= self.sweepInterval):
+            self.startSweep()
+        else:
+            self.refreshActorMap()
+        
+        selected = [self.recordsByActor[unrealActor] for unrealActor in self.syncSelection() if unrealActor in self.recordsByActor]
+        self.checkRecords(selected)
+        
+        while self.cursor < len(self.sweepRecords) and time.perf_counter() < deadline:
+            chunk = self.sweepRecords[self.cursor:self.cursor + self.chunkSize]
+            self.cursor += self.chunkSize
+            if not self.checkRecords(chunk):
+                break
+    
+    def syncedRecords(self):
+        """Gets the records of the resident blocks whose actors can be edited in the level, which are those that aren't instances
+        
+        Blocks in chunks that are packed away aren't synced until their chunk is loaded again
+        """
+        return [record for record in self.view.residentRecords() if record.actor is not None and not isinstance(record.actor, BlockInstance)]
+    
+    def refreshActorMap(self, records=None):
+        """Rebuilds the record of each actor when blocks have been added, taken out or bound to other actors since it was last built
+        
+        Args:
+            records (list): The synced records, read from the view if not given
+        """
+        generation = self.view.blockGeneration
+        if records is None:
+            if generation == self.mappedGeneration:
+                return
+            records = self.syncedRecords()
+        self.recordsByActor = {record.actor: record for record in records}
+        self.mappedGeneration = generation
+    
+    def startSweep(self):
+        """Starts a new sweep through every block, first taking out the blocks whose actors are no longer in the level"""
+        self.sweepDue = False
+        self.lastSweep = time.perf_counter()
+        self.stats['sweeps'] += 1
+        records = self.syncedRecords()
+        levelActors = set(self.UEL.ELL.get_all_level_actors())
+        deleted = [record for record in records if record.actor not in levelActors]
+        if deleted:
+            self.stats['deleted'] += len(deleted)
+            self.view.forgetBlocks(deleted)
+            records = [record for record in records if record.actor in levelActors]
+        self.refreshActorMap(records)
+        self.sweepRecords = records
+        self.cursor = 0
+    
+    def syncSelection(self):
+        """Selects the blocks of the actors selected in the editor, when the editor's selection has changed
+        
+        The grid's selection is marked as already pushed, so it isn't sent straight back to Unreal
+        
+        Returns:
+            The actors selected in the editor
+        """
+        view = self.view
+        selection = set(self.UEL.ELL.get_selected_level_actors())
+        if selection == self.editorSelection:
+            return selection
+        self.editorSelection = selection
+        
+        records = [self.recordsByActor[unrealActor] for unrealActor in selection if unrealActor in self.recordsByActor]
+        records = [record for record in records if record.id in view.itemsById]
+        actors = {record.actor for record in records}
+        if actors != view.pushedSelection:
+            self.stats['selections'] += 1
+            view.pushedSelection = actors
+            view.selectKeys([record.id for record in records])
+        return selection
+    
+    def checkRecords(self, records):
+        """Reads the transforms of blocks' actors and updates the blocks whose transform changed in the level
+        
+        Args:
+            records (list): The records of the blocks
+        
+        Returns:
+            Whether the transforms could be read, which fails when an actor was deleted since the sweep started
+        """
+        if not records:
+            return True
+        try:
+            current = np.array(self.UEL.getActorTransforms([record.actor for record in records]), dtype=np.float64)
+        except Exception as error:
+            log.debug("level sync read failed, starting a new sweep: %s", error)
+            self.sweepDue = True
+            return False
+        mirrored = np.array([(record.locationX, record.locationY, record.locationZ, record.scaleX, record.scaleY, record.zScale)
+                             for record in records], dtype=np.float64)
+        changed = np.flatnonzero((np.abs(current - mirrored) > self.tolerance).any(axis=1))
+        self.stats['checked'] += len(records)
+        if len(changed):
+            self.stats['changed'] += len(changed)
+            self.view.applyLevelTransforms([records[index] for index in changed.tolist()], current[changed])
+        return True
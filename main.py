@@ -1,12 +1,25 @@
-import unreal
+import os
 import sys
+
+# in standalone mode the tool runs in its own process, started with `python main.py --remote [host:port]` or with
+# QUICKBLOCK_REMOTE set, and reaches the editor through the bridge server, so `unreal` is swapped out before anything imports it
+remoteAddress = os.environ.get('QUICKBLOCK_REMOTE')
+if '--remote' in sys.argv:
+    index = sys.argv.index('--remote')
+    remoteAddress = sys.argv[index + 1] if index + 1 < len(sys.argv) and not sys.argv[index + 1].startswith('-') else 'default'
+if remoteAddress:
+    import remotebridge
+    remotebridge.install(None if remoteAddress == 'default' else remoteAddress)
+
+import unreal
 import unreal_stylesheet
 
-from PySide6.QtWidgets import QApplication, QWidget, QPushButton, QVBoxLayout, QHBoxLayout, QFileDialog
+from PySide6.QtWidgets import QApplication, QWidget, QPushButton, QVBoxLayout, QHBoxLayout, QFileDialog, QProgressBar, QLabel, QCheckBox
 from PySide6.QtCore import Qt
 
 from actorinfowidget import InfoWidget
 from graphicview import GridGraphicsView
+from instrumentation import log
 from unreallibrary import UnrealLibrary
 from assetpickerwidget import AssetPicker
         
@@ -15,16 +28,36 @@ class GridWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.view = GridGraphicsView()
-        self.UEL = UnrealLibrary()
+        self.UEL = UnrealLibrary.shared()
         
         self.assetPath = None
         
         self.addCubeButton = QPushButton("Add Cube")
         self.addSphereButton = QPushButton("Add Sphere")
+        self.saveLayoutButton = QPushButton("Save Layout")
+        self.loadLayoutButton = QPushButton("Load Layout")
+        self.resyncButton = QPushButton("Resync")
+        self.importLevelButton = QPushButton("Import Level")
+        # new blocks of static meshes become instances of one component per mesh rather than actors while this is checked
+        self.instancedCheckBox = QCheckBox("Instance Meshes")
+        # blocks follow moves, scales, deletes and selections made in the Unreal editor while this is checked, which is
+        # opt-in as it reads the editor's selection every tick and sweeps every block's transform in the background
+        self.levelSyncCheckBox = QCheckBox("Sync From Level")
         self.assetPickerWidget = AssetPicker(self.view)
         self.infoWidget = InfoWidget(self.view)
         self.infoWidget.gridView = self.view
-        self.view.scene.selectionChanged.connect(self.infoWidget.updateInfo)
+        self.view.selectionSettled.connect(self.infoWidget.updateInfo)
+        
+        # progress of bulk spawns, with a way to cancel them and a report once they finish
+        self.spawnProgressBar = QProgressBar()
+        self.spawnProgressBar.setVisible(False)
+        self.cancelSpawnButton = QPushButton("Cancel")
+        self.cancelSpawnButton.setVisible(False)
+        self.spawnReportLabel = QLabel()
+        self.view.spawnScheduler.progressChanged.connect(self.spawnProgressUpdate)
+        self.view.spawnScheduler.batchFinished.connect(self.spawnBatchFinished)
+        self.view.blocksMerged.connect(self.blocksMerged)
+        self.cancelSpawnButton.pressed.connect(self.view.spawnScheduler.cancel)
         
         self.mainLayout = QHBoxLayout(self)
         
@@ -35,7 +68,18 @@ class GridWidget(QWidget):
         self.vertLayout.addWidget(self.view)
         self.buttonLayout.addWidget(self.addCubeButton)
         self.buttonLayout.addWidget(self.addSphereButton)
+        self.buttonLayout.addWidget(self.saveLayoutButton)
+        self.buttonLayout.addWidget(self.loadLayoutButton)
+        self.buttonLayout.addWidget(self.resyncButton)
+        self.buttonLayout.addWidget(self.importLevelButton)
+        self.buttonLayout.addWidget(self.instancedCheckBox)
+        self.buttonLayout.addWidget(self.levelSyncCheckBox)
         self.vertLayout.addLayout(self.buttonLayout)
+        self.progressLayout = QHBoxLayout()
+        self.progressLayout.addWidget(self.spawnProgressBar)
+        self.progressLayout.addWidget(self.cancelSpawnButton)
+        self.progressLayout.addWidget(self.spawnReportLabel)
+        self.vertLayout.addLayout(self.progressLayout)
         self.rightLayout.addWidget(self.infoWidget)
         self.rightLayout.addWidget(self.assetPickerWidget)
         
@@ -47,12 +91,27 @@ class GridWidget(QWidget):
         
         self.addCubeButton.pressed.connect(lambda x = 'square': self.addItem(x))
         self.addSphereButton.pressed.connect(lambda x = 'circle':self.addItem(x))
+        self.saveLayoutButton.pressed.connect(self.saveLayout)
+        self.loadLayoutButton.pressed.connect(self.loadLayout)
+        self.resyncButton.pressed.connect(self.view.resync)
+        self.importLevelButton.pressed.connect(self.view.importLevel)
+        self.instancedCheckBox.toggled.connect(self.setInstanced)
+        self.levelSyncCheckBox.toggled.connect(self.setLevelSync)
         
         
         self.resize(1540, 660)
         
+    def closeEvent(self, event):
+        """Destroys the actors parked in the pool, and those held for undoing deletes, so that no hidden actors are left behind in the level"""
+        self.view.levelSync.stop()
+        self.view.journal.clear(schedule=False)
+        self.UEL.drainPool()
+        self.UEL.flush()
+        self.UEL.transport.close()
+        super().closeEvent(event)
+        
     def resizeEvent(self, event):
-        print(self.size())
+        log.debug("widget resized to %s", self.size())
         super().resizeEvent(event)
         
     def addItem(self, itemShape='square'):
@@ -63,6 +122,71 @@ class GridWidget(QWidget):
         """
         self.view.addItem(itemShape, 25, 25)
 
+    def setInstanced(self, instanced):
+        """Sets whether new blocks are drawn as mesh instances rather than spawned as actors
+        
+        Args:
+            instanced (bool): Whether to instance new blocks
+        """
+        self.UEL.instanced = instanced
+
+    def setLevelSync(self, sync):
+        """Starts or stops picking up changes made to blocks in the Unreal editor
+        
+        Args:
+            sync (bool): Whether to keep the grid in step with the level
+        """
+        if sync:
+            self.view.levelSync.start()
+        else:
+            self.view.levelSync.stop()
+    
+    def spawnProgressUpdate(self, done, total):
+        """Shows the progress of the current spawn batch
+        
+        Args:
+            done (int): The number of jobs done
+            total (int): The number of jobs in the batch
+        """
+        self.spawnProgressBar.setVisible(True)
+        self.cancelSpawnButton.setVisible(True)
+        self.spawnProgressBar.setMaximum(total)
+        self.spawnProgressBar.setValue(done)
+        
+    def spawnBatchFinished(self, report):
+        """Hides the progress bar and shows the throughput and worst frame of the batch
+        
+        Args:
+            report (dict): The report from the spawn scheduler
+        """
+        self.spawnProgressBar.setVisible(False)
+        self.cancelSpawnButton.setVisible(False)
+        self.spawnReportLabel.setText("{}{} jobs in {:.2f}s ({:.0f}/s), worst frame {:.1f} ms".format(
+            "Cancelled: " if report['cancelled'] else "", report['jobs'], report['seconds'],
+            report['jobsPerSecond'], report['worstFrameMs']))
+        
+    def blocksMerged(self, before, after):
+        """Shows how many actors a merge saved
+        
+        Args:
+            before (int): The number of blocks that could be merged
+            after (int): The number of blocks they were merged into
+        """
+        self.spawnReportLabel.setText("Merged {} blocks into {} ({:.0f}% fewer actors)".format(
+            before, after, 100 * (before - after) / before if before else 0))
+        
+    def saveLayout(self):
+        """Asks for a file and saves the blocks in the grid to it"""
+        path, _ = QFileDialog.getSaveFileName(self, "Save Layout", "", "QuickBlock Layout (*.qbl)")
+        if path:
+            self.view.saveLayout(path)
+            
+    def loadLayout(self):
+        """Asks for a layout file and loads its blocks into the grid"""
+        path, _ = QFileDialog.getOpenFileName(self, "Load Layout", "", "QuickBlock Layout (*.qbl)")
+        if path:
+            self.view.loadLayout(path)
+
 # TODO: Normally we would use if __name__ == '__main__':
 # but this blocks the widget from running in Unreal, for now we'll leave it out
 app = None
@@ -77,5 +201,9 @@ gridWidget = GridWidget()
 gridWidget.setWindowTitle("QuickBlock")
 gridWidget.show()
 
-# parent widget to unreal
-unreal.parent_external_window_to_slate(gridWidget.winId())
\ No newline at end of file
+if remoteAddress:
+    # a standalone process runs its own event loop rather than sharing the editor's
+    sys.exit(app.exec())
+else:
+    # parent widget to unreal
+    unreal.parent_external_window_to_slate(gridWidget.winId())
\ No newline at end of file
@@ -0,0 +1,89 @@
+import numpy as np
+
+from generators import asRects
+
+# blocks are merged in two sweeps: blocks on the same row that touch are joined into runs, and then runs with the
+# same span that touch are stacked. For the walls and floors a blockout is made of this gives close to the fewest
+# rectangles, and both orders, rows first and columns first, are tried with the one giving fewer rectangles kept
+
+# how far apart two edges can be and still count as touching, in grid units
+TOLERANCE = 1e-6
+
+def joinRuns(rects, groups):
+    """Joins rects of the same group, top and height that touch or overlap along x into runs
+    
+    Args:
+        rects (np.ndarray): The (N, 4) rects
+        groups (np.ndarray): The (N,) group of each rect
+    
+    Returns:
+        A tuple of ((R, 4) runs, (R,) group of each run, (N,) index of the run each rect went into)
+    """
+    if not len(rects):
+        return np.zeros((0, 4)), np.zeros(0, np.int64), np.zeros(0, np.int64)
+    order = np.lexsort((rects[:, 0], rects[:, 3], rects[:, 1], groups))
+    rects = rects[order]
+    groups = groups[order]
+    lefts = rects[:, 0]
+    rights = rects[:, 0] + rects[:, 2]
+    
+    sameLine = ((groups[1:] == groups[:-1]) & (np.abs(rects[1:, 1] - rects[:-1, 1]) <= TOLERANCE)
+                & (np.abs(rects[1:, 3] - rects[:-1, 3]) <= TOLERANCE))
+    lines = np.cumsum(np.r_[False, ~sameLine])
+    
+    # the right edge of everything before each rect on its line, as a running maximum that starts again on every line,
+    # worked out on the ranks of the edges so that offsetting each line past the last one stays exact
+    edges, ranks = np.unique(rights, return_inverse=True)
+    offsets = lines.astype(np.int64) * len(edges)
+    reached = edges[np.maximum.accumulate(ranks.astype(np.int64) + offsets) - offsets]
+    
+    starts = np.r_[True, ~sameLine | (lefts[1:] > reached[:-1] + TOLERANCE)]
+    startIndices = np.flatnonzero(starts)
+    runs = rects[startIndices].copy()
+    runs[:, 2] = np.maximum.reduceat(rights, startIndices) - runs[:, 0]
+    
+    runOf = np.empty(len(rects), np.int64)
+    runOf[order] = np.cumsum(starts) - 1
+    return runs, groups[startIndices], runOf
+
+def transpose(rects):
+    """Swaps the x and y axes of rects"""
+    return rects[:, [1, 0, 3, 2]]
+
+def mergeSweep(rects, groups, columnsFirst=False):
+    """Merges rects by joining rows into runs and then stacking runs, or the other way around
+    
+    Args:
+        rects (np.ndarray): The (N, 4) rects
+        groups (np.ndarray): The (N,) group of each rect
+        columnsFirst (bool): Whether to join columns first and then stack them sideways
+    
+    Returns:
+        A tuple of ((M, 4) merged rects, (N,) index of the merged rect each rect went into)
+    """
+    if columnsFirst:
+        rects = transpose(rects)
+    runs, runGroups, runOf = joinRuns(rects, groups)
+    stacks, _, stackOf = joinRuns(transpose(runs), runGroups)
+    merged = transpose(stacks)
+    if columnsFirst:
+        merged = transpose(merged)
+    return merged, stackOf[runOf]
+
+def mergeRects(rects, groups=None):
+    """Merges rects into fewer rects that cover the same area, only merging rects of the same group
+    
+    Touching rects only merge when the rect covering them covers nothing else, so the area covered never changes
+    
+    Args:
+        rects (np.ndarray): The (N, 4) rects of x, y, width and height
+        groups (np.ndarray): The (N,) group of each rect, such as its asset, every rect being in one group if not given
+    
+    Returns:
+        A tuple of ((M, 4) merged rects, (N,) index of the merged rect each rect went into)
+    """
+    rects = asRects(rects)
+    groups = np.zeros(len(rects), np.int64) if groups is None else np.asarray(groups, np.int64)
+    byRows = mergeSweep(rects, groups)
+    byColumns = mergeSweep(rects, groups, columnsFirst=True)
+    return byRows if len(byRows[0]) <= len(byColumns[0]) else byColumns
@@ -0,0 +1,691 @@
+import itertools
+import os
+import select
+import socket
+import struct
+import sys
+import tempfile
+import time
+import types
+import weakref
+from contextlib import contextmanager, nullcontext
+
+from instrumentation import log
+
+# the tool normally runs inside the editor's Python and calls the `unreal` module directly, through InProcessTransport
+# in standalone mode it runs in its own process and a RemoteUnrealModule stands in for `unreal`, forwarding every call
+# over a socket to the BridgeServer in bridgeserver.py, which runs inside the editor
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 9876
+
+# every message is a frame of (body length, kind, sequence number) followed by the body
+FRAME = struct.Struct('<IBI')
+CALL, GET, BATCH, RELEASE, RESULT, ERROR, ACK, EVENT, AUTH = range(9)
+
+# the tags of the values in a body
+(NONE, TRUE, FALSE, INT, FLOAT, STRING, STRING_NEW, STRING_REF, BYTES, LIST, TUPLE, DICT,
+ VECTOR, ROTATOR, HANDLE, NAMESPACE, CALLBACK, TRANSFORM) = range(18)
+DOUBLE = struct.Struct('<d')
+TRIPLE = struct.Struct('<ddd')
+# a transform is its location, its rotation as a rotator and its scale
+NINE = struct.Struct('<9d')
+
+# strings up to this long are interned per message, so that repeated method and class names are only sent once
+INTERN_LENGTH = 64
+
+class Writer():
+    """Packs values into the bridge's compact binary format
+    
+    Plain Python values are packed here, anything else is handed to the extension, which each end of the bridge
+    uses for its own objects, such as actors on the editor's end and their proxies on the standalone end
+    """
+    def __init__(self, extension):
+        """Init's Writer
+        
+        Args:
+            extension (callable): Called with (writer, value) for values that aren't plain Python values
+        """
+        self.buffer = bytearray()
+        self.strings = {}
+        self.extension = extension
+    
+    def varint(self, value):
+        """Packs a non-negative int in as few bytes as it needs, seven bits to a byte"""
+        buffer = self.buffer
+        while value > 0x7f:
+            buffer.append((value & 0x7f) | 0x80)
+            value >>= 7
+        buffer.append(value)
+    
+    def string(self, value):
+        """Packs a string, or a reference to it if it was already packed in this message"""
+        index = self.strings.get(value)
+        if index is not None:
+            self.buffer.append(STRING_REF)
+            self.varint(index)
+            return
+        data = value.encode('utf-8')
+        if len(data) <= INTERN_LENGTH:
+            self.strings[value] = len(self.strings)
+            self.buffer.append(STRING_NEW)
+        else:
+            self.buffer.append(STRING)
+        self.varint(len(data))
+        self.buffer += data
+    
+    def value(self, value):
+        """Packs a value and everything in it"""
+        buffer = self.buffer
+        valueType = type(value)
+        if value is None:
+            buffer.append(NONE)
+        elif value is True:
+            buffer.append(TRUE)
+        elif value is False:
+            buffer.append(FALSE)
+        elif valueType is int:
+            buffer.append(INT)
+            # zigzag, so that small negative numbers stay small
+            self.varint(value << 1 if value >= 0 else ((-value) << 1) - 1)
+        elif valueType is float:
+            buffer.append(FLOAT)
+            buffer += DOUBLE.pack(value)
+        elif valueType is str:
+            self.string(value)
+        elif valueType is bytes:
+            buffer.append(BYTES)
+            self.varint(len(value))
+            buffer += value
+        elif valueType is list or valueType is tuple:
+            buffer.append(LIST if valueType is list else TUPLE)
+            self.varint(len(value))
+            for item in value:
+                self.value(item)
+        elif valueType is dict:
+            buffer.append(DICT)
+            self.varint(len(value))
+            for key, item in value.items():
+                self.value(key)
+                self.value(item)
+        elif isinstance(value, float):
+            self.value(float(value))
+        elif hasattr(value, '__index__'):
+            # ints that aren't Python ints, such as NumPy's
+            self.value(value.__index__())
+        else:
+            self.extension(self, value)
+
+class Reader():
+    """Unpacks values packed by a Writer"""
+    def __init__(self, data, extension):
+        """Init's Reader
+        
+        Args:
+            data (bytes): The body of a message
+            extension (callable): Called with (reader, tag) for tags that aren't plain Python values
+        """
+        self.data = data
+        self.offset = 0
+        self.strings = []
+        self.extension = extension
+    
+    def varint(self):
+        data = self.data
+        value = 0
+        shift = 0
+        while True:
+            byte = data[self.offset]
+            self.offset += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+    
+    def raw(self, size):
+        start = self.offset
+        self.offset += size
+        return self.data[start:self.offset]
+    
+    def unpack(self, packer):
+        values = packer.unpack_from(self.data, self.offset)
+        self.offset += packer.size
+        return values
+    
+    def value(self):
+        """Unpacks the next value"""
+        tag = self.data[self.offset]
+        self.offset += 1
+        if tag == NONE:
+            return None
+        if tag == TRUE:
+            return True
+        if tag == FALSE:
+            return False
+        if tag == INT:
+            value = self.varint()
+            return value >> 1 if not value & 1 else -((value + 1) >> 1)
+        if tag == FLOAT:
+            return self.unpack(DOUBLE)[0]
+        if tag == STRING_REF:
+            return self.strings[self.varint()]
+        if tag == STRING or tag == STRING_NEW:
+            value = self.raw(self.varint()).decode('utf-8')
+            if tag == STRING_NEW:
+                self.strings.append(value)
+            return value
+        if tag == BYTES:
+            return bytes(self.raw(self.varint()))
+        if tag == LIST or tag == TUPLE:
+            values = [self.value() for _ in range(self.varint())]
+            return values if tag == LIST else tuple(values)
+        if tag == DICT:
+            return {self.value(): self.value() for _ in range(self.varint())}
+        return self.extension(self, tag)
+
+def packFrame(kind, sequence, body):
+    """Puts the frame header in front of a message body"""
+    return FRAME.pack(len(body), kind, sequence) + body
+
+def packTransform(location, rotation, scale):
+    """Packs a transform's location, rotator and scale"""
+    return NINE.pack(location.x, location.y, location.z, rotation.roll, rotation.pitch, rotation.yaw, scale.x, scale.y, scale.z)
+
+def unpackTransform(values, vectorClass, rotatorClass):
+    """Unpacks a transform's nine values as a (location, rotator, scale) tuple of the given classes"""
+    return vectorClass(*values[0:3]), rotatorClass(*values[3:6]), vectorClass(*values[6:9])
+
+def splitFrames(received):
+    """Takes every complete frame off the front of a receive buffer
+    
+    Args:
+        received (bytearray): The bytes received so far, which the frames are removed from
+    
+    Returns:
+        A list of (kind, sequence, body) tuples
+    """
+    frames = []
+    offset = 0
+    while len(received) - offset >= FRAME.size:
+        length, kind, sequence = FRAME.unpack_from(received, offset)
+        end = offset + FRAME.size + length
+        if len(received) < end:
+            break
+        frames.append((kind, sequence, bytes(received[offset + FRAME.size:end])))
+        offset = end
+    del received[:offset]
+    return frames
+
+class Vector():
+    """A 3D vector, which is packed by value rather than as a handle"""
+    __slots__ = ('x', 'y', 'z')
+    
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+    
+    def __repr__(self):
+        return "Vector({}, {}, {})".format(self.x, self.y, self.z)
+
+class Rotator():
+    """A rotation in degrees, which is packed by value rather than as a handle"""
+    __slots__ = ('roll', 'pitch', 'yaw')
+    
+    def __init__(self, roll=0.0, pitch=0.0, yaw=0.0):
+        self.roll = roll
+        self.pitch = pitch
+        self.yaw = yaw
+    
+    def __repr__(self):
+        return "Rotator({}, {}, {})".format(self.roll, self.pitch, self.yaw)
+
+class Transform():
+    """A location, rotation and scale, which is packed by value rather than as a handle"""
+    __slots__ = ('translation', 'rotation', 'scale3d')
+    
+    def __init__(self, location=None, rotation=None, scale=None):
+        self.translation = location or Vector()
+        self.rotation = rotation or Rotator()
+        self.scale3d = scale or Vector(1.0, 1.0, 1.0)
+    
+    def rotator(self):
+        return self.rotation
+    
+    def __repr__(self):
+        return "Transform({!r}, {!r}, {!r})".format(self.translation, self.rotation, self.scale3d)
+
+class RemoteError(RuntimeError):
+    """An error raised by a call in the editor that has no matching built-in exception"""
+
+# errors that the tool catches by type are raised as the same type on this end, so that fallbacks keep working
+BUILTIN_ERRORS = {error.__name__: error for error in (AttributeError, TypeError, ValueError, KeyError, IndexError, LookupError,
+                                                     PermissionError)}
+
+# anything the server runs, it runs inside the editor, so a client has to send the token the server was started with
+# before any of its calls are served. The server writes its token to a file only the user can read, where a client
+# on the same machine picks it up, and QUICKBLOCK_TOKEN passes it to a client that can't read the file
+
+def tokenPath(port):
+    """Gets the file the token of the bridge server on a port is written to"""
+    return os.path.join(tempfile.gettempdir(), 'quickblock-bridge-{}.token'.format(port))
+
+def writeToken(port, token):
+    """Writes the token of a bridge server to a new file that only the user can read
+    
+    Args:
+        port (int): The port the server listens on
+        token (str): The token
+    """
+    path = tokenPath(port)
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(descriptor, 'w') as tokenFile:
+        tokenFile.write(token)
+
+def readToken(port):
+    """Gets the token of the bridge server on a port, from QUICKBLOCK_TOKEN or the file the server wrote it to
+    
+    Returns:
+        The token, or an empty string if there is none to be found
+    """
+    token = os.environ.get('QUICKBLOCK_TOKEN')
+    if token:
+        return token
+    try:
+        with open(tokenPath(port)) as tokenFile:
+            return tokenFile.read().strip()
+    except OSError:
+        return ''
+
+class RemoteClass():
+    """What the standalone end knows about a class in the editor: its name, the names of its bases and its methods"""
+    __slots__ = ('name', 'bases', 'methods')
+    
+    def __init__(self, name, bases, methods):
+        self.name = name
+        self.bases = frozenset(bases)
+        self.methods = frozenset(methods)
+
+class RemoteObject():
+    """A proxy for an object in the editor, such as an actor or an asset, held by a handle
+    
+    Proxies are unique per handle while they are alive, so they work as dict keys and in sets the same way the
+    objects themselves do. Methods are called through the transport, and other attributes are read through it
+    """
+    __slots__ = ('_transport', '_handle', '_class', '__weakref__')
+    
+    def __init__(self, transport, handle, remoteClass):
+        self._transport = transport
+        self._handle = handle
+        self._class = remoteClass
+    
+    def __getattr__(self, name):
+        # private names are never forwarded, which also keeps a half-built proxy from recursing here
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if name in self._class.methods:
+            return RemoteMethod(self._transport, self, name)
+        return self._transport.get(self, name)
+    
+    def __repr__(self):
+        return "<remote {} #{}>".format(self._class.name, self._handle)
+    
+    def __del__(self):
+        try:
+            self._transport.release(self._handle)
+        except Exception:
+            # the transport may already be gone if the interpreter is shutting down
+            pass
+
+class RemoteNamespace():
+    """A proxy for something the `unreal` module holds by name, such as EditorLevelLibrary or get_editor_subsystem
+    
+    Calling the namespace calls it in the editor, so classes are constructed and functions are called.
+    Everything read from a namespace is taken to be a method, and isinstance() checks against the editor class
+    """
+    __slots__ = ('_transport', '_name', '_methods')
+    
+    def __init__(self, transport, name):
+        self._transport = transport
+        self._name = name
+        self._methods = {}
+    
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        method = self._methods.get(name)
+        if method is None:
+            method = self._methods[name] = RemoteMethod(self._transport, self, name)
+        return method
+    
+    def __call__(self, *args):
+        return self._transport.call(self, None, args)
+    
+    def __instancecheck__(self, instance):
+        return isinstance(instance, RemoteObject) and self._name in instance._class.bases
+    
+    def __repr__(self):
+        return "<remote unreal.{}>".format(self._name)
+
+class RemoteMethod():
+    """A method of a remote object or namespace, called through the transport"""
+    __slots__ = ('transport', 'target', 'name')
+    
+    def __init__(self, transport, target, name):
+        self.transport = transport
+        self.target = target
+        self.name = name
+    
+    def __call__(self, *args):
+        return self.transport.call(self.target, self.name, args)
+
+class InProcessTransport():
+    """Calls straight into the editor's Python, which is what the tool does when it runs inside the editor
+    
+    This is the default transport, it has nothing to batch, poll or close
+    """
+    name = 'inProcess'
+    pollInterval = 0
+    
+    def batch(self):
+        return nullcontext()
+    
+    def poll(self):
+        pass
+    
+    def close(self):
+        pass
+
+class RemoteTransport():
+    """Talks to a BridgeServer in the editor over a socket, for when the tool runs as a standalone process
+    
+    Calls whose results are needed are sent one at a time and waited on. Calls made inside batch(), which is
+    what UnrealLibrary.flush() does with its writes, are packed into one message instead and sent without waiting,
+    with up to maxInFlight batches in the pipeline at once. Each batch is acknowledged by the editor once it has
+    run, and acknowledgements are read whenever a result is waited on or poll() is called
+    """
+    name = 'remote'
+    pollInterval = 20
+    
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=10.0, maxInFlight=16, token=None):
+        """Init's RemoteTransport, connects to the editor and authenticates with the server's token
+        
+        Args:
+            host (str): The host the BridgeServer listens on
+            port (int): The port the BridgeServer listens on
+            timeout (float): How long to wait on the editor before giving up, in seconds
+            maxInFlight (int): How many batches can wait for their acknowledgement before sending another waits too
+            token (str): The server's token, found by readToken() if not given
+        """
+        self.socket = socket.create_connection((host, port), timeout)
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.maxInFlight = maxInFlight
+        self.received = bytearray()
+        self.sequence = itertools.count(1)
+        
+        # {handle: proxy} while the proxy is alive, and how many times each handle has been received
+        # when a proxy goes away its handle is released with that count, so the editor only forgets it once
+        # every copy it sent has been accounted for
+        self.proxies = weakref.WeakValueDictionary()
+        self.receivedCounts = {}
+        self.released = []
+        self.classes = []
+        self.namespaces = {}
+        
+        # {callback id: function} for functions handed to the editor, such as delegate callables, whose calls come back as events
+        self.callbacks = {}
+        self.callbackIds = {}
+        self.events = []
+        
+        self.batchDepth = 0
+        self.batched = []
+        # {sequence: (calls, time sent)} of the batches waiting for their acknowledgement, and the results waited on
+        self.inFlight = {}
+        self.results = {}
+        self.stats = {'calls': 0, 'batches': 0, 'batchedCalls': 0, 'failures': 0, 'bytesSent': 0, 'bytesReceived': 0,
+                      'ackLatency': 0.0}
+        
+        # the server answers nothing else until it has the token, and drops the connection if it is wrong
+        self.request(AUTH, readToken(port) if token is None else token)
+    
+    def namespace(self, name):
+        """Gets the proxy for something the `unreal` module holds by name"""
+        namespace = self.namespaces.get(name)
+        if namespace is None:
+            namespace = self.namespaces[name] = RemoteNamespace(self, name)
+        return namespace
+    
+    def call(self, target, name, args):
+        """Calls a method in the editor, or queues it if batching
+        
+        Args:
+            target (RemoteObject or RemoteNamespace): What the method is called on
+            name (str): The name of the method, or None to call the target itself
+            args (tuple): The arguments
+        
+        Returns:
+            The result, or None if the call was batched
+        """
+        if self.batchDepth:
+            self.batched.append((target, name, args))
+            return None
+        self.stats['calls'] += 1
+        return self.request(CALL, (target, name, args))
+    
+    def get(self, target, name):
+        """Reads an attribute that isn't a method from an object in the editor"""
+        self.stats['calls'] += 1
+        return self.request(GET, (target, name))
+    
+    @contextmanager
+    def batch(self):
+        """Batches every call made inside it into one message, sent without waiting once the outermost batch ends"""
+        self.batchDepth += 1
+        try:
+            yield
+        finally:
+            self.batchDepth -= 1
+            if not self.batchDepth and self.batched:
+                self.sendBatch()
+    
+    def sendBatch(self):
+        """Sends the batched calls as one message, then waits only if too many batches are still unacknowledged"""
+        calls = self.batched
+        self.batched = []
+        sequence = next(self.sequence)
+        self.send(BATCH, sequence, calls)
+        self.inFlight[sequence] = (len(calls), time.perf_counter())
+        self.stats['batches'] += 1
+        self.stats['batchedCalls'] += len(calls)
+        while len(self.inFlight) > self.maxInFlight:
+            self.readFrames(block=True)
+    
+    def request(self, kind, value):
+        """Sends a message and waits for its result, reading acknowledgements and events that arrive first"""
+        sequence = next(self.sequence)
+        self.send(kind, sequence, value)
+        while sequence not in self.results:
+            self.readFrames(block=True)
+        kind, result = self.results.pop(sequence)
+        if kind == ERROR:
+            errorType, message = result
+            raise BUILTIN_ERRORS.get(errorType, RemoteError)("{} (in the editor: {})".format(message, errorType))
+        return result
+    
+    def send(self, kind, sequence, value):
+        """Packs a message and sends it, along with any handles released since the last one"""
+        data = b''
+        if self.released:
+            released = self.released
+            self.released = []
+            data = self.pack(RELEASE, 0, released)
+        data += self.pack(kind, sequence, value)
+        self.socket.sendall(data)
+        self.stats['bytesSent'] += len(data)
+    
+    def pack(self, kind, sequence, value):
+        writer = Writer(self.packObject)
+        writer.value(value)
+        return packFrame(kind, sequence, writer.buffer)
+    
+    def packObject(self, writer, value):
+        """Packs proxies as their handles and names, vectors, rotators and transforms by value, and functions as callbacks"""
+        if isinstance(value, RemoteObject):
+            writer.buffer.append(HANDLE)
+            writer.varint(value._handle)
+        elif isinstance(value, RemoteNamespace):
+            writer.buffer.append(NAMESPACE)
+            writer.string(value._name)
+        elif isinstance(value, Vector):
+            writer.buffer.append(VECTOR)
+            writer.buffer += TRIPLE.pack(value.x, value.y, value.z)
+        elif isinstance(value, Rotator):
+            writer.buffer.append(ROTATOR)
+            writer.buffer += TRIPLE.pack(value.roll, value.pitch, value.yaw)
+        elif isinstance(value, Transform):
+            writer.buffer.append(TRANSFORM)
+            writer.buffer += packTransform(value.translation, value.rotation, value.scale3d)
+        elif callable(value):
+            callbackId = self.callbackIds.get(value)
+            if callbackId is None:
+                callbackId = self.callbackIds[value] = len(self.callbacks)
+                self.callbacks[callbackId] = value
+            writer.buffer.append(CALLBACK)
+            writer.varint(callbackId)
+        else:
+            raise TypeError("Can't send a {} to the editor".format(type(value).__name__))
+    
+    def unpackObject(self, reader, tag):
+        """Unpacks handles as proxies, and vectors, rotators and transforms as values"""
+        if tag == HANDLE:
+            handle = reader.varint()
+            remoteClass = self.classes[reader.varint()]
+            self.receivedCounts[handle] = self.receivedCounts.get(handle, 0) + 1
+            proxy = self.proxies.get(handle)
+            if proxy is None:
+                proxy = self.proxies[handle] = RemoteObject(self, handle, remoteClass)
+            return proxy
+        if tag == VECTOR:
+            return Vector(*reader.unpack(TRIPLE))
+        if tag == ROTATOR:
+            return Rotator(*reader.unpack(TRIPLE))
+        if tag == TRANSFORM:
+            return Transform(*unpackTransform(reader.unpack(NINE), Vector, Rotator))
+        raise ValueError("Unknown tag {} from the editor".format(tag))
+    
+    def readFrames(self, block):
+        """Reads whatever has arrived from the editor and handles every complete message in it
+        
+        Args:
+            block (bool): Whether to wait for at least some data to arrive
+        """
+        if not block and not select.select([self.socket], [], [], 0)[0]:
+            return
+        data = self.socket.recv(1 << 20)
+        if not data:
+            raise ConnectionError("The editor closed the bridge")
+        self.received += data
+        self.stats['bytesReceived'] += len(data)
+        for kind, sequence, body in splitFrames(self.received):
+            reader = Reader(body, self.unpackObject)
+            # each message from the editor starts with the classes it mentions for the first time
+            for name, bases, methods in reader.value():
+                self.classes.append(RemoteClass(name, bases, methods))
+            value = reader.value()
+            if kind == ACK:
+                self.acknowledge(sequence, value)
+            elif kind == EVENT:
+                self.events.append(value)
+            else:
+                self.results[sequence] = (kind, value)
+    
+    def acknowledge(self, sequence, value):
+        """Handles the acknowledgement of a batch, logging any calls in it that failed"""
+        calls, failures, firstError = value
+        _, sent = self.inFlight.pop(sequence, (0, time.perf_counter()))
+        self.stats['ackLatency'] = time.perf_counter() - sent
+        if failures:
+            self.stats['failures'] += failures
+            log.warning("%s of %s batched calls failed in the editor, the first with: %s", failures, calls, firstError)
+    
+    def poll(self):
+        """Reads any acknowledgements and events that have arrived, and runs the callbacks the events are for"""
+        self.readFrames(block=False)
+        events = self.events
+        self.events = []
+        for callbackId, args in events:
+            self.callbacks[callbackId](*args)
+    
+    def release(self, handle):
+        """Marks a handle as no longer held here, to be released in the editor with the next message"""
+        self.released.append((handle, self.receivedCounts.pop(handle, 0)))
+    
+    def waitForAcknowledgements(self):
+        """Sends any batched calls and waits until the editor has run every batch"""
+        if self.batched and not self.batchDepth:
+            self.sendBatch()
+        while self.inFlight:
+            self.readFrames(block=True)
+    
+    def close(self):
+        """Waits for the batches in flight and closes the connection"""
+        try:
+            self.waitForAcknowledgements()
+        except OSError:
+            pass
+        self.socket.close()
+
+class RemoteUnrealModule(types.ModuleType):
+    """Stands in for the `unreal` module in a standalone process, forwarding everything to the editor through a RemoteTransport
+    
+    Vectors, rotators and transforms are made locally and sent by value, everything else the module holds is a RemoteNamespace
+    """
+    Vector = Vector
+    Rotator = Rotator
+    Transform = Transform
+    
+    def __init__(self, transport):
+        super().__init__('unreal')
+        self.bridgeTransport = transport
+    
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        namespace = self.bridgeTransport.namespace(name)
+        setattr(self, name, namespace)
+        return namespace
+
+_activeTransport = None
+
+def install(address=None, token=None):
+    """Connects to the editor and puts a RemoteUnrealModule in place of `unreal`, before anything imports it
+    
+    Args:
+        address (str): 'host:port' of the BridgeServer, or only the host or the port, the defaults filling in the rest
+        token (str): The server's token, found by readToken() if not given
+    
+    Returns:
+        The RemoteTransport
+    """
+    global _activeTransport
+    host, port = DEFAULT_HOST, DEFAULT_PORT
+    if address:
+        hostPart, _, portPart = address.rpartition(':') if ':' in address else ('', '', address)
+        if portPart.isdigit():
+            host, port = hostPart or host, int(portPart)
+        else:
+            host = address
+    _activeTransport = RemoteTransport(host, port, token=token)
+    sys.modules['unreal'] = RemoteUnrealModule(_activeTransport)
+    log.info("connected to the editor at %s:%s", host, port)
+    return _activeTransport
+
+def activeTransport():
+    """Gets the transport the tool talks to the editor through, the in-process one unless install() was called"""
+    global _activeTransport
+    if _activeTransport is None:
+        _activeTransport = InProcessTransport()
+    return _activeTransport
@@ -0,0 +1,193 @@
+import math
+
+class SpatialHash():
+    """A uniform-grid spatial hash over axis-aligned rects, keyed by block id
+    
+    Each rect is stored in every cell it touches, so a query only visits the cells under the query rect
+    and its cost depends on the cells touched rather than the total number of rects
+    """
+    def __init__(self, cellSize=100):
+        """Init's SpatialHash
+        
+        Args:
+            cellSize (float): The width and height of each cell, ideally a little larger than a typical block
+        """
+        self.cellSize = cellSize
+        self.cells = {}
+        self.rects = {}
+        self.cellRanges = {}
+        
+    def __len__(self):
+        return len(self.rects)
+    
+    def __contains__(self, key):
+        return key in self.rects
+        
+    def cellRange(self, left, top, right, bottom):
+        """Gets the range of cells that a rect touches
+        
+        Returns:
+            A tuple of (first column, first row, last column, last row)
+        """
+        size = self.cellSize
+        return (math.floor(left / size), math.floor(top / size), math.floor(right / size), math.floor(bottom / size))
+        
+    def insert(self, key, x, y, width, height):
+        """Adds a rect to the hash, or moves it if the key is already there
+        
+        Args:
+            key: The id of the block
+            x (float): The left of the rect
+            y (float): The top of the rect
+            width (float): The width of the rect
+            height (float): The height of the rect
+        """
+        rect = (x, y, x + width, y + height)
+        newRange = self.cellRange(*rect)
+        oldRange = self.cellRanges.get(key)
+        self.rects[key] = rect
+        
+        # most moves stay within the same cells, in which case only the rect needs updating
+        if oldRange == newRange:
+            return
+        if oldRange is not None:
+            self.removeFromCells(key, oldRange)
+        
+        self.cellRanges[key] = newRange
+        cells = self.cells
+        firstColumn, firstRow, lastColumn, lastRow = newRange
+        for column in range(firstColumn, lastColumn + 1):
+            for row in range(firstRow, lastRow + 1):
+                cell = cells.get((column, row))
+                if cell is None:
+                    cells[(column, row)] = {key}
+                else:
+                    cell.add(key)
+                    
+    # moving a rect is the same as inserting it again
+    update = insert
+        
+    def remove(self, key):
+        """Removes a rect from the hash, if it is there
+        
+        Args:
+            key: The id of the block
+        """
+        cellRange = self.cellRanges.pop(key, None)
+        if cellRange is None:
+            return
+        del self.rects[key]
+        self.removeFromCells(key, cellRange)
+        
+    def removeFromCells(self, key, cellRange):
+        """Removes a key from every cell in the range, dropping cells that become empty"""
+        cells = self.cells
+        firstColumn, firstRow, lastColumn, lastRow = cellRange
+        for column in range(firstColumn, lastColumn + 1):
+            for row in range(firstRow, lastRow + 1):
+                cell = cells.get((column, row))
+                if cell is not None:
+                    cell.discard(key)
+                    if not cell:
+                        del cells[(column, row)]
+                        
+    def clear(self):
+        """Removes every rect from the hash"""
+        self.cells.clear()
+        self.rects.clear()
+        self.cellRanges.clear()
+        
+    def candidates(self, left, top, right, bottom):
+        """Gets every key stored in the cells that a rect touches, which may include rects that don't intersect it
+        
+        Returns:
+            A set of keys
+        """
+        firstColumn, firstRow, lastColumn, lastRow = self.cellRange(left, top, right, bottom)
+        cells = self.cells
+        
+        # when the query covers more cells than are occupied, walking the occupied cells is cheaper
+        if (lastColumn - firstColumn + 1) * (lastRow - firstRow + 1) > len(cells):
+            found = set()
+            for (column, row), cell in cells.items():
+                if firstColumn <= column <= lastColumn and firstRow <= row <= lastRow:
+                    found.update(cell)
+            return found
+        
+        found = set()
+        for column in range(firstColumn, lastColumn + 1):
+            for row in range(firstRow, lastRow + 1):
+                cell = cells.get((column, row))
+                if cell:
+                    found.update(cell)
+        return found
+        
+    def query(self, x, y, width, height, exclude=None, touching=False):
+        """Gets the keys of every rect that overlaps the given rect
+        
+        Args:
+            x (float): The left of the query rect
+            y (float): The top of the query rect
+            width (float): The width of the query rect
+            height (float): The height of the query rect
+            exclude: A key to leave out of the results, usually the block doing the query
+            touching (bool): Whether rects that only share an edge with the query rect count
+            
+        Returns:
+            A list of keys
+        """
+        left, top, right, bottom = x, y, x + width, y + height
+        rects = self.rects
+        found = []
+        for key in self.candidates(left, top, right, bottom):
+            if key == exclude:
+                continue
+            otherLeft, otherTop, otherRight, otherBottom = rects[key]
+            if touching:
+                if otherLeft <= right and left <= otherRight and otherTop <= bottom and top <= otherBottom:
+                    found.append(key)
+            elif otherLeft < right and left < otherRight and otherTop < bottom and top < otherBottom:
+                found.append(key)
+        return found
+    
+    def touching(self, key, tolerance=0.5):
+        """Gets the keys of every rect that overlaps or touches the rect stored for a key
+        
+        Args:
+            key: The id of the block
+            tolerance (float): How far apart two edges can be and still count as touching
+            
+        Returns:
+            A list of keys, not including the given key
+        """
+        left, top, right, bottom = self.rects[key]
+        return self.query(left - tolerance, top - tolerance, right - left + tolerance * 2, bottom - top + tolerance * 2,
+                          exclude=key, touching=True)
+    
+    def nearbyEdges(self, x, y, width, height, distance, exclude=None):
+        """Gets the vertical and horizontal edges of rects near the given rect, for snapping
+        
+        Args:
+            x (float): The left of the rect
+            y (float): The top of the rect
+            width (float): The width of the rect
+            height (float): The height of the rect
+            distance (float): How far out from the rect to look for edges
+            exclude: A key or a set of keys to leave out, usually the blocks being snapped
+            
+        Returns:
+            A tuple of (x positions of vertical edges, y positions of horizontal edges)
+        """
+        excluded = exclude if isinstance(exclude, (set, frozenset)) else {exclude}
+        xEdges = []
+        yEdges = []
+        rects = self.rects
+        for key in self.query(x - distance, y - distance, width + distance * 2, height + distance * 2, touching=True):
+            if key in excluded:
+                continue
+            left, top, right, bottom = rects[key]
+            xEdges.append(left)
+            xEdges.append(right)
+            yEdges.append(top)
+            yEdges.append(bottom)
+        return xEdges, yEdges
@@ -0,0 +1,138 @@
+import time
+from collections import deque
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from instrumentation import timed
+
+class SpawnScheduler(QObject):
+    """Runs batches of spawn, copy and destroy jobs a few milliseconds per Qt event-loop tick
+    
+    Each job is a (run, cancel) pair of callables. Items are placed in the grid straight away by whoever
+    submits the job, and the job gives the item its actor later, so large pastes and loads never freeze
+    the widget or the editor it is parented to
+    """
+    # (jobs done, jobs in the batch)
+    progressChanged = Signal(int, int)
+    # a report of the batch that just finished or was cancelled
+    batchFinished = Signal(dict)
+    
+    def __init__(self, budget=0.008, flush=None, parent=None):
+        """Init's SpawnScheduler
+        
+        Args:
+            budget (float): The time in seconds that jobs can take per tick
+            flush (callable): Called at the end of each tick, so that writes queued by the jobs go out with it
+            parent (QObject): The Qt parent
+        """
+        super().__init__(parent)
+        self.budget = budget
+        self.flush = flush
+        self.jobs = deque()
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.tick)
+        self.resetBatch()
+        
+    def resetBatch(self):
+        """Clears the counters for the current batch"""
+        self.batchTotal = 0
+        self.batchDone = 0
+        self.batchStart = None
+        self.frameTimes = []
+        
+    def isBusy(self):
+        """Whether there are jobs waiting to run"""
+        return bool(self.jobs)
+        
+    def submit(self, run, cancel=None):
+        """Adds a job to the current batch, starting a new batch if idle
+        
+        Args:
+            run (callable): Does the work of the job
+            cancel (callable): Undoes whatever the submitter did up front, if the job is cancelled before it runs
+        """
+        self.submitMany([(run, cancel)])
+        
+    def submitMany(self, jobs):
+        """Adds jobs to the current batch, starting a new batch if idle
+        
+        Args:
+            jobs (iterable): (run, cancel) pairs
+        """
+        before = len(self.jobs)
+        self.jobs.extend(jobs)
+        added = len(self.jobs) - before
+        if not added:
+            return
+        
+        if self.batchStart is None:
+            self.batchStart = time.perf_counter()
+        self.batchTotal += added
+        self.progressChanged.emit(self.batchDone, self.batchTotal)
+        if not self.timer.isActive():
+            self.timer.start(0)
+            
+    @timed('spawnTick')
+    def tick(self):
+        """Runs jobs until the time budget for this tick is spent"""
+        start = time.perf_counter()
+        deadline = start + self.budget
+        jobs = self.jobs
+        done = 0
+        while jobs:
+            run, _ = jobs.popleft()
+            run()
+            done += 1
+            if time.perf_counter() >= deadline:
+                break
+        
+        if self.flush:
+            self.flush()
+        self.frameTimes.append(time.perf_counter() - start)
+        self.batchDone += done
+        self.progressChanged.emit(self.batchDone, self.batchTotal)
+        
+        if not jobs:
+            self.finishBatch(cancelled=False)
+            
+    def runAll(self):
+        """Runs every waiting job right away, for callers that need the whole batch done before they continue"""
+        while self.jobs:
+            self.tick()
+            
+    def cancel(self):
+        """Cancels every job that hasn't run yet, calling its cancel callable"""
+        if not self.jobs:
+            return
+        
+        jobs = self.jobs
+        self.jobs = deque()
+        for _, cancel in jobs:
+            if cancel:
+                cancel()
+        if self.flush:
+            self.flush()
+        self.finishBatch(cancelled=True, skipped=len(jobs))
+        
+    def finishBatch(self, cancelled, skipped=0):
+        """Stops the timer and emits a report of the throughput and worst frame of the batch
+        
+        Args:
+            cancelled (bool): Whether the batch was cancelled
+            skipped (int): The number of jobs that were cancelled before they ran
+        """
+        self.timer.stop()
+        elapsed = time.perf_counter() - self.batchStart if self.batchStart is not None else 0.0
+        frameTimes = self.frameTimes
+        report = {
+            'jobs': self.batchDone,
+            'cancelled': cancelled,
+            'skipped': skipped,
+            'seconds': elapsed,
+            'jobsPerSecond': self.batchDone / elapsed if elapsed else 0.0,
+            'frames': len(frameTimes),
+            'worstFrameMs': max(frameTimes) * 1000 if frameTimes else 0.0,
+            'meanFrameMs': sum(frameTimes) / len(frameTimes) * 1000 if frameTimes else 0.0,
+        }
+        self.resetBatch()
+        self.batchFinished.emit(report)
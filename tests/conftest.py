@@ -0,0 +1,7 @@
+import os
+import sys
+
+# the tool's modules sit at the root of the repo, and benchmarks/fake/unreal.py stands in for the editor's `unreal` module
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+sys.path.insert(0, os.path.join(root, 'benchmarks', 'fake'))
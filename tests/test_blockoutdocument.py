@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import unreal
+
+from blockoutdocument import BlockoutDocument
+from unreallibrary import UnrealLibrary
+
+def makeDocument():
+    """Makes a document on an empty level with its own library, so no writes are left over from other tests"""
+    unreal.resetLevel()
+    return BlockoutDocument(UnrealLibrary())
+
+def test_importsWithoutPySide():
+    # PySide6 is made unimportable in a fresh interpreter, as it is for a pipeline script without Qt installed
+    script = ("import sys; sys.modules['PySide6'] = None\n"
+              "import blockoutdocument, applylayout\n"
+              "assert 'PySide6.QtCore' not in sys.modules")
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+    subprocess.run([sys.executable, '-c', script], env=environment, check=True)
+
+def test_writesWaitForFlushWithoutEventLoop():
+    library = UnrealLibrary()
+    document = BlockoutDocument(library)
+    ids = document.addMany(np.array([[0, 0, 100, 100]]))
+    actor = document.store.recordById(int(ids[0])).actor
+    
+    library.setActorLocation(actor, unreal.Vector(10, 20, 30))
+    assert not library.flushScheduled
+    assert actor.get_actor_location().x != 10
+    library.flush()
+    location = actor.get_actor_location()
+    assert (location.x, location.y, location.z) == (10, 20, 30)
+
+def test_bulkOperationsReachActors():
+    document = makeDocument()
+    ids = document.addMany(np.array([[0, 0, 100, 100], [200, 0, 50, 100]]))
+    assert [record.label for record in document.records()] == ['BlockoutActor', 'BlockoutActor1']
+    
+    assert document.moveMany(ids, [[50, 50, 0], [300, 300, 25]]) == 2
+    record = document.store.recordById(int(ids[1]))
+    location = record.actor.get_actor_location()
+    assert (record.x, record.y) == (275, 250)
+    assert (location.x, location.y, location.z) == (300, 300, 25)
+    
+    assert document.scaleMany(ids[:1], [[2, 2, 1]]) == 1
+    record = document.store.recordById(int(ids[0]))
+    scale = record.actor.get_actor_scale3d()
+    assert (record.x, record.y, record.width, record.height) == (-50, -50, 200, 200)
+    assert (scale.x, scale.y, scale.z) == (2, 2, 1)
+    
+    deleted = document.deleteMany(ids[:1])
+    assert len(deleted) == 1 and len(document.records()) == 1
+
+def test_applyOnlySpawnsMissingBlocks(tmp_path):
+    document = makeDocument()
+    document.addMany(np.array([[0, 0, 100, 100], [200, 0, 50, 100]]))
+    path = str(tmp_path / 'layout.qbl')
+    document.save(path)
+    
+    applied = BlockoutDocument(document.UEL)
+    actorCount = len(unreal.EditorLevelLibrary.get_all_level_actors())
+    assert len(applied.apply(path)) == 2
+    assert len(unreal.EditorLevelLibrary.get_all_level_actors()) == actorCount
+    assert {record.actor for record in applied.records()} == {record.actor for record in document.records()}
+
+def test_applyNeverSharesActorsWithExistingBlocks(tmp_path):
+    document = makeDocument()
+    document.addMany(np.array([[0, 0, 100, 100], [200, 0, 50, 100]]))
+    path = str(tmp_path / 'layout.qbl')
+    document.save(path)
+    
+    # applied to the document it was saved from, the labels match actors its blocks already own
+    document.apply(path)
+    actors = [record.actor for record in document.records()]
+    assert len(actors) == 4 and len(set(actors)) == 4
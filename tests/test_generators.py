@@ -0,0 +1,28 @@
+import numpy as np
+
+import generators
+
+def test_fillGridFitsWholeBlocks():
+    rects = generators.fillGrid(10, 20, 100, 50, 20, 20, gap=5)
+    assert len(rects) == 4 * 2
+    assert rects[:, 0].min() == 10 and (rects[:, 0] + rects[:, 2]).max() <= 110
+    assert rects[1].tolist() == [35, 20, 20, 20]
+
+def test_arraysOffsetCopies():
+    rects = [[0, 0, 10, 10], [50, 0, 10, 20]]
+    copies, sources = generators.linearArray(rects, 3, 100, 0)
+    assert copies[:, 0].tolist() == [100, 150, 200, 250, 300, 350] and sources.tolist() == [0, 1] * 3
+    
+    # a full circle of three copies puts them a quarter turn apart, keeping each block's size
+    copies, sources = generators.radialArray([[95, -5, 10, 10]], 3, 0, 0)
+    centers = copies[:, :2] + copies[:, 2:] / 2
+    assert np.allclose(centers, [[0, 100], [-100, 0], [0, -100]]) and (copies[:, 2:] == 10).all()
+
+def test_scatterKeepsSpacingAndRegion():
+    rects = generators.scatter(0, 0, 500, 300, 10, 10, 25, seed=3)
+    centers = rects[:, :2] + 5
+    distances = np.sqrt(((centers[:, None] - centers[None]) ** 2).sum(axis=2))
+    np.fill_diagonal(distances, np.inf)
+    assert len(rects) > 50 and distances.min() >= 25
+    assert (rects[:, :2] >= 0).all() and (rects[:, 0] + 10 <= 500).all() and (rects[:, 1] + 10 <= 300).all()
+    assert np.array_equal(rects, generators.scatter(0, 0, 500, 300, 10, 10, 25, seed=3))
@@ -0,0 +1,40 @@
+import numpy as np
+
+from blockrecord import BlockRecord
+from layoutfile import COLUMNS_V1, HEADER, MAGIC, NO_STRING, LayoutFile, StringTable, columnOffsets, saveLayout
+
+def test_roundTripKeepsEveryBlockExactly(tmp_path):
+    path = str(tmp_path / 'layout.qbl')
+    records = [BlockRecord('square', 0.1, 1e7 + 0.3, 25, 33.3, 1.7, label='Block', assetPath='/Game/Cube.Cube', scaleX=0.1, scaleY=0.333),
+               BlockRecord('circle', -40.05, 12, 10, 10, 0.25, unrealPath='/Game/Sphere')]
+    records[0].setLocation(12.6, 1e7 + 17, 150.5)
+    saveLayout(path, records)
+    
+    layout = LayoutFile(path)
+    loaded = [layout.record(row) for row in range(len(layout))]
+    fields = ('shape', 'x', 'y', 'width', 'height', 'label', 'assetPath', 'unrealPath',
+              'locationX', 'locationY', 'locationZ', 'scaleX', 'scaleY', 'zScale')
+    for record, saved in zip(loaded, records):
+        assert [getattr(record, field) for field in fields] == [getattr(saved, field) for field in fields]
+    assert layout.rowsInRect(-50, 0, 0, 20).tolist() == [1]
+    layout.close()
+
+def test_loadsVersionOneFiles(tmp_path):
+    path = str(tmp_path / 'layout.qbl')
+    strings = StringTable()
+    columns = {'rect': np.array([[0, 0, 50, 200]], np.float32), 'zScale': np.array([2], np.float32),
+               'label': np.array([strings.intern('Old')], np.uint32), 'assetPath': np.array([NO_STRING], np.uint32),
+               'unrealPath': np.array([NO_STRING], np.uint32), 'shape': np.array([0], np.uint8)}
+    offsets, stringOffset = columnOffsets(1, COLUMNS_V1)
+    with open(path, 'wb') as layoutFile:
+        layoutFile.write(HEADER.pack(MAGIC, 1, 0, 1, stringOffset))
+        for name, dtype, width in COLUMNS_V1:
+            layoutFile.write(b'\0' * (offsets[name] - layoutFile.tell()))
+            layoutFile.write(columns[name].tobytes())
+        layoutFile.write(b'\0' * (stringOffset - layoutFile.tell()))
+        layoutFile.write(strings.pack())
+    
+    layout = LayoutFile(path)
+    record = layout.record(0)
+    assert (record.label, record.scale(), (record.locationX, record.locationY)) == ('Old', (0.5, 2.0, 2.0), (25, 100))
+    layout.close()
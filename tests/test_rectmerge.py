@@ -0,0 +1,33 @@
+import numpy as np
+
+import generators
+from rectmerge import mergeRects
+
+def overlaps(rects):
+    """Whether any two rects overlap by more than an edge"""
+    left, top = rects[:, 0], rects[:, 1]
+    right, bottom = left + rects[:, 2], top + rects[:, 3]
+    overlap = ((left[:, None] < right[None]) & (left[None] < right[:, None]) & (top[:, None] < bottom[None]) & (top[None] < bottom[:, None]))
+    np.fill_diagonal(overlap, False)
+    return overlap.any()
+
+def test_mergePreservesArea():
+    # an L of touching tiles, a separate wall, and a tile of another group in the middle of the wall's row
+    rects = np.concatenate([generators.fillGrid(0, 0, 100, 20, 10, 10), generators.fillGrid(0, 20, 20, 80, 10, 10),
+                            generators.fillGrid(200, 0, 50, 10, 10, 10), [[250, 0, 10, 10]]])
+    groups = np.zeros(len(rects), np.int64)
+    groups[-1] = 1
+    merged, mergedInto = mergeRects(rects, groups)
+    
+    assert len(merged) < len(rects)
+    assert np.isclose((merged[:, 2] * merged[:, 3]).sum(), (rects[:, 2] * rects[:, 3]).sum())
+    assert not overlaps(merged)
+    # every rect lies inside the merged rect it went into, and no merged rect mixes groups
+    outer = merged[mergedInto]
+    assert ((rects[:, :2] >= outer[:, :2]) & (rects[:, :2] + rects[:, 2:] <= outer[:, :2] + outer[:, 2:])).all()
+    assert all(len(set(groups[mergedInto == index].tolist())) == 1 for index in range(len(merged)))
+
+def test_mergeLeavesGapsAlone():
+    rects = [[0, 0, 10, 10], [20, 0, 10, 10]]
+    merged, mergedInto = mergeRects(rects)
+    assert len(merged) == 2 and sorted(mergedInto.tolist()) == [0, 1]
@@ -0,0 +1,41 @@
+import socket
+import threading
+
+import pytest
+import unreal
+
+import bridgeserver
+from remotebridge import AUTH, ERROR, FRAME, RemoteTransport, RemoteUnrealModule, Writer, packFrame
+
+@pytest.fixture
+def server():
+    server = bridgeserver.BridgeServer(unreal, port=0)
+    stopped = threading.Event()
+    thread = threading.Thread(target=lambda: [server.poll(0.01) for _ in iter(stopped.is_set, True)], daemon=True)
+    thread.start()
+    yield server
+    stopped.set()
+    thread.join()
+    server.stop()
+
+def test_refusesClientsWithoutToken(server):
+    with socket.create_connection(('127.0.0.1', server.port), timeout=5) as client:
+        writer = Writer(None)
+        writer.value('wrong')
+        client.sendall(packFrame(AUTH, 1, writer.buffer))
+        received = b''
+        while True:
+            data = client.recv(4096)
+            if not data:
+                break
+            received += data
+    # the connection is answered with an error and closed, without any call having run
+    assert received[4] == ERROR and len(received) == FRAME.size + FRAME.unpack_from(received)[0]
+
+def test_servesClientsWithToken(server):
+    with pytest.raises(PermissionError):
+        RemoteTransport(port=server.port, token='wrong')
+    transport = RemoteTransport(port=server.port)
+    module = RemoteUnrealModule(transport)
+    assert module.SystemLibrary.is_valid(None) is False
+    transport.close()
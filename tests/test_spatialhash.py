@@ -0,0 +1,45 @@
+import numpy as np
+
+from spatialhash import SpatialHash
+
+def bruteForce(rects, x, y, width, height):
+    return sorted(key for key, (left, top, rectWidth, rectHeight) in rects.items()
+                  if left < x + width and x < left + rectWidth and top < y + height and y < top + rectHeight)
+
+def test_queryMatchesBruteForce():
+    rng = np.random.default_rng(7)
+    spatialHash = SpatialHash(cellSize=50)
+    rects = {}
+    for key in range(500):
+        x, y = rng.uniform(-1000, 1000, 2).tolist()
+        width, height = rng.uniform(1, 200, 2).tolist()
+        rects[key] = (x, y, width, height)
+        spatialHash.insert(key, x, y, width, height)
+    
+    # moving a rect and removing one have to leave no trace in the cells they were in
+    rects[3] = (900, 900, 10, 10)
+    spatialHash.insert(3, *rects[3])
+    del rects[4]
+    spatialHash.remove(4)
+    assert len(spatialHash) == len(rects) and 4 not in spatialHash
+    
+    # small queries walk the cells under them, queries larger than the occupied cells walk the occupied cells
+    for x, y, width, height in rng.uniform(-1100, 1100, (50, 4)).tolist() + [(-5000, -5000, 10000, 10000)]:
+        width, height = abs(width), abs(height)
+        assert sorted(spatialHash.query(x, y, width, height)) == bruteForce(rects, x, y, width, height)
+
+def test_touchingIncludesSharedEdges():
+    spatialHash = SpatialHash()
+    spatialHash.insert('a', 0, 0, 10, 10)
+    spatialHash.insert('b', 10, 0, 10, 10)
+    spatialHash.insert('c', 30, 0, 10, 10)
+    assert spatialHash.query(0, 0, 10, 10, exclude='a') == []
+    assert spatialHash.touching('a') == ['b']
+
+def test_nearbyEdgesLeaveOutDraggedBlocks():
+    spatialHash = SpatialHash()
+    spatialHash.insert(1, 100, 100, 25, 25)
+    spatialHash.insert(2, 125, 100, 25, 25)
+    spatialHash.insert(3, 160, 100, 25, 25)
+    assert sorted(spatialHash.nearbyEdges(101, 100, 25, 25, 8, exclude=1)[0]) == [125, 150]
+    assert sorted(spatialHash.nearbyEdges(101, 100, 50, 25, 10, exclude={1, 2})[0]) == [160, 185]
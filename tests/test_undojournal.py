@@ -0,0 +1,55 @@
+import numpy as np
+
+from blockrecord import BlockRecord
+from undojournal import BlocksEntry, TransformEntry, UndoJournal, snapshotTransforms
+
+def test_forgetTrimsAndDropsEntry():
+    journal = UndoJournal(None)
+    entry = BlocksEntry([1, 2, 3], added=True)
+    journal.push(entry)
+
+    journal.forget(entry, [2])
+    assert entry.ids.tolist() == [1, 3]
+    assert journal.totalBytes == entry.nbytes
+
+    journal.forget(entry, [1, 3])
+    assert not journal.canUndo()
+    assert journal.totalBytes == 0
+
+def test_groupDragIsCompressed():
+    records = [BlockRecord('square', index * 30, 0) for index in range(100)]
+    ids, before = snapshotTransforms(records)
+    for record in records:
+        record.setRect(record.x + 5, record.y - 10, record.width, record.height)
+    entry = TransformEntry(ids, before, snapshotTransforms(records)[1])
+    assert entry.delta.shape == (1, 7)
+    assert np.array_equal(entry.after(), snapshotTransforms(records)[1])
+    
+    # blocks that changed by different amounts keep a row each
+    after = before.copy()
+    after[0, 0] += 1
+    assert TransformEntry(ids, before, after).delta.shape == (100, 7)
+
+def test_mergeKeyFoldsTicksUntilClosed():
+    journal = UndoJournal(None)
+    ids = np.arange(3)
+    before = np.zeros((3, 7))
+    for tick in range(1, 4):
+        journal.push(TransformEntry(ids, before + tick - 1, before + tick), mergeKey='zScale')
+    assert len(journal.undoStack) == 1 and np.array_equal(journal.undoStack[0].after(), before + 3)
+    
+    journal.closeMerge()
+    journal.push(TransformEntry(ids, before + 3, before + 4), mergeKey='zScale')
+    assert len(journal.undoStack) == 2
+
+def test_evictsOldestEntriesOverBudget():
+    entries = [TransformEntry(np.arange(100), np.zeros((100, 7)), np.random.default_rng(index).random((100, 7))) for index in range(5)]
+    journal = UndoJournal(None, byteBudget=entries[0].nbytes * 3)
+    for entry in entries:
+        journal.push(entry)
+    assert list(journal.undoStack) == entries[2:] and journal.stats['evicted'] == 2
+    assert journal.totalBytes == sum(entry.nbytes for entry in entries[2:]) <= journal.byteBudget
+    
+    # the newest entry is kept even when it alone is over the budget
+    journal.setByteBudget(1)
+    assert list(journal.undoStack) == entries[4:]
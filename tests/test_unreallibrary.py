@@ -0,0 +1,61 @@
+import unreal
+
+from unreallibrary import DEFAULT_SCALE, UnrealLibrary
+
+def transformOf(actor):
+    location, rotation, scale = actor.get_actor_location(), actor.get_actor_rotation(), actor.get_actor_scale3d()
+    return ((location.x, location.y, location.z), (rotation.roll, rotation.pitch, rotation.yaw), (scale.x, scale.y, scale.z))
+
+def test_pooledActorsStartLikeNewOnes():
+    unreal.resetLevel()
+    library = UnrealLibrary()
+    objectPath = library.resolveAssetPath('square')
+    released = library.spawnActor('square', 10, 10)
+    library.setActorLocation(released, unreal.Vector(10, 10, 50))
+    library.setActorScale(released, unreal.Vector(3, 4, 5))
+    library.flush()
+    released.set_actor_rotation(unreal.Rotator(0, 0, 90), False)
+    library.releaseActor(released, objectPath)
+    library.flush()
+    
+    reused, fresh = library.spawnActors('square', [(200, 300), (200, 300)], ['Reused', 'Fresh'])
+    library.flush()
+    assert reused is released and fresh is not released
+    assert transformOf(reused) == transformOf(fresh) == ((200, 300, 0), (0, 0, 0), DEFAULT_SCALE)
+    assert not reused.hidden
+
+def test_instanceHostIsBuiltThroughLibrary():
+    unreal.resetLevel()
+    library = UnrealLibrary()
+    library.instanced = True
+    library.profiler.reset()
+    library.profiler.enabled = True
+    try:
+        library.spawnActors('square', [(0, 0), (100, 0)], ['A', 'B'])
+        library.flush()
+    finally:
+        library.profiler.enabled = False
+    host, = library.instances.hosts.values()
+    assert host.component in host.actor.components
+    assert host.actor.get_actor_label().startswith('QuickBlockInstances_')
+    # every call that built the host went through the library, so the profiler saw each of them
+    assert {'get_engine_subsystem', 'add_new_subobject', 'get_object'} <= set(library.profiler.counts)
+
+def test_unrotatedPooledActorsSkipTheRotationReset():
+    unreal.resetLevel()
+    library = UnrealLibrary()
+    objectPath = library.resolveAssetPath('square')
+    released = library.spawnActor('square', 10, 10)
+    library.flush()
+    library.releaseActor(released, objectPath)
+    library.flush()
+    
+    library.profiler.reset()
+    library.profiler.enabled = True
+    try:
+        reused = library.spawnActor('square', 200, 300)
+        library.flush()
+    finally:
+        library.profiler.enabled = False
+    assert reused is released
+    assert 'set_actor_rotation' not in library.profiler.counts
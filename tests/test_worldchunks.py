@@ -0,0 +1,31 @@
+from blockrecord import BlockRecord
+from worldchunks import WorldChunks
+
+FIELDS = ('id', 'shape', 'x', 'y', 'width', 'height', 'zScale', 'scaleX', 'scaleY', 'locationX', 'locationY', 'locationZ',
+          'label', 'assetPath', 'unrealPath', 'actor')
+
+def test_packedChunksUnpackEveryField():
+    chunks = WorldChunks(chunkSize=100)
+    records = [BlockRecord('square', 10.5, 20, 25, 30, 1.5, actor='actor', assetPath='/Game/Cube.Cube', label='Block', scaleX=0.2),
+               BlockRecord('circle', 150, 20, 10, 10, label=''), BlockRecord('square', 30, 40, 10, 10)]
+    records[0].setLocation(1, 2, 3)
+    for record in records:
+        chunks.stage(record)
+    chunks.seal()
+    assert chunks.packedCount() == 3 and sorted(chunks.packedKeys()) == [(0, 0), (1, 0)]
+    assert chunks.keysHolding([records[1].id]) == [(1, 0)]
+    
+    loaded = sorted(chunks.load((0, 0)), key=lambda record: record.id)
+    assert [[getattr(record, field) for field in FIELDS] for record in loaded] == [[getattr(record, field) for field in FIELDS]
+                                                                              for record in (records[0], records[2])]
+    assert chunks.isResident((0, 0)) and chunks.packedCount() == 1
+
+def test_evictionKeepsRecentAndWantedChunks():
+    chunks = WorldChunks(chunkSize=100, residentLimit=2)
+    for key in [(0, 0), (1, 0), (2, 0), (3, 0)]:
+        chunks.touch(key)
+    chunks.touch((0, 0))
+    assert chunks.evictionCandidates(keep={(1, 0)}) == [(2, 0), (3, 0)]
+    
+    chunks.evict((2, 0), [BlockRecord('square', 210, 10)])
+    assert not chunks.isResident((2, 0)) and chunks.packedCount() == 1
@@ -0,0 +1,283 @@
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QBuffer, QByteArray, QIODevice, Qt, Signal
+from PySide6.QtGui import QImage, QPainter, QPixmap, QColor, QFont
+
+from assetindex import defaultCachePath
+from instrumentation import log, timed
+
+# the editor saves a compressed thumbnail into each package's header, ahead of its export data,
+# so only the start of the file needs reading to find it
+HEADER_READ = 4 * 1024 * 1024
+PNG_START = b'\x89PNG\r\n\x1a\n'
+PNG_END = b'IEND\xaeB`\x82'
+JPEG_START = b'\xff\xd8\xff'
+JPEG_END = b'\xff\xd9'
+
+def defaultCacheFolder():
+    """Gets where thumbnails are cached, next to the asset index in the project's Saved folder
+    
+    Returns:
+        The path of the thumbnail folder
+    """
+    return os.path.join(os.path.dirname(defaultCachePath()), 'Thumbnails')
+
+def embeddedThumbnail(filePath):
+    """Gets the thumbnail that the editor saved into an asset's package file
+    
+    Args:
+        filePath (str): The package file of the asset
+    
+    Returns:
+        The PNG or JPEG bytes of the thumbnail, or None if the package has none
+    """
+    with open(filePath, 'rb') as packageFile:
+        data = packageFile.read(HEADER_READ)
+    for startMarker, endMarker in ((PNG_START, PNG_END), (JPEG_START, JPEG_END)):
+        start = data.find(startMarker)
+        if start < 0:
+            continue
+        end = data.find(endMarker, start)
+        if end >= 0:
+            return data[start:end + len(endMarker)]
+    return None
+
+def placeholderImage(size, name, className):
+    """Draws a stand-in thumbnail for assets without one, coloured by class and marked with the class' initial
+    
+    Args:
+        size (int): The width and height of the thumbnail
+        name (str): The name of the asset
+        className (str): The class of the asset, which may be empty
+    
+    Returns:
+        The QImage, which is safe to draw off the Qt thread unlike a QPixmap
+    """
+    label = className or name
+    hue = zlib.crc32(label.encode('utf-8')) % 360
+    image = QImage(size, size, QImage.Format_ARGB32_Premultiplied)
+    image.fill(QColor.fromHsv(hue, 90, 110))
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setPen(QColor(235, 235, 235))
+    font = QFont()
+    font.setPixelSize(max(8, size // 2))
+    font.setBold(True)
+    painter.setFont(font)
+    painter.drawText(image.rect(), Qt.AlignCenter, label[:1].upper() or '?')
+    painter.end()
+    return image
+
+def encodePng(image):
+    """Encodes a QImage as PNG bytes"""
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, 'PNG')
+    buffer.close()
+    return bytes(data)
+
+def writeAtomically(path, data):
+    """Writes a file through a temporary file that replaces it in one step, so readers never see half of it"""
+    tempPath = '{}.{}.tmp'.format(path, threading.get_ident())
+    with open(tempPath, 'wb') as cacheFile:
+        cacheFile.write(data)
+    os.replace(tempPath, path)
+
+class ThumbnailJob(QRunnable):
+    """Loads one thumbnail on a pool thread, from the disk cache or else from the asset's package file
+    
+    The disk cache is content-addressed: thumbnails are stored under the hash of their PNG bytes, so the many
+    assets that share the same thumbnail share one file, and a small ref file named by the hash of the asset's
+    file path and modification time and the thumbnail size points at the thumbnail it had when it was last read
+    """
+    def __init__(self, cache, key, filePath, mtime, name, className):
+        """Init's ThumbnailJob
+        
+        Args:
+            cache (ThumbnailCache): The cache that queued the job, which is handed the result
+            key (str): What the thumbnail is requested by, the asset's object path
+            filePath (str): The package file of the asset, or None
+            mtime (float): The modification time of the package file from the asset index
+            name (str): The name of the asset
+            className (str): The class of the asset
+        """
+        super().__init__()
+        # the cache holds on to the job until it finishes, so Qt mustn't delete it
+        self.setAutoDelete(False)
+        self.cache = cache
+        self.key = key
+        self.filePath = filePath
+        self.mtime = mtime
+        self.name = name
+        self.className = className
+        self.cancelled = False
+    
+    def run(self):
+        try:
+            image = self.load()
+        except Exception:
+            log.exception("Could not load the thumbnail of %s", self.key)
+            image = None
+        # cancelled jobs report back too, so that the cache can let go of them
+        self.cache.finished.emit(self, image)
+    
+    def load(self):
+        """Gets the thumbnail as a QImage of the cache's size, or None if the job was cancelled along the way"""
+        size = self.cache.size
+        refKey = '{}|{!r}|{}'.format(self.filePath, self.mtime, size).encode('utf-8')
+        refPath = os.path.join(self.cache.folder, 'refs', hashlib.sha1(refKey).hexdigest())
+        try:
+            with open(refPath, 'r') as refFile:
+                contentHash = refFile.read().strip()
+            image = QImage(os.path.join(self.cache.folder, 'blobs', contentHash + '.png'))
+            if not image.isNull():
+                return image
+        except OSError:
+            pass
+        
+        if self.cancelled:
+            return None
+        image = QImage()
+        if self.filePath:
+            try:
+                data = embeddedThumbnail(self.filePath)
+            except OSError:
+                data = None
+            if data:
+                image.loadFromData(data)
+        if self.cancelled:
+            return None
+        if image.isNull():
+            image = placeholderImage(size, self.name, self.className)
+        else:
+            image = image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        
+        data = encodePng(image)
+        contentHash = hashlib.sha1(data).hexdigest()
+        blobPath = os.path.join(self.cache.folder, 'blobs', contentHash + '.png')
+        try:
+            if not os.path.exists(blobPath):
+                writeAtomically(blobPath, data)
+            writeAtomically(refPath, contentHash.encode('ascii'))
+        except OSError:
+            log.warning("Could not cache the thumbnail of %s to %s", self.key, self.cache.folder)
+        return image
+
+class ThumbnailCache(QObject):
+    """Loads asset thumbnails on a pool of worker threads, keeping the most recent in a size-bounded LRU
+    
+    Thumbnails are decoded from the asset's package file or drawn as a placeholder, off the Qt thread, and
+    handed back to it through a queued signal, where they become QPixmaps. Requests that are no longer
+    wanted, like those for cells scrolled out of view, are taken off the queue before they start, and the
+    results of any that already started are dropped
+    """
+    # (key, QPixmap) on the Qt thread, for every thumbnail that finished loading
+    thumbnailReady = Signal(str, QPixmap)
+    # (ThumbnailJob, QImage or None) from the worker threads
+    finished = Signal(object, object)
+    
+    def __init__(self, size=64, memoryBudget=32 * 1024 * 1024, folder=None, threads=None, parent=None):
+        """Init's ThumbnailCache
+        
+        Args:
+            size (int): The width and height of the thumbnails
+            memoryBudget (int): How many bytes of thumbnails to keep in memory
+            folder (str): Where to cache the thumbnails on disk, in the project's Saved folder if not given
+            threads (int): How many worker threads to use, leaving one core for the editor if not given
+            parent (QObject): The Qt parent
+        """
+        super().__init__(parent)
+        self.size = size
+        self.memoryBudget = memoryBudget
+        self.folder = folder or defaultCacheFolder()
+        for subfolder in ('refs', 'blobs'):
+            os.makedirs(os.path.join(self.folder, subfolder), exist_ok=True)
+        
+        # {key: QPixmap} in least to most recently used order, and the bytes they take up
+        self.pixmaps = OrderedDict()
+        self.memoryUsed = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'cancelled': 0}
+        
+        # {key: ThumbnailJob} of the thumbnails being loaded, and the cancelled jobs that are still running
+        self.pending = {}
+        self.cancelled = set()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(threads or max(1, min(4, QThreadPool.globalInstance().maxThreadCount() - 1)))
+        self.finished.connect(self.finishJob, Qt.QueuedConnection)
+    
+    def get(self, key, filePath, mtime, name, className):
+        """Gets a thumbnail if it is in memory, or else starts loading it
+        
+        Args:
+            key (str): What the thumbnail is requested by, the asset's object path
+            filePath (str): The package file of the asset, or None
+            mtime (float): The modification time of the package file from the asset index
+            name (str): The name of the asset
+            className (str): The class of the asset
+        
+        Returns:
+            The QPixmap, or None if it is being loaded, in which case thumbnailReady is emitted once it is
+        """
+        pixmap = self.pixmaps.get(key)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(key)
+            self.stats['hits'] += 1
+            return pixmap
+        if key not in self.pending:
+            self.stats['misses'] += 1
+            job = self.pending[key] = ThumbnailJob(self, key, filePath, mtime, name, className)
+            self.pool.start(job)
+        return None
+    
+    def cancelExcept(self, keys):
+        """Cancels every pending thumbnail that is not wanted any more
+        
+        Args:
+            keys (set): The keys of the thumbnails that are still wanted
+        """
+        for key in [key for key in self.pending if key not in keys]:
+            job = self.pending.pop(key)
+            # jobs that already started finish, but their result is dropped
+            if not self.pool.tryTake(job):
+                job.cancelled = True
+                self.cancelled.add(job)
+            self.stats['cancelled'] += 1
+    
+    def cancelAll(self):
+        """Cancels every pending thumbnail"""
+        self.cancelExcept(())
+    
+    @timed('thumbnailReady')
+    def finishJob(self, job, image):
+        """Turns a loaded thumbnail into a QPixmap on the Qt thread, caches it and passes it on
+        
+        Args:
+            job (ThumbnailJob): The job that loaded it
+            image (QImage): The thumbnail, or None if it could not be loaded or the job was cancelled
+        """
+        self.cancelled.discard(job)
+        key = job.key
+        # a thumbnail cancelled and then asked for again has a newer job
+        if self.pending.get(key) is not job:
+            return
+        del self.pending[key]
+        if image is None:
+            return
+        pixmap = QPixmap.fromImage(image)
+        self.pixmaps[key] = pixmap
+        self.memoryUsed += self.pixmapBytes(pixmap)
+        while self.memoryUsed > self.memoryBudget and len(self.pixmaps) > 1:
+            _, evicted = self.pixmaps.popitem(last=False)
+            self.memoryUsed -= self.pixmapBytes(evicted)
+            self.stats['evictions'] += 1
+        self.thumbnailReady.emit(key, pixmap)
+    
+    @staticmethod
+    def pixmapBytes(pixmap):
+        """Gets roughly how many bytes a QPixmap takes up"""
+        return pixmap.width() * pixmap.height() * max(1, pixmap.depth() // 8)
@@ -0,0 +1,382 @@
+from collections import deque
+
+import numpy as np
+
+from blockrecord import BlockRecord
+from layoutfile import NO_STRING, SHAPES, StringTable
+
+# what an entry costs beyond its arrays, roughly the size of the Python objects holding them
+ENTRY_OVERHEAD = 200
+
+# a held actor is only a reference, but the budget should still feel the number of hidden actors kept in the level
+HELD_ACTOR_BYTES = 8
+
+# everything needed to put a deleted block back, one row per block, with strings kept as indices into the entry's strings
+BLOCK_DTYPE = np.dtype([
+    ('id', np.int64),
+    ('shape', np.uint8),
+    ('rect', np.float64, 4),
+    ('scale', np.float64, 3),
+    ('locationZ', np.float64),
+    ('label', np.uint32),
+    ('assetPath', np.uint32),
+    ('unrealPath', np.uint32),
+])
+
+def snapshotTransforms(records):
+    """Takes the rect and scale of blocks, to be compared against after they have been moved, resized or z-scaled
+    
+    Args:
+        records (list): The BlockRecords of the blocks
+    
+    Returns:
+        A tuple of (ids, values), where each row of values is (x, y, width, height, scale x, scale y, z-scale)
+    """
+    ids = np.fromiter((record.id for record in records), np.int64, len(records))
+    values = np.array([(record.x, record.y, record.width, record.height, record.scaleX, record.scaleY, record.zScale)
+                       for record in records], np.float64).reshape(-1, 7)
+    return ids, values
+
+class TransformEntry():
+    """Moves, resizes and z-scale changes of blocks, stored as their ids, their values before and the change to them"""
+    __slots__ = ('ids', 'before', 'delta')
+    
+    def __init__(self, ids, before, after):
+        """Init's the TransformEntry
+        
+        Args:
+            ids (np.ndarray): The record ids of the blocks
+            before (np.ndarray): The values of the blocks before the change, as taken by snapshotTransforms()
+            after (np.ndarray): The values of the blocks after the change
+        """
+        self.ids = ids
+        self.before = before
+        self.delta = self.compress(after - before)
+    
+    @staticmethod
+    def compress(delta):
+        """Keeps one row of the change when every block changed by the same amount, as they do when a group is dragged"""
+        if len(delta) > 1 and (delta == delta[0]).all():
+            return delta[:1].copy()
+        return delta
+    
+    @property
+    def nbytes(self):
+        return ENTRY_OVERHEAD + self.ids.nbytes + self.before.nbytes + self.delta.nbytes
+    
+    def after(self):
+        """Gets the values of the blocks after the change"""
+        return self.before + self.delta
+    
+    def undo(self, view):
+        view.applyTransforms(self.ids, self.before)
+    
+    def redo(self, view):
+        view.applyTransforms(self.ids, self.after())
+    
+    def merge(self, entry):
+        """Folds a later change to the same blocks into this one, such as another tick of the z slider
+        
+        Args:
+            entry (TransformEntry): The later change
+        
+        Returns:
+            Whether the change was merged
+        """
+        if not isinstance(entry, TransformEntry) or not np.array_equal(self.ids, entry.ids):
+            return False
+        self.delta = self.compress(entry.after() - self.before)
+        return True
+    
+    def heldActors(self):
+        return []
+
+class BlocksEntry():
+    """Blocks that were added or deleted together
+    
+    While the blocks are out of the grid, the entry keeps them packed into one array along with their hidden actors,
+    so that putting them back only has to show the actors again rather than spawn new ones
+    """
+    __slots__ = ('ids', 'added', 'blocks', 'strings', 'stringBytes', 'actors')
+    
+    def __init__(self, ids, added):
+        """Init's the BlocksEntry
+        
+        Args:
+            ids (list): The record ids of the blocks
+            added (bool): Whether the blocks were added, rather than deleted
+        """
+        self.ids = np.asarray(ids, np.int64)
+        self.added = added
+        self.blocks = None
+        self.strings = None
+        self.stringBytes = 0
+        self.actors = None
+    
+    @property
+    def nbytes(self):
+        size = ENTRY_OVERHEAD + self.ids.nbytes
+        if self.blocks is not None:
+            size += self.blocks.nbytes + self.stringBytes + len(self.actors) * HELD_ACTOR_BYTES
+        return size
+    
+    def undo(self, view):
+        if self.added:
+            self.remove(view)
+        else:
+            self.restore(view)
+    
+    def redo(self, view):
+        if self.added:
+            self.restore(view)
+        else:
+            self.remove(view)
+    
+    def merge(self, entry):
+        return False
+    
+    def forget(self, ids):
+        """Drops blocks from the entry, such as pasted blocks whose copy was cancelled before they got an actor
+        
+        Args:
+            ids (list): The record ids of the blocks
+        """
+        self.ids = self.ids[~np.isin(self.ids, ids)]
+        if self.blocks is not None:
+            keep = ~np.isin(self.blocks['id'], ids)
+            self.blocks = self.blocks[keep]
+            self.actors = [unrealActor for unrealActor, kept in zip(self.actors, keep.tolist()) if kept]
+    
+    def remove(self, view, schedule=False):
+        """Takes the blocks out of the grid, hiding and holding on to their actors
+        
+        Args:
+            view (GridGraphicsView): The view the blocks are in
+            schedule (bool): Whether to hide the actors through the spawn scheduler rather than all at once
+        """
+        records = view.removeBlocks(self.ids, schedule)
+        table = StringTable()
+        blocks = np.zeros(len(records), BLOCK_DTYPE)
+        for row, record in enumerate(records):
+            blocks[row] = (record.id, SHAPES.index(record.shape), (record.x, record.y, record.width, record.height),
+                           record.scale(), record.locationZ, table.intern(record.label),
+                           table.intern(record.assetPath), table.intern(record.unrealPath))
+        self.blocks = blocks
+        self.strings = table.strings
+        self.stringBytes = sum(len(string) for string in table.strings)
+        self.actors = [record.actor for record in records]
+    
+    def restore(self, view):
+        """Puts the blocks back into the grid with the ids they had, showing their held actors again
+        
+        Args:
+            view (GridGraphicsView): The view to put the blocks in
+        """
+        strings = self.strings
+        string = lambda index: None if index == NO_STRING else strings[index]
+        records = []
+        for block, unrealActor in zip(self.blocks.tolist(), self.actors):
+            key, shape, (x, y, width, height), (scaleX, scaleY, zScale), locationZ, label, assetPath, unrealPath = block
+            record = BlockRecord(SHAPES[shape], x, y, width, height, zScale, unrealActor, string(assetPath),
+                                 string(unrealPath), string(label), scaleX, scaleY)
+            record.id = key
+            record.locationZ = locationZ
+            records.append(record)
+        view.restoreBlocks(records)
+        self.blocks = None
+        self.strings = None
+        self.stringBytes = 0
+        self.actors = None
+    
+    def heldActors(self):
+        """Gets the hidden actors the entry is holding, with the object paths they are parked under
+        
+        Returns:
+            A list of (actor, object path) tuples
+        """
+        if self.blocks is None:
+            return []
+        return [(unrealActor, self.strings[assetPath]) for unrealActor, assetPath in zip(self.actors, self.blocks['assetPath'].tolist())
+                if unrealActor is not None and assetPath != NO_STRING]
+
+class CompoundEntry():
+    """Entries that make up one change together, such as the blocks a merge took out and the blocks it put in"""
+    __slots__ = ('entries',)
+    
+    def __init__(self, entries):
+        """Init's the CompoundEntry
+        
+        Args:
+            entries (list): The entries, in the order the change made them
+        """
+        self.entries = entries
+    
+    @property
+    def nbytes(self):
+        return ENTRY_OVERHEAD + sum(entry.nbytes for entry in self.entries)
+    
+    def undo(self, view):
+        for entry in reversed(self.entries):
+            entry.undo(view)
+    
+    def redo(self, view):
+        for entry in self.entries:
+            entry.redo(view)
+    
+    def merge(self, entry):
+        return False
+    
+    def heldActors(self):
+        held = []
+        for entry in self.entries:
+            held.extend(entry.heldActors())
+        return held
+
+class UndoJournal():
+    """An undo and redo history of compact entries, kept within a byte budget by evicting the oldest entries
+    
+    Entries store deltas rather than copies of items, and replay them on the view in one pass so that their engine
+    calls are queued together and go out in one flush
+    """
+    def __init__(self, view, byteBudget=4 * 1024 * 1024):
+        """Init's the UndoJournal
+        
+        Args:
+            view (GridGraphicsView): The view that entries are replayed on
+            byteBudget (int): The most memory the history may use, the oldest entries being evicted beyond it
+        """
+        self.view = view
+        self.byteBudget = byteBudget
+        self.undoStack = deque()
+        self.redoStack = []
+        self.totalBytes = 0
+        self.mergeKey = None
+        self.stats = {'pushed': 0, 'merged': 0, 'evicted': 0}
+    
+    def canUndo(self):
+        return bool(self.undoStack)
+    
+    def canRedo(self):
+        return bool(self.redoStack)
+    
+    def push(self, entry, mergeKey=None):
+        """Adds an entry for a change that has just been made, dropping anything that could be redone
+        
+        Args:
+            entry (TransformEntry, BlocksEntry or CompoundEntry): The entry
+            mergeKey (str): Consecutive entries with the same key are merged into one while the merge is open
+        """
+        self.clearRedo()
+        if mergeKey and mergeKey == self.mergeKey and self.undoStack:
+            top = self.undoStack[-1]
+            size = top.nbytes
+            if top.merge(entry):
+                self.totalBytes += top.nbytes - size
+                self.stats['merged'] += 1
+                return
+        self.undoStack.append(entry)
+        self.totalBytes += entry.nbytes
+        self.mergeKey = mergeKey
+        self.stats['pushed'] += 1
+        self.evict()
+    
+    def forget(self, entry, ids):
+        """Drops blocks that never made it into the grid from a BlocksEntry, and the entry itself once it has none left
+        
+        Args:
+            entry (BlocksEntry): The entry, which can be on either stack
+            ids (list): The record ids of the blocks
+        """
+        size = entry.nbytes
+        entry.forget(ids)
+        self.totalBytes += entry.nbytes - size
+        if len(entry.ids):
+            return
+        for stack in (self.undoStack, self.redoStack):
+            if any(candidate is entry for candidate in stack):
+                stack.remove(entry)
+                self.totalBytes -= entry.nbytes
+    
+    def closeMerge(self):
+        """Stops the next entry from being merged into the last one, such as when the z slider is released"""
+        self.mergeKey = None
+    
+    def undo(self):
+        """Undoes the last entry
+        
+        Returns:
+            The entry, or None if there was nothing to undo
+        """
+        if not self.undoStack:
+            return None
+        entry = self.undoStack.pop()
+        self.mergeKey = None
+        self.replay(entry, entry.undo)
+        self.redoStack.append(entry)
+        return entry
+    
+    def redo(self):
+        """Redoes the last undone entry
+        
+        Returns:
+            The entry, or None if there was nothing to redo
+        """
+        if not self.redoStack:
+            return None
+        entry = self.redoStack.pop()
+        self.replay(entry, entry.redo)
+        self.undoStack.append(entry)
+        self.evict()
+        return entry
+    
+    def replay(self, entry, step):
+        """Runs an entry's undo or redo, keeping track of how its size changed"""
+        size = entry.nbytes
+        step(self.view)
+        self.totalBytes += entry.nbytes - size
+    
+    def evict(self):
+        """Drops the oldest entries until the history fits in the byte budget, always keeping the newest one"""
+        held = []
+        while self.totalBytes > self.byteBudget and len(self.undoStack) > 1:
+            entry = self.undoStack.popleft()
+            self.totalBytes -= entry.nbytes
+            held.extend(entry.heldActors())
+            self.stats['evicted'] += 1
+        if held:
+            self.view.releaseHeldActors(held)
+    
+    def clearRedo(self):
+        """Drops every entry that could be redone"""
+        held = []
+        for entry in self.redoStack:
+            self.totalBytes -= entry.nbytes
+            held.extend(entry.heldActors())
+        self.redoStack = []
+        if held:
+            self.view.releaseHeldActors(held)
+    
+    def clear(self, schedule=True):
+        """Drops the whole history, releasing every actor held for deleted blocks
+        
+        Args:
+            schedule (bool): Whether to release the actors through the spawn scheduler rather than all at once
+        """
+        held = []
+        for entry in list(self.undoStack) + self.redoStack:
+            held.extend(entry.heldActors())
+        self.undoStack.clear()
+        self.redoStack = []
+        self.totalBytes = 0
+        self.mergeKey = None
+        if held:
+            self.view.releaseHeldActors(held, schedule)
+    
+    def setByteBudget(self, byteBudget):
+        """Changes the byte budget, evicting old entries straight away if the history no longer fits
+        
+        Args:
+            byteBudget (int): The most memory the history may use
+        """
+        self.byteBudget = byteBudget
+        self.evict()
@@ -1,59 +1,513 @@
+import sys
 import unreal
 
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from instancedmeshes import BlockInstance, InstancedMeshes
+from instrumentation import BridgeProfiler, InstrumentedNamespace, log, timed
+from remotebridge import activeTransport
+
+# new blocks start a quarter of a basic shape's size, until their item gives them their own scale
+DEFAULT_SCALE = (0.25, 0.25, 0.25)
+
+# the tool flushes its writes on the next tick of the Qt event loop, but scripts and batch jobs drive UnrealLibrary
+# without one, or without PySide6 at all, so Qt is only reached for when an application is already running
+
+def runningQtCore():
+    """Gets PySide6's QtCore when a Qt application is running, without importing PySide6 if nothing else has
+    
+    Returns:
+        The QtCore module, or None when there is no Qt event loop
+    """
+    QtCore = sys.modules.get('PySide6.QtCore')
+    if QtCore is None or QtCore.QCoreApplication.instance() is None:
+        return None
+    return QtCore
+
+def qtScheduler(callback):
+    """Runs a callback on the next tick of the Qt event loop
+    
+    Args:
+        callback (callable): What to run
+    
+    Returns:
+        Whether the callback was scheduled, which it isn't when no Qt application is running
+    """
+    QtCore = runningQtCore()
+    if QtCore is None:
+        return False
+    QtCore.QTimer.singleShot(0, callback)
+    return True
+
 class UnrealLibrary():
     """Class that reflects changes into Unreal Engine and gives access to the necessary libraries from the Unreal Engine Python API"""
-    def __init__(self):
-        """ Init's UnrealLibrary and initializes the necessary libraries"""
+    
+    # the library is shared by the whole tool so that writes from every item land in one queue
+    _sharedInstance = None
+    
+    def __init__(self, transport=None, scheduler=qtScheduler):
+        """ Init's UnrealLibrary and initializes the necessary libraries
+        
+        Args:
+            transport: How calls reach the editor, the in-process transport unless the tool was started in standalone mode
+            scheduler (callable): Called with flush() to run it later, returning whether it will; writes queued while it
+                can't wait for the next explicit flush(), which is how a caller with no Qt event loop uses the library
+        """
         super().__init__()
         
-        self.EAL = unreal.EditorAssetLibrary
-        self.ELL = unreal.EditorLevelLibrary
-        self.EAS = unreal.EditorActorSubsystem
-        self.EUL = unreal.EditorUtilityLibrary
+        # flushed writes are sent through the transport in one batch, which only matters when it is a remote one
+        # whose acknowledgements and delegate events are then picked up every pollInterval milliseconds while Qt runs,
+        # and otherwise whenever a result is waited on
+        self.transport = transport or activeTransport()
+        self.scheduler = scheduler
+        self.transportTimer = None
+        QtCore = runningQtCore()
+        if self.transport.pollInterval and QtCore is not None:
+            self.transportTimer = QtCore.QTimer()
+            self.transportTimer.timeout.connect(self.transport.poll)
+            self.transportTimer.start(self.transport.pollInterval)
+        
+        # every call made through these libraries, or on actors through actorCall(), is counted and timed by the profiler
+        self.profiler = BridgeProfiler.shared()
+        self.EAL = InstrumentedNamespace(unreal.EditorAssetLibrary, self.profiler)
+        self.ELL = InstrumentedNamespace(unreal.EditorLevelLibrary, self.profiler)
+        self.EAS = InstrumentedNamespace(unreal.EditorActorSubsystem, self.profiler)
+        self.EUL = InstrumentedNamespace(unreal.EditorUtilityLibrary, self.profiler)
+        self.SL = InstrumentedNamespace(unreal.SystemLibrary, self.profiler)
+        self.SDL = InstrumentedNamespace(unreal.SubobjectDataBlueprintFunctionLibrary, self.profiler)
+        self.subobjectSubsystem = None
+        
+        # pending writes are stored per actor as {'label': ..., 'location': ..., 'rotation': ..., 'scale': ..., 'hidden': ..., 'selected': ...}
+        # a later write to the same field replaces the earlier one (last write wins)
+        self.pendingCommands = {}
+        self.pendingSelection = None
+        self.flushScheduled = False
+        self.commandStats = {'requested': 0, 'coalesced': 0, 'issued': 0, 'flushes': 0}
+        
+        # deleted actors are hidden and parked here by asset path rather than destroyed
+        # so that the next spawn of the same asset can reuse one instead of spawning a new actor
+        self.actorPool = {}
+        # parked actors that were left rotated, which are the only ones that need their rotation reset when reused
+        self.rotatedParkedActors = set()
+        self.poolCaps = {}
+        self.defaultPoolCap = 100
+        self.poolStats = {'hits': 0, 'misses': 0, 'parked': 0, 'destroyed': 0}
+        
+        # loaded assets are kept in an LRU keyed by their resolved object path
+        # and picked asset paths only get converted to object paths once
+        self.assetCache = OrderedDict()
+        self.assetCacheSize = 64
+        self.assetCacheStats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+        self.resolvedPaths = {}
+        
+        # while instanced is on, new blocks of static meshes are drawn as instances of one component per mesh rather than
+        # as actors, and the writes queued for them are turned into instance transform updates on every flush
+        self.instanced = False
+        self.instances = InstancedMeshes(self)
+        
+        self.watchAssetChanges()
+        self.warmAssetCache()
+        
+    @classmethod
+    def shared(cls):
+        """Returns the UnrealLibrary shared by the whole tool, creating it on first use
+        
+        Returns:
+            The shared UnrealLibrary
+        """
+        if cls._sharedInstance is None:
+            cls._sharedInstance = cls()
+        return cls._sharedInstance
          
+    def resolveAssetPath(self, shape='square', assetPath=None):
+        """Gets the Unreal object path that an item of the given shape or picked asset will spawn
+        
+        Args:
+            shape (str): The shape of the item, used when there is no asset path
+            assetPath (str): The object path of the picked asset, or its file path relative to the content folder in older layouts
+            
+        Returns:
+            The object path to load, e.g. "/Engine/BasicShapes/Cube.Cube"
+        """
+        if not assetPath:
+            if shape == 'circle':
+                return "/Engine/BasicShapes/Sphere.Sphere"
+            return "/Engine/BasicShapes/Cube.Cube"
+        
+        # paths that are already object paths, like those picked from the asset index or of actors imported from the level,
+        # are used as they are, only file paths from older layouts need converting
+        if not assetPath.endswith('.uasset'):
+            return assetPath
+        
+        newAssetPath = self.resolvedPaths.get(assetPath)
+        if newAssetPath:
+            return newAssetPath
+        
+        # we have an asset path, but need to convert it to a relevant path
+        # newAssetPath = assetPath.replace(r"C:\Program Files\Epic Games\UE_5.2\Engine\Content", "/Engine")
+        log.debug("resolving asset path %s", assetPath)
+        actorName = assetPath.split("/")[-1].split(".")[0]
+        newAssetPath = "/Engine{}".format(assetPath)
+        newAssetPath = newAssetPath.replace("uasset", actorName)
+        log.debug("resolved asset path to %s", newAssetPath)
+        
+        self.resolvedPaths[assetPath] = newAssetPath
+        return newAssetPath
+    
+    def loadAsset(self, objectPath):
+        """Loads an asset through the LRU cache, only going to Unreal when it is not cached
+        
+        Args:
+            objectPath (str): The resolved object path of the asset
+            
+        Returns:
+            The loaded Unreal asset
+        """
+        asset = self.assetCache.get(objectPath)
+        if asset is not None:
+            self.assetCache.move_to_end(objectPath)
+            self.assetCacheStats['hits'] += 1
+            return asset
+        
+        self.assetCacheStats['misses'] += 1
+        asset = self.EAL.load_asset(objectPath)
+        if asset is None:
+            return None
+        
+        self.assetCache[objectPath] = asset
+        if len(self.assetCache) > self.assetCacheSize:
+            self.assetCache.popitem(last=False)
+            self.assetCacheStats['evictions'] += 1
+        return asset
+    
+    def warmAssetCache(self):
+        """Loads the basic shapes into the asset cache so that the first cube or sphere spawn doesn't pay for it"""
+        for shape in ('square', 'circle'):
+            self.loadAsset(self.resolveAssetPath(shape))
+            
+    def invalidateAsset(self, objectPath=None):
+        """Drops an asset from the cache so that it is loaded again on its next spawn
+        
+        Args:
+            objectPath (str): The resolved object path of the asset, or None to clear the whole cache
+        """
+        if objectPath is None:
+            self.assetCacheStats['invalidations'] += len(self.assetCache)
+            self.assetCache.clear()
+        elif self.assetCache.pop(objectPath, None) is not None:
+            self.assetCacheStats['invalidations'] += 1
+            
+    def watchAssetChanges(self):
+        """Hooks into the editor's import subsystem so that reimported assets are dropped from the asset cache
+        
+        Deleted assets are not broadcast to Python, so those are caught in spawnActor when a spawn from a cached asset fails
+        """
+        try:
+            importSubsystem = unreal.get_editor_subsystem(unreal.ImportSubsystem)
+            importSubsystem.on_asset_reimport.add_callable(self.onAssetReimported)
+        except AttributeError:
+            # older engine versions don't expose the import subsystem to Python
+            pass
+        
+    def onAssetReimported(self, asset):
+        """Invalidates the cached copy of a reimported asset
+        
+        Args:
+            asset (Object): The asset that was reimported
+        """
+        self.invalidateAsset(asset.get_path_name())
+        
+    def resetAssetCacheStats(self):
+        """Resets the counters for asset cache hits, misses, evictions and invalidations"""
+        for key in self.assetCacheStats:
+            self.assetCacheStats[key] = 0
+            
+    def assetCacheHitRate(self):
+        """Gets the fraction of asset loads that were served from the cache
+        
+        Returns:
+            The hit rate between 0 and 1, or 0 if nothing has been loaded yet
+        """
+        lookups = self.assetCacheStats['hits'] + self.assetCacheStats['misses']
+        return self.assetCacheStats['hits'] / lookups if lookups else 0.0
+    
     def spawnActor(self, shape='square', x=0, y=0, label=None, assetPath=None):
         """Spawns an actor in Unreal Engine that is tied to an item in the 2D grid
         
+        A parked actor of the same asset is reused if the pool has one
+        
         Args:
             shape (str): The shape to be given
             x (float): The starting x position
             y (float): The starting y position
             label (str): The label to set for the actor in Unreal
+            assetPath (str): The path of the picked asset, if not spawning a basic shape
             
         Returns:
             The Unreal Engine asset
         """
-        actorClass = None
+        objectPath = self.resolveAssetPath(shape, assetPath)
+        if self.instanced:
+            spawnedInstances = self.spawnInstances(objectPath, [(x, y)], [label])
+            if spawnedInstances:
+                return spawnedInstances[0]
         
-        if not assetPath:
-            if shape == 'circle':
-                assetPath = "/Engine/BasicShapes/Sphere.Sphere"
-            else:
-                assetPath = "/Engine/BasicShapes/Cube.Cube"
-            actorClass = self.EAL.load_asset(assetPath)
-        else:
-            # we have an asset path, but need to convert it to a relevant path
-            # newAssetPath = assetPath.replace(r"C:\Program Files\Epic Games\UE_5.2\Engine\Content", "/Engine")
-            print(assetPath)
-            actorName = assetPath.split("/")[-1].split(".")[0]
-            newAssetPath = "/Engine{}".format(assetPath)
-            newAssetPath = newAssetPath.replace("uasset", actorName)
-            print(newAssetPath)
+        return self.spawnLevelActors(objectPath, [(x, y)], [label])[0]
+    
+    def spawnActors(self, shape='square', positions=(), labels=(), assetPath=None):
+        """Spawns many actors of the same asset, resolving and loading the asset only once for the whole batch
+        
+        Parked actors of the asset are reused first, and their label and location writes are queued like any other
+        
+        Args:
+            shape (str): The shape to be given
+            positions (list): The (x, y) position of each actor
+            labels (list): The label to set for each actor in Unreal
+            assetPath (str): The path of the picked asset, if not spawning basic shapes
             
-            actorClass = self.EAL.load_asset(newAssetPath)
+        Returns:
+            A list of the Unreal Engine actors, or BlockInstances while instanced is on, in the order of the positions
+        """
+        objectPath = self.resolveAssetPath(shape, assetPath)
+        if self.instanced:
+            spawnedInstances = self.spawnInstances(objectPath, positions, labels)
+            if spawnedInstances is not None:
+                return spawnedInstances
+        return self.spawnLevelActors(objectPath, positions, labels)
+    
+    def spawnLevelActors(self, objectPath, positions, labels):
+        """Spawns an actor for every position, reusing parked actors of the asset first
         
-        # set the position to the same of the item
-        actorLocation = unreal.Vector(x, y, 0)
+        Every actor starts at its position with no rotation and the default scale, whether it was spawned or taken
+        from the pool, where it kept whatever transform it was released with
+        
+        Args:
+            objectPath (str): The resolved object path of the asset
+            positions (list): The (x, y) position of each actor
+            labels (list): The label to set for each actor in Unreal
         
-        # we wont be setting rotation
+        Returns:
+            A list of the Unreal Engine actors, in the order of the positions
+        """
+        actorClass = None
         actorRotation = unreal.Rotator(0, 0, 0)
+        spawnedActors = []
+        for (x, y), label in zip(positions, labels):
+            actorLocation = unreal.Vector(x, y, 0)
+            spawnedActor = self.takePooledActor(objectPath)
+            if spawnedActor:
+                self.setActorLocation(spawnedActor, actorLocation)
+            else:
+                if actorClass is None:
+                    actorClass = self.loadAsset(objectPath)
+                spawnedActor = self.ELL.spawn_actor_from_object(actorClass, actorLocation, actorRotation)
+                if not spawnedActor:
+                    # the cached asset may have been deleted or replaced since it was loaded, so load it again
+                    self.invalidateAsset(objectPath)
+                    actorClass = self.loadAsset(objectPath)
+                    spawnedActor = self.ELL.spawn_actor_from_object(actorClass, actorLocation, actorRotation)
+            # a scale the caller queues next replaces this one before the flush, so it costs no extra call
+            self.setActorScale(spawnedActor, unreal.Vector(*DEFAULT_SCALE))
+            if label:
+                self.setActorLabel(spawnedActor, label)
+            spawnedActors.append(spawnedActor)
+        return spawnedActors
+    
+    def spawnInstances(self, objectPath, positions, labels):
+        """Adds an instance of a mesh for every position, which reach Unreal with the next flush
         
-        spawnedActor = self.ELL.spawn_actor_from_object(actorClass, actorLocation, actorRotation)
-        spawnedActor.set_actor_scale3d(unreal.Vector(0.25, 0.25, 0.25))
-        if label:
-            spawnedActor.set_actor_label(label)
+        Args:
+            objectPath (str): The resolved object path of the mesh
+            positions (list): The (x, y) position of each instance
+            labels (list): The label of each block
+            
+        Returns:
+            A list of BlockInstances in the order of the positions, or None if the asset is not a static mesh
+            or its component could not be created, in which case actors should be spawned instead
+        """
+        mesh = self.loadAsset(objectPath)
+        if not isinstance(mesh, unreal.StaticMesh):
+            return None
+        host = self.instances.host(objectPath, mesh)
+        if host is None:
+            return None
+        
+        scale = unreal.Vector(*DEFAULT_SCALE)
+        spawnedInstances = [self.instances.add(host, unreal.Vector(x, y, 0), scale, label) for (x, y), label in zip(positions, labels)]
+        self.scheduleFlush()
+        return spawnedInstances
+    
+    def convertToActors(self, instances):
+        """Replaces instances with actors of their mesh, for placing a blockout made of instances for good
+        
+        Args:
+            instances (list): The BlockInstances to replace
+            
+        Returns:
+            A list of the Unreal Engine actors, in the order of the instances
+        """
+        # the instances' mirrors only take in their pending writes on a flush
+        self.flush()
+        spawnedActors = []
+        for instance in instances:
+            location = instance.location
+            spawnedActor = self.spawnLevelActors(instance.host.objectPath, [(location.x, location.y)], [instance.label])[0]
+            if location.z:
+                self.setActorLocation(spawnedActor, location)
+            self.setActorScale(spawnedActor, instance.scale)
+            self.instances.release(instance)
+            spawnedActors.append(spawnedActor)
+        self.scheduleFlush()
+        return spawnedActors
+    
+    def isValid(self, unrealActor):
+        """Whether an actor, or an instance, is still in the level
+        
+        Args:
+            unrealActor (Actor): The unreal actor or BlockInstance
+        """
+        if isinstance(unrealActor, BlockInstance):
+            return self.instances.isLive(unrealActor) and self.SL.is_valid(unrealActor.host.actor)
+        return self.SL.is_valid(unrealActor)
+    
+    def takePooledActor(self, objectPath):
+        """Takes a parked actor for the asset out of the pool and unhides it
+        
+        Args:
+            objectPath (str): The resolved object path of the asset
+            
+        Returns:
+            The parked actor, or None if the pool has none for this asset
+        """
+        parked = self.actorPool.get(objectPath)
+        while parked:
+            unrealActor = parked.pop()
+            # the actor could have been deleted from the level while it was parked
+            if not self.SL.is_valid(unrealActor):
+                self.pendingCommands.pop(unrealActor, None)
+                self.rotatedParkedActors.discard(unrealActor)
+                continue
+            self.poolStats['hits'] += 1
+            self.queueCommand(unrealActor, 'hidden', False)
+            # the actor may have been rotated in the editor before its block was deleted
+            if unrealActor in self.rotatedParkedActors:
+                self.rotatedParkedActors.discard(unrealActor)
+                self.queueCommand(unrealActor, 'rotation', unreal.Rotator(0, 0, 0))
+            return unrealActor
+        
+        self.poolStats['misses'] += 1
+        return None
+    
+    def releaseActor(self, unrealActor, objectPath):
+        """Hides and parks an actor in the pool, or destroys it if the pool for its asset is full
+        
+        Args:
+            unrealActor (Actor): The unreal actor that is no longer needed
+            objectPath (str): The resolved object path of the actor's asset
+        """
+        if not unrealActor:
+            return
+        if isinstance(unrealActor, BlockInstance):
+            # an instance's index is kept for the next instance of its mesh instead
+            self.destroyActor(unrealActor)
+            return
+        
+        parked = self.actorPool.setdefault(objectPath, [])
+        if len(parked) >= self.poolCaps.get(objectPath, self.defaultPoolCap):
+            self.destroyActor(unrealActor)
+            return
+        
+        # any pending transform or label writes no longer matter, we only need to hide it
+        self.discardCommands(unrealActor)
+        
+        # the rotation it is parked with is read once here, so that reusing an unrotated actor costs no rotation write
+        rotation = self.actorCall(unrealActor, 'get_actor_rotation')
+        if rotation.roll or rotation.pitch or rotation.yaw:
+            self.rotatedParkedActors.add(unrealActor)
+        self.queueCommand(unrealActor, 'hidden', True)
+        parked.append(unrealActor)
+        self.poolStats['parked'] += 1
+        
+    def destroyActor(self, unrealActor):
+        """Destroys an actor in the level, dropping any writes still pending for it
+        
+        Args:
+            unrealActor (Actor): The unreal actor to destroy
+        """
+        self.discardCommands(unrealActor)
+        if isinstance(unrealActor, BlockInstance):
+            self.instances.release(unrealActor)
+            self.scheduleFlush()
+            return
+        self.ELL.destroy_actor(unrealActor)
+        self.poolStats['destroyed'] += 1
+        
+    def spawnEmptyActor(self, label):
+        """Spawns a bare actor at the origin, to add components to
         
-        return spawnedActor
+        Args:
+            label (str): The label of the actor
+        
+        Returns:
+            The actor, or None if it could not be spawned
+        """
+        unrealActor = self.ELL.spawn_actor_from_class(unreal.Actor, unreal.Vector(0, 0, 0), unreal.Rotator(0, 0, 0))
+        if unrealActor:
+            self.actorCall(unrealActor, 'set_actor_label', label)
+        return unrealActor
+    
+    def addComponent(self, unrealActor, componentClass):
+        """Adds a new component to a placed actor
+        
+        Components can only be added to a placed actor through the subobject data subsystem, which is fetched once
+        
+        Args:
+            unrealActor (Actor): The unreal actor
+            componentClass (type): The class of the component, e.g. unreal.InstancedStaticMeshComponent
+        
+        Returns:
+            A tuple of (the component or None, the reason it could not be added)
+        """
+        if self.subobjectSubsystem is None:
+            self.subobjectSubsystem = self.profiler.call('get_engine_subsystem', unreal.get_engine_subsystem, unreal.SubobjectDataSubsystem)
+        subobjects = self.subobjectSubsystem
+        params = unreal.AddNewSubobjectParams()
+        params.set_editor_property('parent_handle', self.actorCall(subobjects, 'k2_gather_subobject_data_for_instance', unrealActor)[0])
+        params.set_editor_property('new_class', componentClass)
+        handle, failure = self.actorCall(subobjects, 'add_new_subobject', params)
+        return self.SDL.get_object(self.SDL.get_data(handle)), failure
+    
+    def setPoolCap(self, cap, objectPath=None):
+        """Sets how many actors can be parked for an asset, or for every asset without its own cap
+        
+        Args:
+            cap (int): The maximum number of parked actors
+            objectPath (str): The resolved object path of the asset, or None to set the default cap
+        """
+        if objectPath:
+            self.poolCaps[objectPath] = cap
+        else:
+            self.defaultPoolCap = cap
+        
+    def drainPool(self, objectPath=None):
+        """Destroys parked actors, which should be done before the tool closes so no hidden actors are left in the level
+        
+        Args:
+            objectPath (str): The resolved object path of the asset to drain, or None to drain every asset
+        """
+        objectPaths = [objectPath] if objectPath else list(self.actorPool)
+        for path in objectPaths:
+            for unrealActor in self.actorPool.pop(path, []):
+                self.rotatedParkedActors.discard(unrealActor)
+                if self.SL.is_valid(unrealActor):
+                    self.destroyActor(unrealActor)
+                else:
+                    self.discardCommands(unrealActor)
+        
+        # instances given up are removed from their components too, now that nothing more is likely to reuse them
+        self.flush()
+        self.instances.compact(objectPath)
     
     def copyActor(self, unrealActor=None, label=None):
         """Copies an Unreal actor and returns the duplicated actor
@@ -67,21 +521,346 @@ class UnrealLibrary():
         """
         if not unrealActor:
             return
+        if isinstance(unrealActor, BlockInstance):
+            pending = self.pendingCommands.get(unrealActor, {})
+            return self.instances.add(unrealActor.host, pending.get('location', unrealActor.location),
+                                      pending.get('scale', unrealActor.scale), label)
         
         duplicatedActor = self.EAS.duplicate_actor(unreal.EditorActorSubsystem(), unrealActor)
         if label:
-            duplicatedActor.set_actor_label(label)
+            self.setActorLabel(duplicatedActor, label)
         
         return duplicatedActor
     
+    def parkedActors(self):
+        """Gets every actor parked in the pool
+        
+        Returns:
+            A set of actors
+        """
+        parked = set()
+        for parkedActors in self.actorPool.values():
+            parked.update(parkedActors)
+        return parked
+    
+    def getLevelActorsByLabel(self, exclude=()):
+        """Gets every actor in the current level by its label, leaving out actors parked in the pool and those hosting instances
+        
+        Args:
+            exclude (set): Actors to leave out, such as those already bound to blocks
+        
+        Returns:
+            A dict of {label: actor}
+        """
+        skipped = self.parkedActors()
+        skipped.update(self.instances.hostActors())
+        skipped.update(exclude)
+        actorsByLabel = {}
+        for unrealActor in self.ELL.get_all_level_actors():
+            if unrealActor not in skipped:
+                actorsByLabel[self.actorCall(unrealActor, 'get_actor_label')] = unrealActor
+        return actorsByLabel
+    
+    def getStaticMeshActors(self, exclude=()):
+        """Reads the label, mesh, transform and bounds of every static mesh actor in the current level
+        
+        The level is fetched in one query and each actor is then read once, leaving the math on the results to the caller
+        
+        Args:
+            exclude (set): Actors to leave out, such as those already in the grid, on top of those parked in the pool
+            
+        Returns:
+            A tuple of (actors, labels, object paths, transforms), where each transform is a tuple of
+            (location x, y, z, scale x, y, z, bounds origin x, y, bounds extent x, y)
+        """
+        self.flush()
+        skipped = self.parkedActors()
+        skipped.update(exclude)
+        
+        actors, labels, objectPaths, transforms = [], [], [], []
+        for unrealActor in self.ELL.get_all_level_actors():
+            if unrealActor in skipped or not isinstance(unrealActor, unreal.StaticMeshActor):
+                continue
+            component = self.actorCall(unrealActor, 'get_editor_property', 'static_mesh_component')
+            mesh = self.actorCall(component, 'get_editor_property', 'static_mesh') if component else None
+            if mesh is None:
+                continue
+            location = self.actorCall(unrealActor, 'get_actor_location')
+            scale = self.actorCall(unrealActor, 'get_actor_scale3d')
+            origin, extent = self.actorCall(unrealActor, 'get_actor_bounds', False)
+            
+            actors.append(unrealActor)
+            labels.append(self.actorCall(unrealActor, 'get_actor_label'))
+            objectPaths.append(self.actorCall(mesh, 'get_path_name'))
+            transforms.append((location.x, location.y, location.z, scale.x, scale.y, scale.z,
+                               origin.x, origin.y, extent.x, extent.y))
+        return actors, labels, objectPaths, transforms
+    
     def selectActors(self, unrealActors):
-        """Selects the actors in the Unreal Engine editor
+        """Queues a selection of the actors in the Unreal Engine editor, replacing the whole editor selection
         
         Args:
             unrealActors (list): The actors to select
         """
+        self.commandStats['requested'] += 1
+        if self.pendingSelection is not None:
+            self.commandStats['coalesced'] += 1
+        
+        # any per-actor selection changes queued before this are superseded by it
+        for pending in self.pendingCommands.values():
+            if pending.pop('selected', None) is not None:
+                self.commandStats['coalesced'] += 1
+        # instances are selected through the actor hosting them
+        self.pendingSelection = self.instances.selectionActors(unrealActors)
+        self.scheduleFlush()
+        
+    def setActorSelected(self, unrealActor, selected):
+        """Queues adding an actor to or removing it from the editor selection, leaving the rest of the selection alone
+        
+        Args:
+            unrealActor (Actor): The unreal actor
+            selected (bool): Whether the actor should be selected
+        """
+        if isinstance(unrealActor, BlockInstance):
+            # the host actor stays selected while any of its instances are
+            selected = self.instances.setSelected(unrealActor, selected)
+            unrealActor = unrealActor.host.actor
+        self.queueCommand(unrealActor, 'selected', selected)
+        
+    def setActorLocation(self, unrealActor, location):
+        """Queues a location write for the actor
+        
+        Args:
+            unrealActor (Actor): The unreal actor to move
+            location (unreal.Vector): The new location
+        """
+        self.queueCommand(unrealActor, 'location', location)
+        
+    def setActorScale(self, unrealActor, scale):
+        """Queues a scale write for the actor
+        
+        Args:
+            unrealActor (Actor): The unreal actor to scale
+            scale (unreal.Vector): The new 3D scale
+        """
+        self.queueCommand(unrealActor, 'scale', scale)
+        
+    def setActorLabel(self, unrealActor, label):
+        """Queues a label write for the actor
+        
+        Args:
+            unrealActor (Actor): The unreal actor to relabel
+            label (str): The new label
+        """
+        self.queueCommand(unrealActor, 'label', label)
+    
+    def setActorHidden(self, unrealActor, hidden):
+        """Queues hiding or showing an actor, along with turning its collision off or on
+        
+        Args:
+            unrealActor (Actor): The unreal actor
+            hidden (bool): Whether the actor should be hidden
+        """
+        self.queueCommand(unrealActor, 'hidden', hidden)
+    
+    def actorCall(self, unrealActor, name, *args):
+        """Calls a method on an actor, or on one of its components or assets, timing it through the profiler
+        
+        Args:
+            unrealActor (Actor): The unreal actor, component or asset
+            name (str): The name of the method, e.g. 'set_actor_location'
+            
+        Returns:
+            Whatever the method returns
+        """
+        return self.profiler.call(name, getattr(unrealActor, name), *args)
+    
+    def getActorLabel(self, unrealActor):
+        """Gets the label of an actor from Unreal
+        
+        Args:
+            unrealActor (Actor): The unreal actor
+            
+        Returns:
+            The label
+        """
+        if isinstance(unrealActor, BlockInstance):
+            return self.pendingCommands.get(unrealActor, {}).get('label', unrealActor.label)
+        return self.actorCall(unrealActor, 'get_actor_label')
+        
+    def getActorStates(self, unrealActors):
+        """Reads the location, scale and label of many actors at once, flushing pending writes first so the reads are current
+        
+        Args:
+            unrealActors (list): The unreal actors
+            
+        Returns:
+            A list of (location, scale, label) tuples, in the same order as the actors
+        """
+        self.flush()
+        states = []
+        for unrealActor in unrealActors:
+            if isinstance(unrealActor, BlockInstance):
+                transform = self.instances.readTransform(unrealActor)
+                states.append((transform.translation, transform.scale3d, unrealActor.label))
+            else:
+                states.append((self.actorCall(unrealActor, 'get_actor_location'), self.actorCall(unrealActor, 'get_actor_scale3d'),
+                               self.actorCall(unrealActor, 'get_actor_label')))
+        return states
+    
+    def getActorTransforms(self, unrealActors):
+        """Reads the location and scale of many actors at once, flushing pending writes first so the reads are current
+        
+        Args:
+            unrealActors (list): The unreal actors, which must not be instances
+        
+        Returns:
+            A list of (x, y, z, scale x, scale y, scale z) tuples, in the same order as the actors
+        """
+        self.flush()
+        transforms = []
+        for unrealActor in unrealActors:
+            location = self.actorCall(unrealActor, 'get_actor_location')
+            scale = self.actorCall(unrealActor, 'get_actor_scale3d')
+            transforms.append((location.x, location.y, location.z, scale.x, scale.y, scale.z))
+        return transforms
+    
+    def getActorScale(self, unrealActor):
+        """Gets the scale of the actor, taking any queued scale write into account
+        
+        Args:
+            unrealActor (Actor): The unreal actor
+            
+        Returns:
+            The actor's 3D scale as an unreal.Vector
+        """
+        pending = self.pendingCommands.get(unrealActor)
+        if pending and 'scale' in pending:
+            return pending['scale']
+        if isinstance(unrealActor, BlockInstance):
+            return unrealActor.scale
+        return self.actorCall(unrealActor, 'get_actor_scale3d')
         
-        # this does not need to be a method if it's just one line
-        # but might want to do more here so we'll leave it
-        self.ELL.set_selected_level_actors(unrealActors)
-         
\ No newline at end of file
+    def queueCommand(self, unrealActor, field, value):
+        """Records a pending write for an actor, replacing any pending write to the same field
+        
+        Args:
+            unrealActor (Actor): The unreal actor the write is for
+            field (str): One of 'label', 'location', 'rotation', 'scale', 'hidden' or 'selected'
+            value: The value to write
+        """
+        if not unrealActor:
+            return
+        
+        self.commandStats['requested'] += 1
+        pending = self.pendingCommands.setdefault(unrealActor, {})
+        if field in pending:
+            self.commandStats['coalesced'] += 1
+        pending[field] = value
+        self.scheduleFlush()
+        
+    def discardCommands(self, unrealActor):
+        """Drops any pending writes for an actor, used when the actor is about to go away
+        
+        Args:
+            unrealActor (Actor): The unreal actor
+        """
+        pending = self.pendingCommands.pop(unrealActor, None)
+        if pending:
+            self.commandStats['coalesced'] += len(pending)
+        
+    def scheduleFlush(self):
+        """Schedules a flush through the scheduler, the next Qt event-loop tick by default, if one is not already scheduled
+        
+        When the scheduler can't run it, as with no Qt application, the writes stay queued until flush() is called
+        """
+        if not self.flushScheduled:
+            self.flushScheduled = self.scheduler(self.flush)
+        
+    @timed('flush')
+    def flush(self):
+        """Issues every pending write to Unreal Engine, one call per actor and field, sent as one batch by a remote transport"""
+        self.flushScheduled = False
+        if not self.pendingCommands and self.pendingSelection is None and not self.instances.hasChanges():
+            return
+        
+        pendingCommands = self.pendingCommands
+        self.pendingCommands = {}
+        self.instances.dropDeletedHosts()
+        with self.transport.batch():
+            issued = self.issueCommands(pendingCommands)
+        
+        self.commandStats['issued'] += issued
+        self.commandStats['flushes'] += 1
+        
+    def issueCommands(self, pendingCommands):
+        """Makes the calls for a flush, none of whose results are used, so a remote transport can batch them
+        
+        Args:
+            pendingCommands (dict): The pending writes by actor
+            
+        Returns:
+            The number of calls made
+        """
+        issued = 0
+        for unrealActor, pending in pendingCommands.items():
+            if isinstance(unrealActor, BlockInstance):
+                # instance writes only update the mirror here, and go out per component below
+                self.instances.apply(unrealActor, pending)
+                continue
+            if 'label' in pending:
+                self.actorCall(unrealActor, 'set_actor_label', pending['label'])
+                issued += 1
+            if 'location' in pending:
+                # no need to sweep or teleport, since we are just placing actors
+                self.actorCall(unrealActor, 'set_actor_location', pending['location'], False, False)
+                issued += 1
+            if 'rotation' in pending:
+                self.actorCall(unrealActor, 'set_actor_rotation', pending['rotation'], False)
+                issued += 1
+            if 'scale' in pending:
+                self.actorCall(unrealActor, 'set_actor_scale3d', pending['scale'])
+                issued += 1
+            if 'hidden' in pending:
+                # parked actors are hidden in the editor and also have collision turned off
+                hidden = pending['hidden']
+                self.actorCall(unrealActor, 'set_is_temporarily_hidden_in_editor', hidden)
+                self.actorCall(unrealActor, 'set_actor_hidden_in_game', hidden)
+                self.actorCall(unrealActor, 'set_actor_enable_collision', not hidden)
+                issued += 3
+        issued += self.instances.flush()
+        
+        # selection goes last so that it applies to actors in their final state
+        if self.pendingSelection is not None:
+            self.ELL.set_selected_level_actors(self.pendingSelection)
+            self.pendingSelection = None
+            issued += 1
+        for unrealActor, pending in pendingCommands.items():
+            if 'selected' in pending:
+                self.ELL.set_actor_selection_state(unrealActor, pending['selected'])
+                issued += 1
+        return issued
+        
+    @contextmanager
+    def transaction(self, description):
+        """Makes the writes inside it one change in the editor's undo history, flushing them before it ends
+        
+        Args:
+            description (str): What the change is called in the editor's undo history
+        """
+        self.SL.begin_transaction('QuickBlock', description, None)
+        try:
+            yield
+            self.flush()
+        finally:
+            self.SL.end_transaction()
+        
+    def resetCommandStats(self):
+        """Resets the counters for requested, coalesced and issued writes"""
+        for key in self.commandStats:
+            self.commandStats[key] = 0
+            
+    def resetPoolStats(self):
+        """Resets the counters for pool hits, misses, parked and destroyed actors"""
+        for key in self.poolStats:
+            self.poolStats[key] = 0
@@ -0,0 +1,257 @@
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+from blockrecord import BlockRecord
+from layoutfile import SHAPES, NO_STRING, StringTable
+
+# the grid is divided into square chunks of a fixed size, and a block belongs to the chunk its center is in. Only the
+# chunks near the view are resident, with their blocks held as records and items like any other; every other chunk
+# keeps its blocks packed into a few NumPy columns, so a level many times the size of the view costs a small fraction
+# of the memory its records would, and that memory doesn't grow as the view moves across it
+
+# one row per block, so that a chunk is a single array however many columns it has
+PACKED = np.dtype([
+    ('id', np.int64),
+    # the rect, z-scale and mirror are kept as doubles, as the mirror is compared against the actor when syncing with the level
+    ('values', np.float64, 10),
+    ('labelEnd', np.int64),
+    ('assetPath', np.uint32),
+    ('unrealPath', np.uint32),
+    ('shape', np.uint8),
+])
+
+class PackedChunk():
+    """The blocks of one chunk packed into one NumPy array, with each block's label stored as UTF-8 in one buffer"""
+    __slots__ = ('rows', 'labelData', 'actors')
+    
+    def __init__(self, records, strings):
+        """Init's PackedChunk
+        
+        Args:
+            records (list): The BlockRecords of the chunk
+            strings (StringTable): The table that asset paths are interned in, which is shared by every chunk
+        """
+        labels = []
+        rows = []
+        end = 0
+        for record in records:
+            if record.label is None:
+                # labels that are None are told apart from empty ones by a negative end
+                labelEnd = -end - 1
+            else:
+                label = record.label.encode('utf-8')
+                labels.append(label)
+                end += len(label)
+                labelEnd = end
+            rows.append((record.id, (record.x, record.y, record.width, record.height, record.zScale, record.scaleX, record.scaleY,
+                                     record.locationX, record.locationY, record.locationZ),
+                         labelEnd, strings.intern(record.assetPath), strings.intern(record.unrealPath), SHAPES.index(record.shape)))
+        self.rows = np.array(rows, PACKED)
+        self.labelData = b''.join(labels)
+        self.actors = [record.actor for record in records]
+    
+    def __len__(self):
+        return len(self.rows)
+    
+    def ids(self):
+        """Gets the record ids of the chunk's blocks"""
+        return self.rows['id']
+    
+    def unpack(self, strings):
+        """Builds the records of the chunk again, with the ids they had when they were packed
+        
+        Args:
+            strings (StringTable): The table the asset paths were interned in
+        
+        Returns:
+            A list of BlockRecords
+        """
+        records = []
+        start = 0
+        for (key, values, end, assetPath, unrealPath, shape), actor in zip(self.rows.tolist(), self.actors):
+            if end < 0:
+                label = None
+                end = -end - 1
+            else:
+                label = self.labelData[start:end].decode('utf-8')
+            start = end
+            x, y, width, height, zScale, scaleX, scaleY, locationX, locationY, locationZ = values
+            record = BlockRecord(SHAPES[shape], x, y, width, height, zScale, actor, stringAt(strings, assetPath),
+                                 stringAt(strings, unrealPath), label, scaleX, scaleY)
+            record.id = key
+            record.setLocation(locationX, locationY, locationZ)
+            records.append(record)
+        return records
+
+def stringAt(strings, index):
+    """Gets a string interned in a StringTable, or None for NO_STRING"""
+    return None if index == NO_STRING else strings.strings[index]
+
+class WorldChunks():
+    """Which chunks of the grid are resident, in least recently used order, and the packed blocks of the rest
+    
+    Blocks of a chunk that isn't resident are staged as records and packed together the next time seal() is called,
+    so that adding many blocks to a chunk packs it once rather than once per block
+    """
+    def __init__(self, chunkSize=1000, residentLimit=64):
+        """Init's WorldChunks
+        
+        Args:
+            chunkSize (float): The width and height of a chunk, in grid units
+            residentLimit (int): How many chunks can be resident before the least recently used are packed
+        """
+        self.chunkSize = chunkSize
+        self.residentLimit = residentLimit
+        self.resident = OrderedDict()
+        # {chunk key: [PackedChunk, ...]} and {chunk key: [BlockRecord, ...]} for the chunks that aren't resident
+        self.packed = {}
+        self.staged = {}
+        self.strings = StringTable()
+        # blocks staged into a chunk that is already packed become a new part of it, and the parts are merged once there are maxParts
+        self.maxParts = 8
+        self.stats = {'loaded': 0, 'evicted': 0, 'prefetched': 0, 'blocksLoaded': 0, 'blocksPacked': 0}
+    
+    def keyAt(self, x, y):
+        """Gets the key of the chunk a point is in"""
+        size = self.chunkSize
+        return math.floor(x / size), math.floor(y / size)
+    
+    def keyOf(self, record):
+        """Gets the key of the chunk a block belongs to, which is the one its center is in"""
+        return self.keyAt(*record.center())
+    
+    def keysInRect(self, left, top, right, bottom, ring=0):
+        """Gets the keys of the chunks that overlap a region
+        
+        Args:
+            left (float): The left of the region
+            top (float): The top of the region
+            right (float): The right of the region
+            bottom (float): The bottom of the region
+            ring (int): How many chunks past the region to go on every side
+        
+        Returns:
+            A list of chunk keys
+        """
+        firstColumn, firstRow = self.keyAt(left, top)
+        lastColumn, lastRow = self.keyAt(right, bottom)
+        return [(column, row) for column in range(firstColumn - ring, lastColumn + ring + 1)
+                for row in range(firstRow - ring, lastRow + ring + 1)]
+    
+    def chunkRect(self, key):
+        """Gets the (x, y, width, height) of a chunk"""
+        size = self.chunkSize
+        return key[0] * size, key[1] * size, size, size
+    
+    def isResident(self, key):
+        """Whether a chunk's blocks are held as records in the view"""
+        return key in self.resident
+    
+    def hasBlocks(self, key):
+        """Whether a chunk that isn't resident has blocks waiting to be loaded"""
+        return key in self.packed or key in self.staged
+    
+    def touch(self, key):
+        """Marks a chunk as resident and the most recently used"""
+        self.resident[key] = True
+        self.resident.move_to_end(key)
+    
+    def stage(self, record):
+        """Adds a block to the chunk it belongs to while the chunk isn't resident, to be packed on the next seal()"""
+        self.staged.setdefault(self.keyOf(record), []).append(record)
+    
+    def seal(self):
+        """Packs every staged block into its chunk, as one more part of it or, once it has maxParts, merged into one part"""
+        for key, records in self.staged.items():
+            parts = self.packed.setdefault(key, [])
+            if len(parts) >= self.maxParts:
+                records = [record for part in parts for record in part.unpack(self.strings)] + records
+                parts.clear()
+            parts.append(PackedChunk(records, self.strings))
+            self.stats['blocksPacked'] += len(records)
+        self.staged = {}
+    
+    def load(self, key):
+        """Takes the blocks out of a chunk that isn't resident and marks it resident
+        
+        Returns:
+            A list of the chunk's BlockRecords, for the view to hold
+        """
+        records = [record for part in self.packed.pop(key, []) for record in part.unpack(self.strings)]
+        records.extend(self.staged.pop(key, []))
+        self.touch(key)
+        self.stats['loaded'] += 1
+        self.stats['blocksLoaded'] += len(records)
+        return records
+    
+    def evict(self, key, records):
+        """Packs a resident chunk's blocks and marks it no longer resident
+        
+        Args:
+            key (tuple): The chunk key
+            records (list): The BlockRecords the view held for the chunk
+        """
+        self.resident.pop(key, None)
+        if records:
+            self.staged.setdefault(key, []).extend(records)
+        self.stats['evicted'] += 1
+    
+    def evictionCandidates(self, keep):
+        """Gets the least recently used resident chunks that have to go for the resident count to be back within the limit
+        
+        Args:
+            keep (set): Chunks that must stay resident, such as those in or near the view
+        
+        Returns:
+            A list of chunk keys, least recently used first
+        """
+        excess = len(self.resident) - self.residentLimit
+        if excess <= 0:
+            return []
+        candidates = []
+        for key in self.resident:
+            if key not in keep:
+                candidates.append(key)
+                if len(candidates) == excess:
+                    break
+        return candidates
+    
+    def keysHolding(self, ids):
+        """Gets the chunks that aren't resident but hold any of the given blocks
+        
+        Args:
+            ids (iterable): Record ids
+        
+        Returns:
+            A list of chunk keys
+        """
+        wanted = np.fromiter(ids, np.int64)
+        if not len(wanted):
+            return []
+        wantedSet = set(wanted.tolist())
+        keys = [key for key, records in self.staged.items() if any(record.id in wantedSet for record in records)]
+        for key, parts in self.packed.items():
+            if key not in keys and any(np.isin(part.ids(), wanted).any() for part in parts):
+                keys.append(key)
+        return keys
+    
+    def hasPacked(self):
+        """Whether any chunk has blocks that aren't resident"""
+        return bool(self.packed or self.staged)
+    
+    def packedKeys(self):
+        """Gets every chunk with blocks that aren't resident"""
+        return list(set(self.packed) | set(self.staged))
+    
+    def packedCount(self):
+        """Gets the number of blocks that aren't resident"""
+        return (sum(len(part) for parts in self.packed.values() for part in parts)
+                + sum(len(records) for records in self.staged.values()))
+    
+    def packedActors(self):
+        """Gets the actors of the blocks that aren't resident, without unpacking them"""
+        actors = [actor for parts in self.packed.values() for part in parts for actor in part.actors]
+        actors.extend(record.actor for records in self.staged.values() for record in records)
+        return actors